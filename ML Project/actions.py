@@ -1,8 +1,12 @@
 # actions.py
 from __future__ import annotations
-from dataclasses import dataclass
-from queue import Queue
-from typing import Optional, Literal
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from dataclasses import dataclass, replace
+from queue import Empty, Queue
+from typing import Callable, Deque, Dict, List, Optional, Literal
 
 ActionType = Literal[
     "MOUSE_MOVE",
@@ -18,6 +22,13 @@ ActionType = Literal[
     "QUIT",
 ]
 
+# Delivered ahead of everything else
+PRIORITY_TYPES = frozenset({"QUIT", "MOUSE_UP", "TOGGLE_GESTURES"})
+# Handed to a batch handler one at a time, so a slow TTS/browser call is timed on its own
+CONTROL_TYPES = frozenset({"SAY", "OPEN_URL", "TOGGLE_GESTURES", "QUIT"})
+# Merged with a queued action of the same type instead of queued again
+COALESCE_TYPES = frozenset({"MOUSE_MOVE", "SCROLL"})
+
 @dataclass
 class Action:
     type: ActionType
@@ -27,14 +38,268 @@ class Action:
     text: Optional[str] = None
     enabled: Optional[bool] = None
     url: Optional[str] = None
+    source: Optional[str] = None          # "gesture", "voice", "ml_gesture", ...
+
+    # Latency stamps (time.perf_counter()): source frame/audio capture, frame sequence, bus enqueue
+    t_capture: Optional[float] = None
+    seq: Optional[int] = None
+    t_enqueue: Optional[float] = None
+
+# Action coordinates are normalized ints in 0..10000
+def create_move_action(x: float, y: float, source: Optional[str] = None) -> Action:
+    """x, y in 0..1 (camera/screen fraction)."""
+    return Action(type="MOUSE_MOVE", x=int(x * 10_000), y=int(y * 10_000), source=source)
+
+def create_click_action(double: bool = False, source: Optional[str] = None) -> Action:
+    return Action(type="DOUBLE_CLICK" if double else "CLICK", source=source)
+
+def create_scroll_action(direction: str = "up", amount: int = 400, source: Optional[str] = None) -> Action:
+    return Action(type="SCROLL", amount=abs(amount) if direction == "up" else -abs(amount), source=source)
+
+def create_pause_action(source: Optional[str] = None) -> Action:
+    return Action(type="TOGGLE_GESTURES", enabled=False, source=source)
+
+Handler = Callable[[Action], None]
+BatchHandler = Callable[[List[Action]], None]
+
+class _HandlerThread(threading.Thread):
+    """Runs handler calls one at a time so the worker can wait on them with a timeout.
+    A call that overruns is abandoned together with this thread."""
 
-class ActionBus:
     def __init__(self) -> None:
-        self.q: Queue[Action] = Queue()
+        super().__init__(name="ActionBus-handler", daemon=True)
+        self.jobs: Queue = Queue()
+        self.start()
+
+    def submit(self, fn: Callable, arg) -> Future:
+        fut: Future = Future()
+        self.jobs.put((fn, arg, fut))
+        return fut
+
+    def run(self) -> None:
+        while True:
+            fn, arg, fut = self.jobs.get()
+            if fn is None:
+                return
+            try:
+                fut.set_result(fn(arg))
+            except BaseException as e:
+                fut.set_exception(e)
+
+class ActionBus:
+    """Bounded action queue that coalesces stale intents before delivery.
+
+    MOUSE_MOVE keeps only the latest target and SCROLL amounts are summed, as long
+    as no other action is queued in between (so a move never jumps across a
+    MOUSE_DOWN). QUIT, MOUSE_UP and TOGGLE_GESTURES use a priority lane; a
+    MOUSE_UP whose MOUSE_DOWN is still queued stays in order behind it.
+
+    start() runs a dispatch worker that drains the bus in batches and hands them
+    to a batch handler (runs of input actions together, control actions one at a
+    time), or to the handlers registered per action type. Each handler call is
+    bounded by action_timeout. A QUIT (or stop()) closes the bus
+    and the worker drains whatever is still queued before exiting.
+    """
+
+    def __init__(self, capacity: int = 256, batch_size: int = 16,
+                 action_timeout: Optional[float] = 5.0) -> None:
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.action_timeout = action_timeout
+        self._cond = threading.Condition()
+        self._priority: Deque[Action] = deque()
+        self._normal: Deque[Action] = deque()
+        self._counters: Dict[str, int] = {"put": 0, "delivered": 0, "merged": 0, "dropped": 0,
+                                          "rejected": 0, "failed": 0, "timed_out": 0}
+        self._closed = False
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._batch_handler: Optional[BatchHandler] = None
+        self._worker: Optional[threading.Thread] = None
+        self._runner: Optional[_HandlerThread] = None
+
+    # ------------------------------------------------------------------ queue
+
+    def put(self, action: Action) -> bool:
+        """Queue an action; returns False if it was dropped (bus full) or the bus is closed."""
+        action.t_enqueue = time.perf_counter()
+        with self._cond:
+            if self._closed:
+                self._counters["rejected"] += 1
+                return False
+            self._counters["put"] += 1
+            if self._is_priority(action):
+                lane = self._priority
+            elif self._coalesce(action):
+                self._counters["merged"] += 1
+                self._cond.notify()
+                return True
+            else:
+                lane = self._normal
+
+            # Priority actions are never dropped (a lost MOUSE_UP would leave the button held)
+            if len(lane) >= self.capacity and action.type not in PRIORITY_TYPES:
+                self._counters["dropped"] += 1
+                return False
+            lane.append(action)
+            self._cond.notify()
+            return True
 
-    def put(self, action: Action) -> None:
-        self.q.put(action)
+    enqueue = put
 
     def get(self, timeout: Optional[float] = None) -> Action:
-        return self.q.get(timeout=timeout)
-    
\ No newline at end of file
+        """Next action, priority lane first. Raises queue.Empty on timeout."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._priority or self._normal, timeout):
+                raise Empty
+            lane = self._priority if self._priority else self._normal
+            self._counters["delivered"] += 1
+            return lane.popleft()
+
+    def get_batch(self, max_items: int = 16, timeout: Optional[float] = None) -> List[Action]:
+        """Wait for at least one action, then drain up to max_items without waiting."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._priority or self._normal, timeout):
+                raise Empty
+            return self._take(max_items)
+
+    def _take(self, max_items: int) -> List[Action]:
+        batch: List[Action] = []
+        while len(batch) < max_items and (self._priority or self._normal):
+            lane = self._priority if self._priority else self._normal
+            batch.append(lane.popleft())
+        self._counters["delivered"] += len(batch)
+        return batch
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        """Stop accepting actions; queued ones are still delivered."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def qsize(self) -> int:
+        with self._cond:
+            return len(self._priority) + len(self._normal)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return dict(self._counters, queued=len(self._priority) + len(self._normal))
+
+    # ----------------------------------------------------------------- worker
+
+    def register(self, action_type: str, handler: Handler) -> None:
+        """Call handler(action) for every delivered action of this type (used when
+        start() is given no batch handler)."""
+        self._handlers.setdefault(action_type, []).append(handler)
+
+    def start(self, handler: Optional[BatchHandler] = None) -> None:
+        """Start the dispatch worker. handler(batch) receives up to batch_size
+        actions per call; without one, registered per-type handlers are used."""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._batch_handler = handler
+        with self._cond:
+            self._closed = False
+        self._worker = threading.Thread(target=self._run, name="ActionBus-worker", daemon=True)
+        self._worker.start()
+
+    def stop(self, drain: bool = True, timeout: Optional[float] = None) -> None:
+        """Close the bus and wait for the worker. With drain=False queued actions
+        are discarded (a pending MOUSE_UP is still delivered)."""
+        with self._cond:
+            self._closed = True
+            if not drain:
+                self._normal.clear()
+                self._priority = deque(a for a in self._priority if a.type == "MOUSE_UP")
+            self._cond.notify_all()
+        self.join(timeout)
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """Block until the worker exits (after a QUIT or stop())."""
+        if self._worker is not None and self._worker is not threading.current_thread():
+            self._worker.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and self._worker.is_alive()
+
+    def _run(self) -> None:
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._priority or self._normal or self._closed)
+                    if not (self._priority or self._normal):
+                        return
+                    batch = self._take(self.batch_size)
+                if any(a.type == "QUIT" for a in batch):
+                    self.close()
+                if self._batch_handler is not None:
+                    for segment in self._segments(batch):
+                        self._call(self._batch_handler, segment)
+                else:
+                    for action in batch:
+                        for handler in self._handlers.get(action.type, ()):
+                            self._call(handler, action)
+        finally:
+            if self._runner is not None:
+                self._runner.jobs.put((None, None, None))
+                self._runner = None
+
+    @staticmethod
+    def _segments(batch: List[Action]) -> List[List[Action]]:
+        """Split a batch into runs of input actions and single control actions."""
+        segments: List[List[Action]] = []
+        for action in batch:
+            if action.type in CONTROL_TYPES or not segments or segments[-1][-1].type in CONTROL_TYPES:
+                segments.append([action])
+            else:
+                segments[-1].append(action)
+        return segments
+
+    def _call(self, fn: Callable, arg) -> None:
+        if not self.action_timeout:
+            try:
+                fn(arg)
+            except Exception as e:
+                self._counters["failed"] += 1
+                print(f"[ActionBus] Handler error: {e}")
+            return
+
+        if self._runner is None:
+            self._runner = _HandlerThread()
+        try:
+            self._runner.submit(fn, arg).result(timeout=self.action_timeout)
+        except FutureTimeout:
+            self._counters["timed_out"] += 1
+            print(f"[ActionBus] Handler exceeded {self.action_timeout:.1f}s, abandoning it")
+            # The stuck call keeps its thread; later actions get a fresh one
+            self._runner.jobs.put((None, None, None))
+            self._runner = None
+        except Exception as e:
+            self._counters["failed"] += 1
+            print(f"[ActionBus] Handler error: {e}")
+
+    def _is_priority(self, action: Action) -> bool:
+        if action.type not in PRIORITY_TYPES:
+            return False
+        if action.type == "MOUSE_UP":
+            return not any(a.type == "MOUSE_DOWN" for a in self._normal)
+        return True
+
+    def _coalesce(self, action: Action) -> bool:
+        if action.type not in COALESCE_TYPES:
+            return False
+        # Walk back over queued moves/scrolls only; anything else is an ordering barrier
+        for i in range(len(self._normal) - 1, -1, -1):
+            queued = self._normal[i]
+            if queued.type not in COALESCE_TYPES:
+                return False
+            if queued.type == action.type:
+                if action.type == "SCROLL":
+                    action = replace(action, amount=(queued.amount or 0) + (action.amount or 0))
+                self._normal[i] = action
+                return True
+        return False
@@ -0,0 +1,204 @@
+"""
+active_sampling.py - Uncertainty-driven sample selection for data collection
+Keeps a frame only if the current model is unsure about it or it is far from the samples we already have
+"""
+
+import math
+from collections import Counter, defaultdict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from dedup import normalize_landmarks
+
+
+class ActiveSampler:
+    """
+    Decide per frame whether a new sample is worth saving
+
+    A frame is saved when any of these hold:
+    - the model predicts a different class than the one being collected
+    - the margin between the top two class probabilities is below `margin_threshold`
+    - the normalized prediction entropy is above `entropy_threshold`
+    - the frame is farther than `novelty_radius` from every stored sample of its class
+    """
+
+    def __init__(self, model_path: Optional[str] = None, margin_threshold: float = 0.15,
+                 entropy_threshold: float = 0.7, novelty_radius: float = 0.15, model_data: dict = None):
+        """
+        Initialize sampler
+
+        Args:
+            model_path: Trained model from train_model.py (joblib)
+            margin_threshold: Save when top-1 minus top-2 probability is below this
+            entropy_threshold: Save when entropy / log(n_classes) is above this
+            novelty_radius: Save when farther than this from all samples of the class
+            model_data: Already loaded model dict (instead of model_path)
+        """
+        if model_data is None:
+            import joblib
+            model_data = joblib.load(model_path)
+        self.model = model_data['model']
+        self.label_encoder = model_data['label_encoder']
+        self.margin_threshold = margin_threshold
+        self.entropy_threshold = entropy_threshold
+        self.novelty_radius = novelty_radius
+
+        # Normalized samples per class (grown as samples are saved)
+        self._samples: Dict[str, list] = defaultdict(list)
+        self.counts: Counter = Counter()
+        self.seen: Counter = Counter()
+        self.saved: Counter = Counter()
+
+        # Running uncertainty per class, shown in the overlay
+        self.uncertainty: Dict[str, float] = {}
+
+    def seed(self, X: np.ndarray, y) -> None:
+        """Register samples already in the dataset"""
+        Xn = normalize_landmarks(X)
+        for row, label in zip(Xn, y):
+            self._samples[label].append(row)
+            self.counts[label] += 1
+
+    def _min_distance(self, xn: np.ndarray, gesture: str) -> float:
+        stored = self._samples.get(gesture)
+        if not stored:
+            return math.inf
+        return float(np.min(np.linalg.norm(np.asarray(stored) - xn, axis=1)))
+
+    def score(self, features: np.ndarray, gesture: str) -> Tuple[bool, dict]:
+        """
+        Score one frame
+
+        Args:
+            features: Raw landmark features in the model's layout
+            gesture: Gesture currently being collected
+
+        Returns:
+            (save, info) where info holds margin, entropy, distance and reason
+        """
+        x = np.asarray(features, dtype=np.float64).reshape(1, -1)
+        proba = self.model.predict_proba(x)[0]
+        top = np.sort(proba)[::-1]
+        margin = float(top[0] - (top[1] if len(top) > 1 else 0.0))
+        nz = proba[proba > 0]
+        entropy = float(-(nz * np.log(nz)).sum() / math.log(max(len(proba), 2)))
+        predicted = self.label_encoder.inverse_transform([int(np.argmax(proba))])[0]
+        distance = self._min_distance(normalize_landmarks(x)[0], gesture)
+
+        if predicted != gesture:
+            reason = "misclassified"
+        elif margin < self.margin_threshold:
+            reason = "low margin"
+        elif entropy > self.entropy_threshold:
+            reason = "high entropy"
+        elif distance > self.novelty_radius:
+            reason = "novel"
+        else:
+            reason = None
+
+        self.seen[gesture] += 1
+        prev = self.uncertainty.get(gesture, 1.0 - margin)
+        self.uncertainty[gesture] = 0.9 * prev + 0.1 * (1.0 - margin)
+
+        info = {"margin": margin, "entropy": entropy, "distance": distance,
+                "predicted": predicted, "reason": reason}
+        return reason is not None, info
+
+    def add(self, features: np.ndarray, gesture: str) -> None:
+        """Record a saved sample so later frames are compared against it"""
+        xn = normalize_landmarks(np.asarray(features).reshape(1, -1))[0]
+        self._samples[gesture].append(xn)
+        self.counts[gesture] += 1
+        self.saved[gesture] += 1
+
+    def coverage(self, gesture: str) -> dict:
+        """Overlay statistics for one gesture"""
+        seen = self.seen[gesture]
+        return {
+            "samples": self.counts[gesture],
+            "seen": seen,
+            "kept_ratio": (self.saved[gesture] / seen) if seen else 0.0,
+            "uncertainty": self.uncertainty.get(gesture, 1.0),
+        }
+
+
+def simulate(data_csv: str, seed_per_class: int = 20, random_state: int = 42, **sampler_kwargs) -> dict:
+    """
+    Replay a recorded dataset through the sampler and compare with using every frame
+
+    A seed model is trained on the first `seed_per_class` frames of each
+    class; the remaining training frames are streamed in recording order and
+    kept only when the sampler asks for them. Both the active subset and the
+    full training set are scored on the same session-grouped test split.
+    """
+    import pandas as pd
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import accuracy_score
+    from sklearn.preprocessing import LabelEncoder
+
+    from dedup import group_train_test_split, session_groups, split_columns
+
+    df = pd.read_csv(data_csv) if isinstance(data_csv, str) else data_csv
+    feature_cols, label_col = split_columns(df)
+    X = np.nan_to_num(df[feature_cols].values, nan=0.0)
+    y = df[label_col].astype(str).values
+    idx = np.arange(len(df))
+    train_idx, test_idx, _, _ = group_train_test_split(idx, y, session_groups(df), random_state=random_state)
+    train_idx = np.sort(train_idx)
+
+    def fit(rows):
+        clf = RandomForestClassifier(n_estimators=100, random_state=random_state, n_jobs=-1)
+        return clf.fit(X[rows], y[rows])
+
+    seed_rows = pd.Series(train_idx).groupby(y[train_idx]).head(seed_per_class).values
+    encoder = LabelEncoder().fit(y)
+    seed_model = RandomForestClassifier(n_estimators=100, random_state=random_state, n_jobs=-1)
+    seed_model.fit(X[seed_rows], encoder.transform(y[seed_rows]))
+
+    sampler = ActiveSampler(model_data={'model': seed_model, 'label_encoder': encoder}, **sampler_kwargs)
+    sampler.seed(X[seed_rows], y[seed_rows])
+    selected = list(seed_rows)
+    seed_set = set(seed_rows)
+    for i in train_idx:
+        if i in seed_set:
+            continue
+        save, _ = sampler.score(X[i], y[i])
+        if save:
+            sampler.add(X[i], y[i])
+            selected.append(i)
+
+    full_acc = accuracy_score(y[test_idx], fit(train_idx).predict(X[test_idx]))
+    active_acc = accuracy_score(y[test_idx], fit(np.array(selected)).predict(X[test_idx]))
+    return {
+        "full": {"samples": len(train_idx), "accuracy": full_acc},
+        "active": {"samples": len(selected), "accuracy": active_acc},
+        "fraction": len(selected) / max(len(train_idx), 1),
+    }
+
+
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Simulate active sample selection on a recorded dataset")
+    parser.add_argument("--data", type=str, nargs="+", required=True, help="Landmark CSV(s) in recording order")
+    parser.add_argument("--seed-per-class", type=int, default=20, help="Frames per class for the seed model")
+    parser.add_argument("--margin", type=float, default=0.15, help="Margin threshold")
+    parser.add_argument("--entropy", type=float, default=0.7, help="Normalized entropy threshold")
+    parser.add_argument("--novelty", type=float, default=0.15, help="Novelty radius")
+
+    args = parser.parse_args()
+
+    from dedup import load_frames
+    report = simulate(load_frames(args.data), seed_per_class=args.seed_per_class,
+                      margin_threshold=args.margin, entropy_threshold=args.entropy,
+                      novelty_radius=args.novelty)
+    for name in ("full", "active"):
+        r = report[name]
+        print(f"{name:>6}: {r['samples']:>6} samples, accuracy {r['accuracy']:.4f}")
+    print(f"Active subset uses {100 * report['fraction']:.1f}% of the frames")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# audio_ring.py
+from __future__ import annotations
+import threading
+from collections import deque
+from queue import Empty
+from typing import Deque, Optional, Tuple
+
+import numpy as np
+
+POLICIES = ("drop_oldest", "drop_newest")
+
+class AudioRing:
+    """Preallocated int16 buffer between the audio callback and the recognizer.
+
+    The buffer is `slots` rows of `blocksize` samples. write() copies a block
+    into a free row (the only copy on the way to Vosk) and queues it with its
+    capture time; mark_end() queues an end-of-segment marker. read() hands
+    out the oldest row as a memoryview, valid until release() or the next
+    read(). When no row is free, "drop_oldest" recycles the oldest queued row
+    (never the one being read) and "drop_newest" drops the incoming block.
+    Single producer, single consumer.
+    """
+
+    def __init__(self, slots: int, blocksize: int, policy: str = "drop_oldest") -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overflow policy {policy!r}, expected one of {POLICIES}")
+        self.blocksize = blocksize
+        self.policy = policy
+        self._buf = np.zeros((slots, blocksize), dtype=np.int16)
+        self._free: Deque[int] = deque(range(slots))
+        self._queued: Deque[Tuple[float, int, int]] = deque()  # (t, row, samples); row -1 marks segment end
+        self._held: Optional[int] = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self.counters = {"written": 0, "read": 0, "dropped": 0, "overflows": 0}
+
+    def write(self, t: float, samples: np.ndarray) -> bool:
+        """Copy int16 samples in (longer blocks take several rows); returns
+        False if anything was dropped."""
+        ok = True
+        with self._cond:
+            if self._closed:
+                return False
+            for i in range(0, len(samples), self.blocksize):
+                part = samples[i:i + self.blocksize]
+                row = self._take_row()
+                if row is None:
+                    self.counters["dropped"] += len(part)
+                    ok = False
+                    continue
+                np.copyto(self._buf[row, :len(part)], part)
+                self._queued.append((t, row, len(part)))
+                self.counters["written"] += len(part)
+            self._cond.notify()
+        return ok
+
+    def _take_row(self) -> Optional[int]:
+        if self._free:
+            return self._free.popleft()
+        self.counters["overflows"] += 1
+        if self.policy == "drop_newest":
+            return None
+        # Recycle the oldest queued block; end markers in front of it go with it
+        while self._queued:
+            _, row, n = self._queued.popleft()
+            if row >= 0:
+                self.counters["dropped"] += n
+                return row
+        return None
+
+    def mark_end(self, t: float) -> None:
+        with self._cond:
+            if self._queued and self._queued[-1][1] < 0:
+                return
+            self._queued.append((t, -1, 0))
+            self._cond.notify()
+
+    def read(self, timeout: Optional[float] = None) -> Tuple[float, Optional[memoryview]]:
+        """Oldest (t, bytes view), or (t, None) for a segment end. Releases
+        the previous view. Raises queue.Empty on timeout or once closed."""
+        with self._cond:
+            self._release()
+            if not self._cond.wait_for(lambda: self._queued or self._closed, timeout) or not self._queued:
+                raise Empty
+            t, row, n = self._queued.popleft()
+            if row < 0:
+                return t, None
+            self._held = row
+            self.counters["read"] += n
+            return t, memoryview(self._buf[row, :n]).cast("B")
+
+    def release(self) -> None:
+        """Hand the row of the last read() back to the writer."""
+        with self._cond:
+            self._release()
+
+    def _release(self) -> None:
+        if self._held is not None:
+            self._free.append(self._held)
+            self._held = None
+
+    def close(self) -> None:
+        """Stop accepting audio, discard what is queued and wake the reader."""
+        with self._cond:
+            self._closed = True
+            self._free.extend(row for _, row, _ in self._queued if row >= 0)
+            self._queued.clear()
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def qsize(self) -> int:
+        with self._cond:
+            return sum(1 for _, row, _ in self._queued if row >= 0)
@@ -0,0 +1,330 @@
+"""
+bench_replay.py - Replay recorded or synthetic hand sessions
+Reports cursor filter lag/jitter, or (--gestures) redundant gesture actions per second
+"""
+
+import argparse
+from typing import Dict, Tuple
+
+import numpy as np
+
+from filters import EmaFilter, OneEuroFilter
+from gesture_controller import GestureConfig
+from gesture_state import FINGER_TIPS, MIDDLE, SCROLL, WRIST, GestureStateMachine, ScrollAccumulator, hand_features
+
+SCREEN_WIDTH = 1920
+
+
+def synthetic_trajectory(fps: float = 30.0, noise: float = 0.002, seed: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Holds and sweeps of the index fingertip in normalized coordinates
+
+    Args:
+        fps: Camera frame rate
+        noise: Std of landmark noise (normalized units)
+        seed: RNG seed
+
+    Returns:
+        (t, truth, observed) - timestamps, true positions and noisy positions, shape (n, 2)
+    """
+    rng = np.random.default_rng(seed)
+    points = [(0.2, 0.3), (0.8, 0.3), (0.8, 0.7), (0.3, 0.6), (0.5, 0.5), (0.9, 0.2)]
+    segments = []
+    for a, b in zip(points, points[1:]):
+        hold = np.repeat([a], int(fps * 1.0), axis=0)
+        s = np.linspace(0, 1, int(fps * 0.4))
+        s = 0.5 - 0.5 * np.cos(np.pi * s)  # ease in/out
+        sweep = np.asarray(a) + np.outer(s, np.subtract(b, a))
+        segments += [hold, sweep]
+    segments.append(np.repeat([points[-1]], int(fps * 1.0), axis=0))
+    truth = np.concatenate(segments)
+    t = np.arange(len(truth)) / fps
+    return t, truth, truth + rng.normal(0, noise, truth.shape)
+
+
+def track_trajectory(base: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Index fingertip from a session_recorder track; the reference is a centered
+    (non-causal) moving average, which has no lag
+
+    Args:
+        base: Recording base path (without extension)
+    """
+    from session_recorder import HAS_HAND, load_track
+
+    records, _ = load_track(base)
+    records = records[(records["flags"] & HAS_HAND) != 0]
+    t = records["timestamp"] - records["timestamp"][0]
+    observed = records["landmarks"][:, 8, :2].astype(np.float64)
+    kernel = np.ones(5) / 5
+    truth = np.column_stack([np.convolve(np.pad(observed[:, i], 2, mode="edge"), kernel, mode="valid")
+                             for i in range(2)])
+    return t, truth, observed
+
+
+def run_filter(filt, t: np.ndarray, observed: np.ndarray, horizon: float = 0.0) -> np.ndarray:
+    """Filter a trajectory causally; extrapolate `horizon` seconds ahead when > 0"""
+    out = np.empty_like(observed)
+    for i, (ti, xi) in enumerate(zip(t, observed)):
+        filt(xi, ti)
+        out[i] = filt.predict(horizon) if horizon > 0 else filt.x
+    return out
+
+
+def measure(t: np.ndarray, truth: np.ndarray, out: np.ndarray, latency: float = 0.0) -> Dict[str, float]:
+    """
+    Lag and jitter of a filtered trajectory in screen pixels
+
+    The output is compared with where the hand is when the input event lands,
+    `latency` seconds after capture.
+
+    Returns:
+        lag_ms: shift (ms) that best aligns output with truth while moving
+        error_px: mean error while moving
+        jitter_px: std of frame-to-frame motion while the hand holds still
+        overshoot_px: largest distance past the target just after a sweep stops
+    """
+    dt = float(np.median(np.diff(t)))
+    shift = int(round(latency / dt))
+    target = np.concatenate([truth[shift:], np.repeat(truth[-1:], shift, axis=0)])
+    speed = np.linalg.norm(np.gradient(truth, axis=0), axis=1) / dt
+    moving = speed > 0.05
+    # Steady holds only: skip the first 0.3 s after motion so settling isn't counted as jitter
+    settle = int(0.3 / dt)
+    recent = np.convolve(moving.astype(float), np.ones(settle + 1), mode="full")[:len(moving)] > 0
+    still = (speed < 1e-3) & ~recent
+
+    best, best_err = 0, np.inf
+    for k in range(-shift, int(0.3 / dt) + 1):
+        idx = np.arange(max(0, -k), len(truth) - max(k, 0))
+        m = moving[idx]
+        if not m.any():
+            continue
+        err = np.linalg.norm(out[idx + k][m] - target[idx][m], axis=1).mean()
+        if err < best_err:
+            best, best_err = k, err
+
+    steps = np.linalg.norm(np.diff(out, axis=0), axis=1)[still[1:]]
+    settling = recent & ~moving
+    return {
+        "lag_ms": 1000.0 * best * dt,
+        "error_px": float(np.linalg.norm(out - target, axis=1)[moving].mean() * SCREEN_WIDTH),
+        "jitter_px": float(steps.std() * SCREEN_WIDTH) if len(steps) else 0.0,
+        "overshoot_px": float(np.linalg.norm(out - target, axis=1)[settling].max() * SCREEN_WIDTH)
+        if settling.any() else 0.0,
+    }
+
+
+def synthetic_hand_session(fps: float = 30.0, noise: float = 0.002, seed: int = 0) -> Tuple[np.ndarray, list]:
+    """
+    Landmark frames for a pointing hand that hovers at the pinch threshold,
+    pinches, releases, holds two fingers up with the middle finger near its
+    up/down boundary, then holds the scroll pose with one upward swipe
+
+    Returns:
+        (t, frames) - timestamps and a list of (21, 3) arrays
+    """
+    rng = np.random.default_rng(seed)
+    base = np.zeros((21, 3), dtype=np.float32)
+    base[:, 0] = 0.5
+    base[0, 1] = 0.8                                 # wrist
+    base[[5, 9, 13, 17], 1] = 0.62                   # MCPs
+    base[[6, 10, 14, 18], 1] = 0.55                  # PIPs
+    base[[8, 12, 16, 20], 1] = [0.45, 0.62, 0.62, 0.62]  # index up, others curled
+    base[[8, 12, 16, 20], 0] = [0.50, 0.53, 0.56, 0.59]
+
+    def pose(pinch: float, middle_margin: float = -0.07, dy: float = 0.0) -> np.ndarray:
+        p = base.copy()
+        p[4, :2] = p[8, :2] + (pinch, 0.0)
+        p[12, 1] = p[10, 1] - middle_margin
+        p[:, 1] += dy
+        return p
+
+    n_swipe = int(0.4 * fps)
+    swipe = iter(np.linspace(0.0, -0.2, n_swipe))
+
+    phases = [(2.0, lambda: pose(0.12)),                                            # move
+              (3.0, lambda: pose(0.045 + rng.normal(0, 0.006))),                    # hover at pinch
+              (2.0, lambda: pose(0.02)),                                            # drag
+              (2.0, lambda: pose(0.12)),                                            # release
+              (3.0, lambda: pose(0.12, 0.005 + rng.normal(0, 0.006))),              # two fingers, unsure
+              (2.0, lambda: pose(0.12, 0.07)),                                      # scroll pose, still
+              (n_swipe / fps, lambda: pose(0.12, 0.07, next(swipe))),               # swipe up
+              (2.0, lambda: pose(0.12, 0.07, -0.2))]                                # scroll pose, still
+    frames = []
+    for seconds, make in phases:
+        frames += [make() + rng.normal(0, noise, (21, 3)).astype(np.float32) for _ in range(int(seconds * fps))]
+    return np.arange(len(frames)) / fps, frames
+
+
+def track_hand_session(base: str) -> Tuple[np.ndarray, list]:
+    """Landmark frames from a session_recorder track (None where no hand was seen)"""
+    from session_recorder import HAS_HAND, load_track
+
+    records, _ = load_track(base)
+    t = records["timestamp"] - records["timestamp"][0]
+    frames = [r["landmarks"] if r["flags"] & HAS_HAND else None for r in records]
+    return t, frames
+
+
+def legacy_actions(frames: list, pinch_thresh: float = 0.045) -> list:
+    """Per-frame hard thresholds, as GestureController worked before the state machine"""
+    actions, dragging = [], False
+    for i, pts in enumerate(frames):
+        if pts is None:
+            continue
+        pinch, margins, _ = hand_features(pts)
+        height = pts[WRIST, 1] - pts[FINGER_TIPS[MIDDLE], 1]
+        pinch = pinch < pinch_thresh
+        index_up, middle_up = margins[0] > 0, margins[1] > 0
+        open_palm = index_up and middle_up and not pinch
+        if pinch and index_up:
+            if not dragging:
+                actions.append((i, "MOUSE_DOWN"))
+                dragging = True
+        elif dragging:
+            actions.append((i, "MOUSE_UP"))
+            dragging = False
+        if index_up and middle_up and not open_palm and abs(int(np.clip(height * 600, -600, 600))) > 30:
+            actions.append((i, "SCROLL"))
+    return actions
+
+
+def state_machine_actions(t: np.ndarray, frames: list, cfg: GestureConfig) -> list:
+    """Actions from GestureStateMachine with the GestureConfig thresholds"""
+    machine = GestureStateMachine(pinch_enter=cfg.pinch_thresh, pinch_exit=cfg.pinch_exit,
+                                  up_enter=cfg.finger_up_enter, up_exit=cfg.finger_up_exit,
+                                  min_hold=cfg.min_hold,
+                                  scroll=ScrollAccumulator(cfg.scroll_gain, cfg.scroll_deadzone,
+                                                           cfg.scroll_max_rate, cfg.scroll_friction))
+    actions, moving = [], False
+    for i, (ti, pts) in enumerate(zip(t, frames)):
+        actions += [(i, a) for a, _ in machine.update(pts, ti)]
+        if machine.moving != moving:
+            actions.append((i, "MOVE_START" if machine.moving else "MOVE_STOP"))
+            moving = machine.moving
+    return actions
+
+
+def scroll_calls(t: np.ndarray, frames: list, cfg: GestureConfig) -> Dict[str, Tuple[int, int]]:
+    """
+    SCROLL actions and total scroll units over a session, for the previous
+    position-based scroll (wrist-to-tip height * 600 every frame in the scroll
+    state) and the velocity accumulator
+    """
+    machine = GestureStateMachine(pinch_enter=cfg.pinch_thresh, pinch_exit=cfg.pinch_exit,
+                                  up_enter=cfg.finger_up_enter, up_exit=cfg.finger_up_exit,
+                                  min_hold=cfg.min_hold,
+                                  scroll=ScrollAccumulator(cfg.scroll_gain, cfg.scroll_deadzone,
+                                                           cfg.scroll_max_rate, cfg.scroll_friction))
+    position, velocity = [], []
+    for ti, pts in zip(t, frames):
+        velocity += [f["amount"] for a, f in machine.update(pts, ti) if a == "SCROLL"]
+        if machine.state == SCROLL and pts is not None:
+            amount = int(np.clip((pts[WRIST, 1] - pts[FINGER_TIPS[MIDDLE], 1]) * 600, -600, 600))
+            if abs(amount) > 30:
+                position.append(amount)
+    return {"position": (len(position), sum(position)), "velocity": (len(velocity), sum(velocity))}
+
+
+def legacy_move_toggles(frames: list) -> list:
+    """Frames where the old per-frame logic started or stopped moving the cursor"""
+    toggles, moving = [], False
+    for i, pts in enumerate(frames):
+        now = False
+        if pts is not None:
+            _, margins, _ = hand_features(pts)
+            now = margins[0] > 0 and not margins[1] > 0
+        if now != moving:
+            toggles.append((i, "MOVE_START" if now else "MOVE_STOP"))
+            moving = now
+    return toggles
+
+
+def count_redundant(t: np.ndarray, actions: list, window: float = 0.15) -> Dict[str, float]:
+    """
+    Discrete actions per second and the redundant share of them
+
+    Redundant: a press/release or move start/stop undone within `window`
+    seconds. SCROLL actions less than 0.3 s apart form one burst; every burst
+    after the first counts as redundant.
+    """
+    duration = float(t[-1] - t[0]) or 1.0
+    discrete = [(i, a) for i, a in actions if a != "SCROLL"]
+    undone = set()
+    for k in range(len(discrete) - 1):
+        (i, a), (j, b) = discrete[k], discrete[k + 1]
+        if {a, b} in ({"MOUSE_DOWN", "MOUSE_UP"}, {"MOVE_START", "MOVE_STOP"}) and t[j] - t[i] < window:
+            undone.update((k, k + 1))
+    redundant = len(undone)
+    scroll_times = [t[i] for i, a in actions if a == "SCROLL"]
+    bursts = sum(1 for k, ti in enumerate(scroll_times) if k == 0 or ti - scroll_times[k - 1] > 0.3)
+    redundant += max(bursts - 1, 0)
+    return {
+        "actions_per_s": (len(discrete) + bursts) / duration,
+        "redundant_per_s": redundant / duration,
+        "presses": sum(1 for _, a in actions if a == "MOUSE_DOWN"),
+    }
+
+
+def bench_gestures(args, cfg: GestureConfig) -> None:
+    t, frames = track_hand_session(args.track) if args.track else synthetic_hand_session(args.fps, args.noise)
+    runs = {
+        "per-frame thresholds": legacy_actions(frames, cfg.pinch_thresh) + legacy_move_toggles(frames),
+        "state machine": state_machine_actions(t, frames, cfg),
+    }
+    print(f"[Bench] {len(frames)} frames ({t[-1] - t[0]:.1f} s)")
+    print(f"{'gesture logic':<24}{'actions/s':>11}{'redundant/s':>13}{'presses':>9}")
+    for name, actions in runs.items():
+        actions.sort()
+        r = count_redundant(t, actions)
+        print(f"{name:<24}{r['actions_per_s']:>11.2f}{r['redundant_per_s']:>13.2f}{r['presses']:>9}")
+
+    print(f"{'scroll mode':<24}{'SCROLL calls':>13}{'total units':>13}")
+    for name, (calls, units) in scroll_calls(t, frames, cfg).items():
+        print(f"{name:<24}{calls:>13}{units:>13}")
+
+
+def main():
+    """Main entry point"""
+    cfg = GestureConfig()
+    parser = argparse.ArgumentParser(description="Lag/jitter benchmark for cursor filters")
+    parser.add_argument("--track", type=str, default=None, help="Replay a session_recorder track instead of a synthetic session")
+    parser.add_argument("--fps", type=float, default=30.0, help="Synthetic camera frame rate")
+    parser.add_argument("--noise", type=float, default=0.002, help="Synthetic landmark noise (normalized)")
+    parser.add_argument("--latency", type=float, default=0.06, help="Capture-to-input latency to compensate (s)")
+    parser.add_argument("--min-cutoff", type=float, default=cfg.min_cutoff)
+    parser.add_argument("--beta", type=float, default=cfg.beta)
+    parser.add_argument("--d-cutoff", type=float, default=cfg.d_cutoff)
+    parser.add_argument("--gestures", action="store_true", help="Count redundant gesture actions instead")
+
+    args = parser.parse_args()
+
+    if args.gestures:
+        bench_gestures(args, cfg)
+        return
+
+    if args.track:
+        t, truth, observed = track_trajectory(args.track)
+    else:
+        t, truth, observed = synthetic_trajectory(args.fps, args.noise)
+    horizon = min(args.latency, cfg.max_predict_horizon)
+
+    def one_euro():
+        return OneEuroFilter(args.min_cutoff, args.beta, args.d_cutoff)
+
+    runs = {
+        "raw": observed,
+        f"ema ({cfg.smoothing})": run_filter(EmaFilter(cfg.smoothing), t, observed),
+        "one_euro": run_filter(one_euro(), t, observed),
+        f"one_euro + {1000 * horizon:.0f} ms predict": run_filter(one_euro(), t, observed, horizon),
+    }
+    print(f"[Bench] {len(t)} frames, latency {1000 * args.latency:.0f} ms, screen width {SCREEN_WIDTH}px")
+    print(f"{'filter':<30}{'lag ms':>10}{'error px':>10}{'jitter px':>11}{'overshoot px':>14}")
+    for name, out in runs.items():
+        r = measure(t, truth, out, args.latency)
+        print(f"{name:<30}{r['lag_ms']:>10.1f}{r['error_px']:>10.1f}{r['jitter_px']:>11.2f}{r['overshoot_px']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
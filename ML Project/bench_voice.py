@@ -0,0 +1,364 @@
+"""
+bench_voice.py - Decode recorded WAVs with the open and the command-grammar recognizer
+Reports real-time factor (decode time / audio duration), command accuracy and
+how much earlier a command fires from partial results than from the final result.
+With --pipeline, streams the WAVs through VoiceAssistant itself (VAD, audio ring,
+recognizer, dispatch) into a mock bus, reports speech-end-to-action latency and
+exits non-zero when a --max-rtf / --max-latency-ms / --min-accuracy gate fails
+"""
+
+import argparse
+import json
+import sys
+import time
+import wave
+from dataclasses import replace
+from pathlib import Path
+from queue import Empty
+from typing import Dict, List, Optional
+
+import numpy as np
+from vosk import KaldiRecognizer, Model, SetLogLevel
+
+from actions import Action
+from config import VOICE_COMMANDS, VOICE_CONFIG
+from dispatch import compile_voice_commands
+from vad import EnergyVAD
+from voice_assistant import UNK, VoiceAssistant, VoiceConfig, build_grammar
+
+BLOCK_FRAMES = VoiceConfig.blocksize  # same block size as the microphone stream
+
+
+def command_table():
+    """The assistant's compiled command table, without starting TTS or the microphone"""
+    handlers = {spec["action"]: (lambda *args: None) for spec in VOICE_COMMANDS.values()}
+    return compile_voice_commands(handlers)
+
+
+def command_grammar(unk: bool = True) -> str:
+    return build_grammar(command_table(), VOICE_CONFIG["custom_keywords"], unk)
+
+
+def read_wav(path: Path) -> tuple:
+    """
+    Load a 16-bit mono WAV
+
+    Returns:
+        (pcm bytes, sample rate, duration in seconds)
+    """
+    with wave.open(str(path), "rb") as wf:
+        if wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit mono PCM")
+        rate = wf.getframerate()
+        data = wf.readframes(wf.getnframes())
+    return data, rate, len(data) / 2 / rate
+
+
+def blocks(data: bytes, rate: int, vad: bool = False) -> List[tuple]:
+    """
+    Split PCM into microphone-sized (t, bytes) blocks
+
+    Args:
+        vad: Gate them like the live microphone; silence is dropped and
+            (t, None) marks the end of each speech segment
+    """
+    step = BLOCK_FRAMES * 2
+    raw = [(min(i + step, len(data)) / 2 / rate, data[i:i + step]) for i in range(0, len(data), step)]
+    if not vad:
+        return raw
+    cfg = VoiceConfig()
+    gate = EnergyVAD(rate, BLOCK_FRAMES, threshold_db=cfg.vad_threshold_db, min_dbfs=cfg.vad_min_dbfs,
+                     preroll=cfg.vad_preroll, hangover=cfg.vad_hangover)
+    return [(t_out, None if samples is None else samples.tobytes())
+            for t, chunk in raw if len(chunk) == step for t_out, samples in gate.process(t, chunk)]
+
+
+def decode(model: Model, data: bytes, rate: int, grammar: Optional[str] = None,
+           commands=None, partial_hits: int = VoiceConfig.partial_hits, vad: bool = False) -> Dict:
+    """
+    Feed a WAV to a fresh recognizer in microphone-sized blocks
+
+    Args:
+        model: Loaded Vosk model
+        data: 16-bit PCM
+        rate: Sample rate
+        grammar: JSON phrase list, or None for the open vocabulary
+        commands: VoiceCommandTable; when given, also time the first command
+            from partial results (same rule as VoiceAssistant) and from a final result
+        partial_hits: Blocks a partial hypothesis must hold before it fires
+        vad: Decode only what the energy gate passes
+
+    Returns:
+        {"text": transcript, "seconds": decode time, "decoded": seconds of audio decoded,
+         "t_early"/"t_final": audio position (s) at which a command would fire, or None}
+    """
+    rec = KaldiRecognizer(model, rate, grammar) if grammar else KaldiRecognizer(model, rate)
+    rec.SetWords(False)
+    texts: List[str] = []
+    items = blocks(data, rate, vad)
+    decoded = sum(len(chunk) for _, chunk in items if chunk is not None) / 2 / rate
+    partial, hits = "", 0
+    t_early = t_final = None
+    start = time.perf_counter()
+    for t_audio, chunk in items:
+        final = json.loads(rec.FinalResult()).get("text", "") if chunk is None else None
+        if final is not None or rec.AcceptWaveform(chunk):
+            texts.append(final if final is not None else json.loads(rec.Result()).get("text", ""))
+            if commands is not None and t_final is None and commands.match(_clean(texts[-1]))[0]:
+                t_final = t_audio
+            partial, hits = "", 0
+        elif commands is not None and t_early is None:
+            hypothesis = _clean(json.loads(rec.PartialResult()).get("partial", ""))
+            hits = hits + 1 if hypothesis == partial else 1
+            partial = hypothesis
+            if hits >= partial_hits and commands.complete(hypothesis):
+                t_early = t_audio
+    texts.append(json.loads(rec.FinalResult()).get("text", ""))
+    elapsed = time.perf_counter() - start
+    if commands is not None and t_final is None and commands.match(_clean(texts[-1]))[0]:
+        t_final = len(data) / 2 / rate
+    return {"text": _clean(" ".join(texts)), "seconds": elapsed, "decoded": decoded,
+            "t_early": t_early, "t_final": t_final}
+
+
+def _clean(text: str) -> str:
+    return " ".join(w for w in text.split() if w != UNK)
+
+
+class MockBus:
+    """Stands in for ActionBus: keeps every action instead of delivering it"""
+
+    def __init__(self):
+        self.actions: List[Action] = []
+
+    def put(self, action: Action) -> bool:
+        self.actions.append(action)
+        return True
+
+
+def signature(actions: List[Action]) -> List[tuple]:
+    """What an action list does, for comparing runs (timestamps left out)"""
+    return [(a.type, a.x, a.y, a.amount, a.text, a.enabled, a.url) for a in actions]
+
+
+def speech_end(data: bytes, rate: int, cfg: VoiceConfig) -> Optional[float]:
+    """
+    Audio position (s) where speech ends: the end of the last 20 ms frame that
+    is as far above the file's noise floor as the VAD requires, or None
+    """
+    gate = EnergyVAD(rate, cfg.blocksize, threshold_db=cfg.vad_threshold_db, min_dbfs=cfg.vad_min_dbfs)
+    levels = gate.level_db(np.frombuffer(data, dtype=np.int16))
+    floor = float(np.percentile(levels, 10))
+    loud = np.flatnonzero(levels > max(floor + cfg.vad_threshold_db, cfg.vad_min_dbfs))
+    return float((loud[-1] + 1) * gate.frame / rate) if len(loud) else None
+
+
+def run_pipeline(model: Model, data: bytes, rate: int, cfg: VoiceConfig,
+                 expected: Optional[str] = None) -> Dict:
+    """
+    Stream a WAV through a fresh VoiceAssistant the way the microphone does:
+    blocks of cfg.blocksize samples go through the VAD gate into the audio
+    ring, and the recognizer loop's accept() dispatches commands into a MockBus
+
+    Blocks are taken to arrive in real time, so the first action happens once
+    the block that triggered it has been recorded and everything queued before
+    it has been processed: clock = max(clock, block end) + processing time
+
+    Args:
+        model: Loaded Vosk model, shared across files
+        cfg: Assistant settings (grammar, VAD, early dispatch, block size)
+        expected: Labelled transcript; its actions are what dispatching the
+            text directly emits
+
+    Returns:
+        {"seconds": processing time, "actions": [Action], "t_action": simulated
+         time of the first action or None, "expected": signature or None,
+         "early": commands fired from partial results, "wakes": wake words heard}
+    """
+    cfg = replace(cfg, samplerate=rate)
+    want = None
+    if expected is not None:
+        reference = MockBus()
+        VoiceAssistant(reference, cfg, model=model)._handle_text(expected)
+        want = signature(reference.actions)
+
+    bus = MockBus()
+    assistant = VoiceAssistant(bus, cfg, model=model)
+    ring = assistant.ring
+    clock = busy = 0.0
+    t_action = None
+    step = cfg.blocksize * 2
+    ends = [(i + step) / 2 / rate for i in range(0, len(data) - step + 1, step)]
+    # The stream only delivers whole blocks; stop_listening() at the end flushes the last utterance
+    for n, t_block in enumerate(ends + [len(data) / 2 / rate]):
+        start = time.perf_counter()
+        if n < len(ends):
+            for t, samples in assistant.gate(t_block, data[n * step:(n + 1) * step]):
+                if samples is None:
+                    ring.mark_end(t)
+                else:
+                    ring.write(t, samples)
+        else:
+            ring.mark_end(t_block)
+        while True:
+            try:
+                t, view = ring.read(timeout=0)
+            except Empty:
+                break
+            assistant.accept(t, view)
+        elapsed = time.perf_counter() - start
+        busy += elapsed
+        clock = max(clock, t_block) + elapsed
+        if t_action is None and bus.actions:
+            t_action = clock
+    return {"seconds": busy, "actions": bus.actions, "t_action": t_action, "expected": want,
+            "early": assistant.counters["early"], "wakes": assistant.counters["wakes"]}
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    return float(np.percentile(values, q)) if values else None
+
+
+def pipeline_main(args, model: Model) -> int:
+    """
+    Run every WAV through the live voice path; returns the exit code
+
+    Returns:
+        1 if any of the --max-rtf / --max-latency-ms / --min-accuracy gates failed, else 0
+    """
+    cfg = VoiceConfig(blocksize=args.blocksize, grammar=not args.no_grammar, grammar_unk=not args.no_unk,
+                      vad=not args.no_vad, early_dispatch=not args.no_early, wake_word=args.wake_word)
+    files = []
+    audio_seconds = busy = 0.0
+    latencies: List[float] = []
+    correct = labelled = 0
+
+    print(f"{'file':<28}{'rtf':>7}{'latency':>10}  result   actions")
+    for path in map(Path, args.wavs):
+        data, rate, duration = read_wav(path)
+        label = path.with_suffix(".txt")
+        expected = label.read_text().strip().lower() if label.exists() else None
+        r = run_pipeline(model, data, rate, cfg, expected)
+        audio_seconds += duration
+        busy += r["seconds"]
+
+        end = speech_end(data, rate, cfg)
+        latency = None
+        if r["t_action"] is not None and end is not None:
+            latency = r["t_action"] - end
+            latencies.append(latency)
+        ok = None
+        if r["expected"] is not None:
+            labelled += 1
+            ok = signature(r["actions"]) == r["expected"]
+            correct += ok
+        result = "n/a" if ok is None else "ok" if ok else "WRONG"
+        shown = f"{1000 * latency:>8.0f}ms" if latency is not None else f"{'-':>10}"
+        types = " ".join(a.type for a in r["actions"]) or "-"
+        print(f"{path.name:<28}{r['seconds'] / duration:>7.3f}{shown}  {result:<8} {types}")
+        files.append({"file": path.name, "duration": duration, "seconds": r["seconds"],
+                      "speech_end": end, "t_action": r["t_action"], "latency": latency, "correct": ok,
+                      "early": r["early"], "wakes": r["wakes"], "actions": [list(sig) for sig in signature(r["actions"])]})
+
+    rtf = busy / audio_seconds if audio_seconds else 0.0
+    accuracy = correct / labelled if labelled else None
+    summary = {"files": len(files), "audio_seconds": audio_seconds, "rtf": rtf,
+               "latency_p50": _percentile(latencies, 50), "latency_p95": _percentile(latencies, 95),
+               "latency_max": max(latencies) if latencies else None,
+               "accuracy": accuracy, "correct": correct, "labelled": labelled,
+               "early": sum(f["early"] for f in files), "wakes": sum(f["wakes"] for f in files),
+               "config": {"blocksize": cfg.blocksize, "grammar": cfg.grammar, "grammar_unk": cfg.grammar_unk,
+                          "vad": cfg.vad, "early_dispatch": cfg.early_dispatch, "wake_word": cfg.wake_word}}
+
+    print(f"\n[Bench] {len(files)} files, {audio_seconds:.1f} s of audio, rtf {rtf:.3f}")
+    if latencies:
+        print(f"[Bench] speech end -> action: p50 {1000 * summary['latency_p50']:.0f} ms, "
+              f"p95 {1000 * summary['latency_p95']:.0f} ms, max {1000 * summary['latency_max']:.0f} ms "
+              f"({summary['early']} commands fired from partial results)")
+    if labelled:
+        print(f"[Bench] command accuracy {correct}/{labelled} ({100 * accuracy:.0f}%)")
+
+    failures = []
+    if args.max_rtf is not None and rtf > args.max_rtf:
+        failures.append(f"rtf {rtf:.3f} > {args.max_rtf}")
+    if args.max_latency_ms is not None:
+        p95 = summary["latency_p95"]
+        if p95 is None or 1000 * p95 > args.max_latency_ms:
+            failures.append(f"p95 latency {'n/a' if p95 is None else f'{1000 * p95:.0f} ms'} > {args.max_latency_ms} ms")
+    if args.min_accuracy is not None and (accuracy is None or accuracy < args.min_accuracy):
+        failures.append(f"accuracy {'n/a' if accuracy is None else f'{accuracy:.2f}'} < {args.min_accuracy}")
+    summary["failures"] = failures
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"summary": summary, "files": files}, indent=2))
+        print(f"[Bench] Results written to {args.json}")
+    for failure in failures:
+        print(f"[Bench] FAIL: {failure}")
+    return 1 if failures else 0
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Vosk real-time factor: open vocabulary vs command grammar")
+    parser.add_argument("wavs", nargs="+", help="16-bit mono WAVs; an optional <name>.txt holds the expected transcript")
+    parser.add_argument("--model", type=str, default=VoiceConfig.model_path, help="Vosk model directory")
+    parser.add_argument("--no-unk", action="store_true", help="Build the grammar without the [unk] fallback")
+    parser.add_argument("--vad", action="store_true", help="Also decode through the energy gate (grammar recognizer)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Stream through VoiceAssistant (VAD, ring, recognizer, dispatch) into a mock bus")
+    parser.add_argument("--blocksize", type=int, default=VoiceConfig.blocksize, help="Pipeline: samples per audio block")
+    parser.add_argument("--no-grammar", action="store_true", help="Pipeline: open-vocabulary recognizer")
+    parser.add_argument("--no-vad", action="store_true", help="Pipeline: feed every block to the recognizer")
+    parser.add_argument("--no-early", action="store_true", help="Pipeline: dispatch from final results only")
+    parser.add_argument("--wake-word", type=str, default=VoiceConfig.wake_word,
+                        help="Pipeline: spot this phrase before recognizing commands (fixtures must say it)")
+    parser.add_argument("--max-rtf", type=float, default=None, help="Pipeline: fail above this real-time factor")
+    parser.add_argument("--max-latency-ms", type=float, default=None,
+                        help="Pipeline: fail when p95 speech-end-to-action latency is above this")
+    parser.add_argument("--min-accuracy", type=float, default=None,
+                        help="Pipeline: fail below this share (0-1) of labelled files with the expected actions")
+    parser.add_argument("--json", type=str, default=None, help="Pipeline: write per-file results and the summary here")
+
+    args = parser.parse_args()
+
+    SetLogLevel(-1)
+    model = Model(args.model)
+    if args.pipeline:
+        sys.exit(pipeline_main(args, model))
+    commands = command_table()
+    grammar = command_grammar(not args.no_unk)
+    modes = {"open": (None, False), "grammar": (grammar, False)}
+    if args.vad:
+        modes["vad"] = (grammar, True)
+    totals = {mode: {"seconds": 0.0, "decoded": 0.0, "correct": 0, "labelled": 0} for mode in modes}
+    audio_seconds = 0.0
+    saved: List[float] = []
+
+    print(f"{'file':<28}{'mode':<9}{'rtf':>7}  text")
+    for path in map(Path, args.wavs):
+        data, rate, duration = read_wav(path)
+        audio_seconds += duration
+        label = path.with_suffix(".txt")
+        expected = label.read_text().strip().lower() if label.exists() else None
+        for mode, (grammar, vad) in modes.items():
+            r = decode(model, data, rate, grammar, commands if grammar else None, vad=vad)
+            totals[mode]["seconds"] += r["seconds"]
+            totals[mode]["decoded"] += r["decoded"]
+            if expected is not None:
+                totals[mode]["labelled"] += 1
+                totals[mode]["correct"] += r["text"] == expected
+            print(f"{path.name:<28}{mode:<9}{r['seconds'] / duration:>7.3f}  {r['text']!r}")
+            if mode == "grammar" and r["t_early"] is not None and r["t_final"] is not None:
+                saved.append(r["t_final"] - r["t_early"])
+
+    print(f"\n[Bench] {len(args.wavs)} files, {audio_seconds:.1f} s of audio")
+    for mode, t in totals.items():
+        acc = f"{t['correct']}/{t['labelled']}" if t["labelled"] else "n/a"
+        print(f"{mode:<9} rtf {t['seconds'] / audio_seconds:.3f}  decoded {100 * t['decoded'] / audio_seconds:.0f}%  "
+              f"exact-match {acc}")
+    if saved:
+        print(f"early dispatch: {len(saved)} commands, {1000 * sum(saved) / len(saved):.0f} ms earlier than the final result on average")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,14 @@ Records MediaPipe hand landmarks to CSV file for ML model training
 
 import cv2
 import mediapipe as mp
-import csv
 import os
 import sys
 import time
-from typing import List, Tuple
 import numpy as np
 
+from sample_writer import SampleWriter, fill_landmarks
+from session_recorder import SessionRecorder
+
 
 class GestureDataCollector:
     """Collects hand gesture landmark data for training"""
@@ -23,14 +24,19 @@ class GestureDataCollector:
         '4': 'pause'
     }
     
-    def __init__(self, output_csv: str = "gesture_data.csv"):
+    def __init__(self, output_csv: str = "gesture_data.csv", record_dir: str = None,
+                 active_model: str = None):
         """
         Initialize data collector
         
         Args:
             output_csv: Output CSV file path
+            record_dir: Optional directory for raw video + landmark track recordings
+            active_model: Optional trained model; only frames it is uncertain about
+                          (or that are new for the class) are saved
         """
         self.output_csv = output_csv
+        self.record_dir = record_dir
         self.mp_hands = mp.solutions.hands
         self.hands = self.mp_hands.Hands(
             static_image_mode=False,
@@ -41,29 +47,59 @@ class GestureDataCollector:
         self.mp_drawing = mp.solutions.drawing_utils
         
         # Data storage
-        self.data = []
         self.samples_per_gesture = 50  # Number of samples to collect per gesture
         
+        # Recording session id, lets the trainer split by session instead of by row
+        self.session_id = time.strftime("%Y%m%d-%H%M%S")
+        
         # Create CSV file with headers if doesn't exist
         self._init_csv()
+        
+        # Active collection
+        self.sampler = None
+        self.last_score = None
+        if active_model:
+            self._init_active(active_model)
     
     def _init_csv(self):
-        """Initialize CSV file with headers"""
-        if os.path.exists(self.output_csv):
-            print(f"[DataCollector] Appending to existing file: {self.output_csv}")
-            return
+        """Open the background CSV writer (creates the file with headers if needed)"""
+        existed = os.path.exists(self.output_csv)
         
-        # Create headers: 21 landmarks * 3 coordinates (x, y, z) + label
+        # Headers: 21 landmarks * 3 coordinates (x, y, z) + label + session
         headers = []
         for i in range(21):
             headers.extend([f"landmark_{i}_x", f"landmark_{i}_y", f"landmark_{i}_z"])
         headers.append("gesture")
+        headers.append("session")
+        
+        # Older files without a session column keep their layout
+        self.writer = SampleWriter(self.output_csv, headers, width=21 * 3)
+        
+        if existed:
+            print(f"[DataCollector] Appending to existing file: {self.output_csv}")
+        else:
+            print(f"[DataCollector] Created CSV: {self.output_csv}")
+    
+    def _init_active(self, model_path: str):
+        """Load the current model and seed the sampler with the samples already collected"""
+        from active_sampling import ActiveSampler
+        from config import ML_CONFIG
+        
+        self.sampler = ActiveSampler(
+            model_path,
+            margin_threshold=ML_CONFIG["active_margin_threshold"],
+            entropy_threshold=ML_CONFIG["active_entropy_threshold"],
+            novelty_radius=ML_CONFIG["active_novelty_radius"],
+        )
         
-        with open(self.output_csv, 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(headers)
+        if sum(self.writer.counts.values()):
+            import pandas as pd
+            from dedup import split_columns
+            df = pd.read_csv(self.output_csv)
+            feature_cols, label_col = split_columns(df)
+            self.sampler.seed(df[feature_cols].values, df[label_col].values)
         
-        print(f"[DataCollector] Created CSV: {self.output_csv}")
+        print(f"[DataCollector] Active collection enabled (model: {model_path})")
     
     def collect(self):
         """Start interactive data collection"""
@@ -82,14 +118,22 @@ class GestureDataCollector:
         
         current_gesture = None
         current_count = 0
+        frame_idx = 0
+        
+        recorder = None
+        if self.record_dir:
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+            recorder = SessionRecorder(self.record_dir, fps=fps, name=f"session-{self.session_id}")
         
         while True:
-            ret, frame = cap.read()
+            ret, raw_frame = cap.read()
             if not ret:
                 break
+            captured_at = time.time()
+            frame_label = current_gesture
             
             # Flip for selfie view
-            frame = cv2.flip(frame, 1)
+            frame = cv2.flip(raw_frame, 1)
             h, w, c = frame.shape
             
             # Convert to RGB
@@ -104,16 +148,22 @@ class GestureDataCollector:
                     self.mp_drawing.draw_landmarks(frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS)
                     
                     # If collecting, save data
-                    if current_gesture:
-                        landmarks = [(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark]
-                        self._save_sample(landmarks, current_gesture)
+                    if current_gesture and self._save_sample(hand_landmarks.landmark, current_gesture):
                         current_count += 1
                         
                         if current_count >= self.samples_per_gesture:
                             print(f"[DataCollector] Completed {self.samples_per_gesture} samples for '{current_gesture}'")
+                            self.writer.checkpoint()
                             current_gesture = None
                             current_count = 0
             
+            # Raw frame + landmarks, so the dataset can be rebuilt later without re-recording
+            if recorder:
+                hand = results.multi_hand_landmarks[0] if results.multi_hand_landmarks else None
+                world = results.multi_hand_world_landmarks[0] if getattr(results, "multi_hand_world_landmarks", None) else None
+                recorder.record(raw_frame, frame_idx, captured_at, hand, world, frame_label)
+            frame_idx += 1
+            
             # Display info
             info_text = f"Gesture: {current_gesture if current_gesture else 'None'}"
             count_text = f"Samples: {current_count}/{self.samples_per_gesture}" if current_gesture else ""
@@ -121,6 +171,17 @@ class GestureDataCollector:
             cv2.putText(frame, info_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
             cv2.putText(frame, count_text, (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (200, 200, 0), 2)
             
+            # Active collection: class coverage and how unsure the model still is
+            if self.sampler and current_gesture:
+                cov = self.sampler.coverage(current_gesture)
+                active_text = (f"Coverage: {cov['samples']} total, kept {100 * cov['kept_ratio']:.0f}% of frames | "
+                               f"Uncertainty: {cov['uncertainty']:.2f}")
+                cv2.putText(frame, active_text, (10, h - 50), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (0, 200, 255), 1)
+                if self.last_score:
+                    reason = self.last_score["reason"] or "redundant, skipped"
+                    cv2.putText(frame, f"Last frame: {reason}", (10, h - 20),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.55, (0, 200, 255), 1)
+            
             # Display controls
             controls_y = 110
             for key, gesture in self.GESTURES.items():
@@ -138,33 +199,38 @@ class GestureDataCollector:
             elif chr(key) in self.GESTURES:
                 gesture = self.GESTURES[chr(key)]
                 if current_gesture != gesture:
+                    if current_gesture:
+                        self.writer.checkpoint()
                     current_gesture = gesture
                     current_count = 0
                     print(f"[DataCollector] Started collecting '{gesture}'...")
         
         cap.release()
         cv2.destroyAllWindows()
+        self.writer.close()
+        if recorder:
+            recorder.close()
         
         print(f"[DataCollector] Data collection complete. Saved to {self.output_csv}")
-        print(f"[DataCollector] Total samples: {len(self.data)}")
+        print(f"[DataCollector] Total samples: {self.writer.rows_written}")
+        if self.writer.dropped:
+            print(f"[DataCollector] Dropped samples (writer saturated): {self.writer.dropped}")
     
-    def _save_sample(self, landmarks: List[Tuple[float, float, float]], gesture: str):
-        """Save a single sample to CSV"""
-        try:
-            # Flatten landmarks
-            row = []
-            for x, y, z in landmarks:
-                row.extend([x, y, z])
-            row.append(gesture)
-            
-            # Append to CSV
-            with open(self.output_csv, 'a', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(row)
-            
-            self.data.append(row)
-        except Exception as e:
-            print(f"[DataCollector] Error saving sample: {e}")
+    def _save_sample(self, landmarks, gesture: str) -> bool:
+        """Queue a single sample for the background writer"""
+        row = self.writer.acquire()
+        if row is None:
+            return False
+        fill_landmarks(row, landmarks, dims=3)
+        
+        if self.sampler:
+            save, self.last_score = self.sampler.score(row, gesture)
+            if not save:
+                self.writer.release(row)
+                return False
+            self.sampler.add(row, gesture)
+        
+        return self.writer.put(row, gesture, self.session_id)
 
 
 def main():
@@ -174,10 +240,13 @@ def main():
     parser = argparse.ArgumentParser(description="Collect hand gesture training data")
     parser.add_argument("--output", type=str, default="gesture_data.csv", help="Output CSV file")
     parser.add_argument("--samples", type=int, default=50, help="Samples per gesture")
+    parser.add_argument("--record", type=str, default=None, help="Also record raw video + landmarks to this directory")
+    parser.add_argument("--active", type=str, default=None, metavar="MODEL",
+                        help="Only save frames the given model is uncertain about")
     
     args = parser.parse_args()
     
-    collector = GestureDataCollector(output_csv=args.output)
+    collector = GestureDataCollector(output_csv=args.output, record_dir=args.record, active_model=args.active)
     collector.samples_per_gesture = args.samples
     
     try:
@@ -186,6 +255,8 @@ def main():
         print("\n[DataCollector] Interrupted")
     except Exception as e:
         print(f"[DataCollector] Error: {e}")
+    finally:
+        collector.writer.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,132 @@
+# command_matcher.py
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_END = ""  # trie key holding the phrase that ends at a node
+
+@dataclass
+class Match:
+    phrase: str
+    payload: Optional[str] = None
+    confidence: float = 1.0
+    kind: str = "exact"   # exact | slot | contained | fuzzy
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, computed only inside a diagonal band of width
+    2*limit+1; returns limit + 1 as soon as the distance must exceed limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if len(a) > len(b):
+        a, b = b, a
+    inf = limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        lo, hi = max(1, i - limit), min(len(b), i + limit)
+        cur = [inf] * (len(b) + 1)
+        cur[0] = i if i <= limit else inf
+        best = cur[0]
+        for j in range(lo, hi + 1):
+            cost = prev[j - 1] + (ca != b[j - 1])
+            cur[j] = min(cost, prev[j] + 1, cur[j - 1] + 1, inf)
+            best = min(best, cur[j])
+        if best > limit:
+            return inf
+        prev = cur
+    return min(prev[len(b)], inf)
+
+class CommandMatcher:
+    """Voice command phrases compiled into a token trie at startup.
+
+    match() tries, in order:
+      exact      the whole utterance is a phrase or alias
+      slot       the utterance starts with a payload phrase ("type <text>")
+      contained  the longest phrase found on word boundaries inside the
+                 utterance ("time" matches "what's the time" but not
+                 "sometimes")
+      fuzzy      the phrase closest to the whole utterance by edit distance,
+                 if its similarity 1 - distance / length >= threshold
+    Phrases marked exact ("quit") skip the last two steps.
+    Confidence is 1.0 for exact and slot matches, the share of the
+    utterance's words covered for contained ones, and the similarity for
+    fuzzy ones.
+    """
+
+    def __init__(self, phrases: Iterable[str], payload: Iterable[str] = (), exact: Iterable[str] = (),
+                 threshold: float = 0.8) -> None:
+        self.phrases = sorted(set(phrases) | set(payload))
+        self.payload = set(payload)
+        self.exact = set(exact)
+        self.threshold = threshold
+        self._trie: Dict[str, dict] = {}
+        for phrase in self.phrases:
+            node = self._trie
+            for word in phrase.split():
+                node = node.setdefault(word, {})
+            node[_END] = phrase
+        # Word prefixes of longer phrases ("stop" of "stop gestures")
+        self._continued = {" ".join(words[:k]) for words in map(str.split, self.phrases)
+                           for k in range(1, len(words))}
+        self._fuzzy = [p for p in self.phrases if p not in self.payload and p not in self.exact]
+
+    def _walk(self, words: List[str], start: int) -> List[Tuple[int, str]]:
+        """(end index, phrase) for every phrase that starts at words[start]."""
+        found = []
+        node = self._trie
+        for i in range(start, len(words)):
+            node = node.get(words[i])
+            if node is None:
+                break
+            if _END in node:
+                found.append((i + 1, node[_END]))
+        return found
+
+    def match(self, text: str) -> Optional[Match]:
+        words = text.split()
+        if not words:
+            return None
+        heads = self._walk(words, 0)
+        for end, phrase in reversed(heads):
+            if phrase in self.payload:
+                if end < len(words):
+                    return Match(phrase, " ".join(words[end:]), 1.0, "slot")
+            elif end == len(words):
+                return Match(phrase)
+
+        best: Optional[Tuple[int, str]] = None
+        for start in range(len(words)):
+            for end, phrase in self._walk(words, start):
+                if phrase in self.exact or phrase in self.payload:
+                    continue
+                if best is None or end - start > best[0]:
+                    best = (end - start, phrase)
+        if best is not None:
+            return Match(best[1], None, best[0] / len(words), "contained")
+        return self._closest(" ".join(words))
+
+    def _closest(self, text: str) -> Optional[Match]:
+        best: Optional[Match] = None
+        for phrase in self._fuzzy:
+            size = max(len(text), len(phrase))
+            limit = int((1.0 - self.threshold) * size + 1e-9)
+            d = edit_distance(text, phrase, limit)
+            if d > limit:
+                continue
+            score = 1.0 - d / size
+            if best is None or score > best.confidence:
+                best = Match(phrase, None, score, "fuzzy")
+        return best
+
+    def complete(self, text: str) -> Optional[str]:
+        """The phrase if `text` is a whole command that no longer phrase starts
+        with and that takes no payload, else None. Used on partial results,
+        where more words may still follow."""
+        node = self._trie
+        for word in text.split():
+            node = node.get(word)
+            if node is None:
+                return None
+        phrase = node.get(_END)
+        if phrase is None or phrase in self.payload or phrase in self._continued:
+            return None
+        return phrase
@@ -42,11 +42,18 @@ VOICE_CONFIG = {
     "tts_rate": 150,                      # Words per minute
     "tts_voice_id": 0,                    # 0=default, 1=alternative
     "tts_async": True,                    # Use background thread for TTS
+    "tts_queue_size": 8,                  # Pending utterances before the oldest low-priority one is dropped
+    "tts_cache_dir": "tts_cache",         # Pre-synthesized WAVs of fixed phrases (None to disable)
     
     # Command matching
     "fuzzy_match_threshold": 0.8,         # Similarity threshold for command matching
     "enable_confirmation": False,         # Ask user to confirm low-confidence commands
     
+    # Wake word: when set (e.g. "jarvis"), only a one-phrase spotter listens
+    # until it is heard, then commands are recognized for wake_window seconds
+    "wake_word": None,
+    "wake_window": 5.0,
+    
     # Keywords for voice recognition
     "custom_keywords": [
         "start", "stop", "click", "double", "scroll", "up", "down",
@@ -60,6 +67,13 @@ VOICE_CONFIG = {
 
 ACTION_CONFIG = {
     "queue_timeout": 0.1,                 # Timeout for queue.get()
+    "queue_capacity": 256,                # Max queued actions per lane (moves/scrolls are merged first)
+    "batch_size": 16,                     # Max actions the executor injects per backend call
+    "input_backend": "pyautogui",         # "pyautogui", "direct" (SendInput / pynput) or "null"
+    "cursor_rate_hz": 120,                # Cursor interpolation rate (0 = move once per camera frame)
+    "cursor_ease": 0.03,                  # Interpolation time constant in seconds
+    "paste_min_chars": 32,                # TYPE_TEXT this long is pasted via the clipboard instead of typed
+    "paste_restore_delay": 0.25,          # Seconds before the previous clipboard text is put back
     "action_timeout": 5.0,                # Max execution time per action
     "enable_logging": True,               # Log all actions
     "enable_voice_feedback": True,        # Provide TTS feedback
@@ -85,6 +99,11 @@ ML_CONFIG = {
     "samples_per_gesture": 50,            # Minimum samples per gesture class
     "data_csv_path": "gesture_data.csv",
     
+    # Active collection (collect_data.py --active)
+    "active_margin_threshold": 0.15,      # Save if top-1 minus top-2 probability is below this
+    "active_entropy_threshold": 0.7,      # Save if normalized prediction entropy is above this
+    "active_novelty_radius": 0.15,        # Save if farther than this from stored samples of the class
+    
     # Training
     "test_split": 0.2,                    # 20% test, 80% train
     "random_state": 42,
@@ -110,12 +129,15 @@ ML_CONFIG = {
 # ============================================================================
 # GESTURE MAPPING
 # ============================================================================
+# Compiled by dispatch.compile_gesture_map(). Optional keys: "cooldown" (s),
+# "rate" (firings/s), "continuous" (no default gesture_cooldown).
 
 GESTURE_MAP = {
     "MOVE": {
         "description": "Move mouse cursor",
         "action_type": "move_mouse",
-        "icon": "👆"
+        "icon": "👆",
+        "continuous": True
     },
     "CLICK": {
         "description": "Single click",
@@ -125,41 +147,52 @@ GESTURE_MAP = {
     "DOUBLE_CLICK": {
         "description": "Double click",
         "action_type": "double_click",
-        "icon": "☝️☝️"
+        "icon": "☝️☝️",
+        "cooldown": 0.6
     },
     "DRAG": {
         "description": "Drag action",
         "action_type": "drag",
-        "icon": "✌️"
+        "icon": "✌️",
+        "continuous": True
     },
     "SCROLL": {
         "description": "Scroll up or down",
         "action_type": "scroll",
-        "icon": "🤘"
+        "icon": "🤘",
+        "continuous": True,
+        "rate": 10                 # Max scroll steps per second
     },
     "PAUSE": {
         "description": "Pause/resume control",
         "action_type": "pause",
-        "icon": "✋"
+        "icon": "✋",
+        "cooldown": 1.0
     }
 }
 
 # ============================================================================
 # VOICE COMMAND MAPPING
 # ============================================================================
+# Compiled by dispatch.compile_voice_commands(). Optional keys: "aliases",
+# "payload" (rest of the utterance is passed on), "exact", "cooldown", "rate".
 
 VOICE_COMMANDS = {
     "start gestures": {
         "action": "start_gestures",
-        "feedback": "Gesture control enabled"
+        "feedback": "Gesture control enabled",
+        "aliases": ["enable gestures"]
     },
     "stop gestures": {
         "action": "stop_gestures",
-        "feedback": "Gesture control disabled"
+        "feedback": "Gesture control disabled",
+        "aliases": ["disable gestures"]
     },
     "click": {
         "action": "click",
-        "feedback": "Clicked"
+        "feedback": "Clicked",
+        "aliases": ["mouse click"],
+        "exact": True
     },
     "double click": {
         "action": "double_click",
@@ -175,7 +208,9 @@ VOICE_COMMANDS = {
     },
     "type": {
         "action": "type_text",
-        "feedback": "Ready to type"
+        "feedback": "Ready to type",
+        "aliases": ["write"],
+        "payload": True            # "type hello world" types "hello world"
     },
     "open youtube": {
         "action": "open_youtube",
@@ -187,7 +222,8 @@ VOICE_COMMANDS = {
     },
     "what time is it": {
         "action": "get_time",
-        "feedback": "Checking time"
+        "feedback": "Checking time",
+        "aliases": ["time"]
     },
     "pause": {
         "action": "pause",
@@ -199,7 +235,9 @@ VOICE_COMMANDS = {
     },
     "quit": {
         "action": "quit",
-        "feedback": "Goodbye"
+        "feedback": "Goodbye",
+        "aliases": ["exit", "stop program", "close program"],
+        "exact": True              # never matched as a substring
     }
 }
 
@@ -207,15 +245,31 @@ VOICE_COMMANDS = {
 # SCREEN RESOLUTION (Set based on your monitor)
 # ============================================================================
 
-SCREEN_WIDTH = 1920
-SCREEN_HEIGHT = 1080
+DEFAULT_SCREEN_SIZE = (1920, 1080)
+_screen_size = None
+
+def screen_size():
+    """(width, height), auto-detected on first use if possible.
+
+    Not done at import time: importing pyautogui and querying the display
+    would slow down every module that reads a setting from here.
+    """
+    global _screen_size
+    if _screen_size is None:
+        try:
+            import pyautogui
+            _screen_size = tuple(pyautogui.size())
+        except Exception:
+            _screen_size = DEFAULT_SCREEN_SIZE  # Use defaults
+    return _screen_size
 
-# Auto-detect if possible:
-try:
-    import pyautogui
-    SCREEN_WIDTH, SCREEN_HEIGHT = pyautogui.size()
-except:
-    pass  # Use defaults
+def __getattr__(name):
+    # SCREEN_WIDTH / SCREEN_HEIGHT still work, resolved lazily
+    if name == "SCREEN_WIDTH":
+        return screen_size()[0]
+    if name == "SCREEN_HEIGHT":
+        return screen_size()[1]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # ============================================================================
 # DEBUG / LOGGING
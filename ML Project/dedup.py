@@ -0,0 +1,285 @@
+"""
+dedup.py - Near-duplicate pruning and coreset selection for landmark datasets
+Removes redundant consecutive webcam frames and provides session-aware splits
+"""
+
+import time
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+LABEL_COLUMNS = ("gesture", "label")
+SESSION_COLUMN = "session"
+NUM_LANDMARKS = 21
+
+
+def split_columns(df: pd.DataFrame) -> Tuple[List[str], str]:
+    """
+    Find the feature columns and the label column of a landmark CSV
+
+    Works for both the ML Project layout (landmark_i_x/y/z + gesture) and
+    the Project1 layout (x0, y1, ... + label).
+    """
+    label_col = next((c for c in LABEL_COLUMNS if c in df.columns), None)
+    if label_col is None:
+        raise ValueError(f"No label column found (expected one of {LABEL_COLUMNS})")
+    feature_cols = [c for c in df.columns if c not in LABEL_COLUMNS and c != SESSION_COLUMN]
+    return feature_cols, label_col
+
+
+def normalize_landmarks(X: np.ndarray) -> np.ndarray:
+    """
+    Make landmark rows translation and scale invariant
+
+    Each hand is shifted so the wrist (landmark 0) is the origin and scaled so
+    the farthest landmark is at distance 1. Two frames of the same pose taken a
+    few pixels apart then map to (almost) the same vector.
+
+    Args:
+        X: (n, 21 * dims) raw landmark features, dims = 2 or 3
+
+    Returns:
+        (n, 21 * dims) normalized features
+    """
+    X = np.nan_to_num(np.asarray(X, dtype=np.float32), nan=0.0)
+    n, d = X.shape
+    dims = d // NUM_LANDMARKS
+    pts = X.reshape(n, NUM_LANDMARKS, dims)
+    pts = pts - pts[:, :1, :]
+    scale = np.linalg.norm(pts, axis=2).max(axis=1)
+    scale[scale == 0] = 1.0
+    return (pts / scale[:, None, None]).reshape(n, d)
+
+
+def dedup_grid(Xn: np.ndarray, y: np.ndarray, cell: float = 0.05) -> np.ndarray:
+    """
+    Keep one sample per occupied grid cell and class
+
+    Args:
+        Xn: Normalized features
+        y: Labels
+        cell: Grid cell size in normalized units
+
+    Returns:
+        Sorted indices of the kept rows
+    """
+    codes = np.floor(Xn / cell).astype(np.int32)
+    _, label_ids = np.unique(y, return_inverse=True)
+    keyed = np.column_stack([label_ids.astype(np.int32), codes])
+    _, first = np.unique(keyed, axis=0, return_index=True)
+    return np.sort(first)
+
+
+def dedup_kdtree(Xn: np.ndarray, y: np.ndarray, radius: float = 0.05) -> np.ndarray:
+    """
+    Greedily drop samples within `radius` of an already kept sample of the same class
+
+    Rows are visited in recording order, so the first frame of a still pose is
+    kept and the frames that follow it are dropped.
+
+    Returns:
+        Sorted indices of the kept rows
+    """
+    from sklearn.neighbors import KDTree
+
+    kept = []
+    for label in np.unique(y):
+        idx = np.flatnonzero(y == label)
+        tree = KDTree(Xn[idx])
+        neighbors = tree.query_radius(Xn[idx], r=radius)
+        removed = np.zeros(len(idx), dtype=bool)
+        for i in range(len(idx)):
+            if removed[i]:
+                continue
+            kept.append(idx[i])
+            removed[neighbors[i]] = True
+    return np.sort(np.asarray(kept, dtype=np.int64))
+
+
+def coreset_per_class(Xn: np.ndarray, y: np.ndarray, per_class: int,
+                      random_state: int = 42) -> np.ndarray:
+    """
+    Select a diverse subset of at most `per_class` samples per class
+
+    Uses farthest-point sampling, so the subset covers the pose space of each
+    class instead of oversampling the poses that were held longest.
+
+    Returns:
+        Sorted indices of the selected rows
+    """
+    rng = np.random.default_rng(random_state)
+    selected = []
+    for label in np.unique(y):
+        idx = np.flatnonzero(y == label)
+        if len(idx) <= per_class:
+            selected.extend(idx)
+            continue
+        pts = Xn[idx]
+        first = int(rng.integers(len(idx)))
+        chosen = [first]
+        min_dist = np.linalg.norm(pts - pts[first], axis=1)
+        for _ in range(per_class - 1):
+            nxt = int(np.argmax(min_dist))
+            chosen.append(nxt)
+            min_dist = np.minimum(min_dist, np.linalg.norm(pts - pts[nxt], axis=1))
+        selected.extend(idx[chosen])
+    return np.sort(np.asarray(selected, dtype=np.int64))
+
+
+def prune(df: pd.DataFrame, method: str = "kdtree", radius: float = 0.05,
+          cell: float = 0.05, per_class: int = 100, random_state: int = 42) -> pd.DataFrame:
+    """
+    Drop near-duplicate rows from a landmark DataFrame
+
+    Args:
+        df: Landmark data in either CSV layout
+        method: 'kdtree', 'grid' or 'coreset'
+        radius: Neighbour radius for 'kdtree'
+        cell: Cell size for 'grid'
+        per_class: Samples kept per class for 'coreset'
+
+    Returns:
+        Pruned DataFrame (original row order preserved)
+    """
+    feature_cols, label_col = split_columns(df)
+    Xn = normalize_landmarks(df[feature_cols].values)
+    y = df[label_col].values
+
+    if method == "kdtree":
+        keep = dedup_kdtree(Xn, y, radius)
+    elif method == "grid":
+        keep = dedup_grid(Xn, y, cell)
+    elif method == "coreset":
+        keep = coreset_per_class(Xn, y, per_class, random_state)
+    else:
+        raise ValueError(f"Unknown dedup method: {method}")
+
+    return df.iloc[keep].reset_index(drop=True)
+
+
+def session_groups(df: pd.DataFrame, block_size: int = 50) -> np.ndarray:
+    """
+    Assign every row to a recording group for leakage-free splitting
+
+    A recording is a run of consecutive rows with the same label (and the same
+    `session` id when the collector wrote one). Each recording is cut into
+    blocks of `block_size` frames; whole blocks then go to either train or
+    test, so near-identical neighbouring frames never land on both sides.
+
+    Returns:
+        Integer group id per row
+    """
+    _, label_col = split_columns(df)
+    keys = df[label_col].astype(str)
+    if SESSION_COLUMN in df.columns:
+        keys = keys + "|" + df[SESSION_COLUMN].astype(str)
+
+    keys = keys.values
+    run_id = np.concatenate([[0], np.cumsum(keys[1:] != keys[:-1])])
+    pos_in_run = pd.Series(run_id).groupby(run_id).cumcount().values
+    block = pos_in_run // max(block_size, 1)
+    return pd.factorize(pd.Series(run_id).astype(str) + ":" + pd.Series(block).astype(str))[0]
+
+
+def group_train_test_split(X: np.ndarray, y: np.ndarray, groups: np.ndarray,
+                           test_size: float = 0.2, random_state: int = 42) -> Tuple:
+    """
+    Stratified train/test split that never puts one group on both sides
+
+    Returns:
+        X_train, X_test, y_train, y_test (same order as train_test_split)
+    """
+    from sklearn.model_selection import StratifiedGroupKFold
+
+    n_splits = max(2, int(round(1.0 / test_size)))
+    splitter = StratifiedGroupKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    train_idx, test_idx = next(splitter.split(X, y, groups))
+    return X[train_idx], X[test_idx], y[train_idx], y[test_idx]
+
+
+def load_frames(paths: Sequence[str]) -> pd.DataFrame:
+    """Load and concatenate one or more landmark CSVs"""
+    return pd.concat([pd.read_csv(path) for path in paths], ignore_index=True)
+
+
+def evaluate(df: pd.DataFrame, method: str = "kdtree",
+             test_size: float = 0.2, random_state: int = 42, **prune_kwargs) -> dict:
+    """
+    Compare training time and held-out accuracy with and without pruning
+
+    Both models are scored on the same session-grouped test set; only the
+    training side is pruned.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import accuracy_score
+    from sklearn.model_selection import StratifiedGroupKFold
+
+    feature_cols, label_col = split_columns(df)
+    groups = session_groups(df)
+    n_splits = max(2, int(round(1.0 / test_size)))
+    splitter = StratifiedGroupKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    train_idx, test_idx = next(splitter.split(df, df[label_col], groups))
+
+    train_df = df.iloc[train_idx].reset_index(drop=True)
+    test_df = df.iloc[test_idx]
+    pruned_df = prune(train_df, method=method, random_state=random_state, **prune_kwargs)
+
+    X_test = np.nan_to_num(test_df[feature_cols].values, nan=0.0)
+    y_test = test_df[label_col].values
+
+    report = {"test_samples": len(test_df)}
+    for name, part in (("full", train_df), ("pruned", pruned_df)):
+        clf = RandomForestClassifier(n_estimators=100, random_state=random_state, n_jobs=-1)
+        start = time.perf_counter()
+        clf.fit(np.nan_to_num(part[feature_cols].values, nan=0.0), part[label_col].values)
+        fit_s = time.perf_counter() - start
+        acc = accuracy_score(y_test, clf.predict(X_test))
+        report[name] = {"train_samples": len(part), "fit_seconds": fit_s, "accuracy": acc}
+
+    report["speedup"] = report["full"]["fit_seconds"] / max(report["pruned"]["fit_seconds"], 1e-9)
+    report["accuracy_change"] = report["pruned"]["accuracy"] - report["full"]["accuracy"]
+    return report
+
+
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Prune near-duplicate landmark samples")
+    parser.add_argument("--data", type=str, nargs="+", required=True, help="Input landmark CSV(s)")
+    parser.add_argument("--output", type=str, default=None, help="Output CSV for the pruned data")
+    parser.add_argument("--method", type=str, default="kdtree", choices=["kdtree", "grid", "coreset"])
+    parser.add_argument("--radius", type=float, default=0.05, help="KD-tree neighbour radius")
+    parser.add_argument("--cell", type=float, default=0.05, help="Grid cell size")
+    parser.add_argument("--per-class", type=int, default=100, help="Coreset size per class")
+    parser.add_argument("--evaluate", action="store_true", help="Report training speedup and accuracy change")
+
+    args = parser.parse_args()
+    prune_kwargs = dict(radius=args.radius, cell=args.cell, per_class=args.per_class)
+
+    df = load_frames(args.data)
+    pruned = prune(df, method=args.method, **prune_kwargs)
+    _, label_col = split_columns(df)
+
+    print(f"[Dedup] {len(df)} -> {len(pruned)} samples ({100 * len(pruned) / max(len(df), 1):.1f}% kept)")
+    print(pd.DataFrame({"before": df[label_col].value_counts(),
+                        "after": pruned[label_col].value_counts()}).fillna(0).astype(int))
+
+    if args.output:
+        pruned.to_csv(args.output, index=False)
+        print(f"[Dedup] Saved {args.output}")
+
+    if args.evaluate:
+        report = evaluate(df, method=args.method, **prune_kwargs)
+        print("\n[Dedup] ===== EVALUATION (session-grouped test set) =====")
+        for name in ("full", "pruned"):
+            r = report[name]
+            print(f"{name:>7}: {r['train_samples']:>6} train samples, "
+                  f"fit {r['fit_seconds']:.3f}s, accuracy {r['accuracy']:.4f}")
+        print(f"Speedup:         {report['speedup']:.2f}x")
+        print(f"Accuracy change: {report['accuracy_change']:+.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# dispatch.py
+from __future__ import annotations
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+from command_matcher import CommandMatcher, Match
+from config import GESTURE_CONFIG, GESTURE_MAP, VOICE_COMMANDS, VOICE_CONFIG
+
+@dataclass
+class Binding:
+    """A pre-bound handler with an optional cooldown (min seconds between firings)
+    and rate limit (token bucket: `rate` firings/s, up to `burst` at once)."""
+
+    name: str
+    handler: Callable[..., Any]
+    cooldown: float = 0.0
+    rate: float = 0.0
+    burst: int = 1
+    feedback: Optional[str] = None
+    last: float = -math.inf          # last firing, for the cooldown
+    tokens: float = field(default=0.0, repr=False)
+    refilled: float = field(default=-math.inf, repr=False)  # last token refill, on every allow()
+
+    def __post_init__(self) -> None:
+        self.tokens = float(self.burst)
+
+    def allow(self, now: float) -> bool:
+        if self.rate > 0:
+            # Refill for the time since the previous call, fired or throttled, so
+            # throttled polls do not count the same interval again
+            if self.refilled > -math.inf:
+                self.tokens = min(float(self.burst), self.tokens + (now - self.refilled) * self.rate)
+            self.refilled = now
+        if now - self.last < self.cooldown:
+            return False
+        if self.rate > 0:
+            if self.tokens < 1.0:
+                return False
+            self.tokens -= 1.0
+        return True
+
+class DispatchTable:
+    """Name -> Binding lookup built once at startup. `cooldown` is shared by all
+    bindings (at most one firing per `cooldown` seconds across the table)."""
+
+    def __init__(self, cooldown: float = 0.0, clock: Callable[[], float] = time.monotonic) -> None:
+        self.cooldown = cooldown
+        self.clock = clock
+        self._bindings: Dict[str, Binding] = {}
+        self._last = -math.inf
+        self.counters: Dict[str, int] = {"fired": 0, "throttled": 0, "unknown": 0, "failed": 0}
+
+    def bind(self, name: str, handler: Callable[..., Any], cooldown: float = 0.0, rate: float = 0.0,
+             burst: int = 1, feedback: Optional[str] = None) -> Binding:
+        binding = Binding(name, handler, cooldown, rate, burst, feedback)
+        self._bindings[name] = binding
+        return binding
+
+    def alias(self, name: str, target: str) -> None:
+        """Make `name` share `target`'s binding (and its cooldown state)."""
+        self._bindings[name] = self._bindings[target]
+
+    def get(self, name: str) -> Optional[Binding]:
+        return self._bindings.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._bindings
+
+    def names(self) -> Iterable[str]:
+        return self._bindings.keys()
+
+    def acquire(self, name: str) -> Optional[Binding]:
+        """The binding for `name` if it may fire now (a rate token is taken),
+        else None. The caller runs the handler, then calls fired(), or
+        refund() if the handler failed."""
+        binding = self._bindings.get(name)
+        if binding is None:
+            self.counters["unknown"] += 1
+            return None
+        now = self.clock()
+        if now - self._last < self.cooldown or not binding.allow(now):
+            self.counters["throttled"] += 1
+            return None
+        return binding
+
+    def fired(self, binding: Binding) -> None:
+        """Start the cooldowns: only a handler that ran successfully counts."""
+        binding.last = self._last = self.clock()
+        self.counters["fired"] += 1
+
+    def refund(self, binding: Binding) -> None:
+        if binding.rate > 0:
+            binding.tokens = min(float(binding.burst), binding.tokens + 1.0)
+        self.counters["failed"] += 1
+
+    def dispatch(self, name: str, *args, **kwargs) -> bool:
+        """Run the handler bound to `name`; False if unknown or throttled.
+        A handler that raises starts no cooldown; the exception propagates."""
+        binding = self.acquire(name)
+        if binding is None:
+            return False
+        try:
+            binding.handler(*args, **kwargs)
+        except Exception:
+            self.refund(binding)
+            raise
+        self.fired(binding)
+        return True
+
+def compile_gesture_map(handlers: Mapping[str, Callable[..., Any]],
+                        gesture_map: Mapping[str, dict] = GESTURE_MAP) -> DispatchTable:
+    """
+    Bind GESTURE_MAP entries to handlers keyed by their "action_type".
+
+    Gestures are looked up by lower-case name ("click", "scroll", ...).
+    Entries without a handler are skipped. Discrete actions default to
+    GESTURE_CONFIG["gesture_cooldown"] unless the entry sets "cooldown".
+    """
+    table = DispatchTable()
+    for gesture, spec in gesture_map.items():
+        handler = handlers.get(spec["action_type"])
+        if handler is None:
+            continue
+        default = 0.0 if spec.get("continuous") else GESTURE_CONFIG["gesture_cooldown"]
+        table.bind(gesture.lower(), handler, cooldown=spec.get("cooldown", default),
+                   rate=spec.get("rate", 0.0), burst=spec.get("burst", 1))
+    return table
+
+class VoiceCommandTable:
+    """VOICE_COMMANDS compiled for lookup of recognized text.
+
+    Phrases and aliases go into a CommandMatcher (token trie with an
+    edit-distance fallback); commands marked "payload" match on their first
+    word and receive the rest of the utterance ("type hello"), and commands
+    marked "exact" are only matched as the whole utterance.
+    """
+
+    def __init__(self, table: DispatchTable, prefixes: Dict[str, str], exact: Iterable[str] = (),
+                 threshold: float = VOICE_CONFIG["fuzzy_match_threshold"]) -> None:
+        self.table = table
+        self.prefixes = prefixes
+        self.matcher = CommandMatcher(table.names(), prefixes, exact, threshold)
+
+    def complete(self, text: str) -> Optional[str]:
+        """The phrase if `text` is a whole command that no longer phrase starts
+        with and that takes no payload, else None. Used on partial results,
+        where more words may still follow."""
+        return self.matcher.complete(text)
+
+    def lookup(self, text: str) -> Optional[Match]:
+        """Best Match (phrase, payload, confidence) for normalized text."""
+        return self.matcher.match(text)
+
+    def match(self, text: str) -> Tuple[Optional[str], Optional[str]]:
+        """(phrase, payload) for normalized text, or (None, None)."""
+        m = self.matcher.match(text)
+        return (m.phrase, m.payload) if m is not None else (None, None)
+
+    def dispatch(self, text: str, before: Optional[Callable[[Binding], None]] = None
+                 ) -> Tuple[Optional[Match], Optional[Binding]]:
+        """Run the command for `text`. Returns (match, binding if its handler
+        ran); the binding is None while the command is cooling down.
+        `before(binding)` runs just ahead of the handler, e.g. to queue spoken
+        feedback ahead of the handler's own actions."""
+        m = self.matcher.match(text)
+        if m is None:
+            return None, None
+        binding = self.table.acquire(m.phrase)
+        if binding is None:
+            return m, None
+        try:
+            if before is not None:
+                before(binding)
+            binding.handler(*((m.payload,) if m.payload is not None else ()))
+        except Exception:
+            self.table.refund(binding)
+            raise
+        self.table.fired(binding)
+        return m, binding
+
+def compile_voice_commands(handlers: Mapping[str, Callable[..., Any]],
+                           commands: Mapping[str, dict] = VOICE_COMMANDS) -> VoiceCommandTable:
+    """
+    Bind VOICE_COMMANDS entries to handlers keyed by their "action".
+
+    Payload handlers take the remaining text; the others take no arguments.
+    """
+    table = DispatchTable()
+    prefixes: Dict[str, str] = {}
+    exact = []
+    for phrase, spec in commands.items():
+        handler = handlers.get(spec["action"])
+        if handler is None:
+            continue
+        table.bind(phrase, handler, cooldown=spec.get("cooldown", 0.0), rate=spec.get("rate", 0.0),
+                   feedback=spec.get("feedback"))
+        for alias in spec.get("aliases", ()):
+            table.alias(alias, phrase)
+        words = (phrase, *spec.get("aliases", ()))
+        if spec.get("payload"):
+            prefixes.update((word, phrase) for word in words)
+        if spec.get("exact"):
+            exact.extend(words)
+    return VoiceCommandTable(table, prefixes, exact)
@@ -0,0 +1,318 @@
+# executor.py
+from __future__ import annotations
+import math
+import sys
+import threading
+import time
+import webbrowser
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from actions import Action
+from input_backends import InputBackend
+from latency import LatencyRecorder
+
+POSITIONAL_TYPES = frozenset({"MOUSE_DOWN", "MOUSE_UP", "CLICK", "DOUBLE_CLICK", "SCROLL"})
+PASTE_KEYS = ("command", "v") if sys.platform == "darwin" else ("ctrl", "v")
+
+class CursorInterpolator:
+    """Moves the cursor toward the latest target at a fixed rate (independent of
+    the camera frame rate), easing with time constant `ease` seconds. Sleeps
+    while the cursor is at the target."""
+
+    def __init__(self, backend: InputBackend, rate_hz: float = 120.0, ease: float = 0.03,
+                 lock: Optional[threading.Lock] = None) -> None:
+        self.backend = backend
+        self.period = 1.0 / rate_hz
+        self.alpha = 1.0 - math.exp(-self.period / max(ease, 1e-6))
+        # Held around every backend call so executor events and cursor steps don't interleave
+        self.lock = lock or threading.Lock()
+        self._cond = threading.Condition()
+        self._pos: Optional[Tuple[float, float]] = None
+        self._target: Optional[Tuple[float, float]] = None
+        self._sent: Optional[Tuple[int, int]] = None
+        self._stopped = False
+        self.steps = 0
+        self._thread = threading.Thread(target=self._run, name="CursorInterpolator", daemon=True)
+        self._thread.start()
+
+    def set_target(self, x: int, y: int) -> None:
+        with self._cond:
+            self._target = (float(x), float(y))
+            if self._pos is None:
+                self._pos = self._target
+            self._cond.notify()
+
+    def snap(self) -> list:
+        """Jump to the target now; returns the move event to inject (call with
+        `lock` held or include the event in the same dispatch)."""
+        with self._cond:
+            if self._target is None:
+                return []
+            self._pos = self._target
+            x, y = int(round(self._target[0])), int(round(self._target[1]))
+            if self._sent == (x, y):
+                return []
+            self._sent = (x, y)
+            return [("move", x, y)]
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._thread.join(1.0)
+
+    def _pending(self) -> bool:
+        if self._target is None:
+            return False
+        return self._sent != (int(round(self._target[0])), int(round(self._target[1])))
+
+    def _run(self) -> None:
+        next_tick = time.perf_counter()
+        while True:
+            with self._cond:
+                if not self._pending():
+                    self._cond.wait_for(lambda: self._stopped or self._pending())
+                    next_tick = time.perf_counter()
+                if self._stopped:
+                    return
+                (px, py), (tx, ty) = self._pos, self._target
+                px += (tx - px) * self.alpha
+                py += (ty - py) * self.alpha
+                if math.hypot(tx - px, ty - py) < 0.5:
+                    px, py = tx, ty
+                self._pos = (px, py)
+                step = (int(round(px)), int(round(py)))
+                moved = step != self._sent
+                self._sent = step
+
+            if moved:
+                with self.lock:
+                    self.backend.dispatch([("move", step[0], step[1])])
+                self.steps += 1
+            next_tick += self.period
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.perf_counter()
+
+class TextTyper:
+    """Injects TYPE_TEXT on its own thread, so dictating a paragraph never holds
+    up clicks and cursor moves. Text of at least `paste_min_chars` characters
+    is pasted: put on the clipboard, sent with the paste shortcut, and the
+    previous clipboard text put back `restore_delay` s later (the target app
+    reads the clipboard asynchronously). Shorter text, or any text when the
+    clipboard is unavailable, is typed `chunk` characters per backend call;
+    `lock` is taken per call, so other input gets in between chunks."""
+
+    def __init__(self, backend: InputBackend, lock: threading.Lock, paste_min_chars: int = 32,
+                 restore_delay: float = 0.25, chunk: int = 8) -> None:
+        self.backend = backend
+        self.lock = lock
+        self.paste_min_chars = paste_min_chars
+        self.restore_delay = restore_delay
+        self.chunk = chunk
+        self._clipboard = None      # pyperclip, imported on first paste; False if unusable
+        self._queue: Deque[str] = deque()
+        self._busy = False
+        self._cond = threading.Condition()
+        self._stopped = False
+        self.counters = {"typed": 0, "pasted": 0, "chars": 0}
+        self._thread = threading.Thread(target=self._run, name="TextTyper", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str) -> None:
+        with self._cond:
+            self._queue.append(text)
+            self._cond.notify_all()
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Let queued text finish (bounded), then stop the thread."""
+        with self._cond:
+            self._cond.wait_for(lambda: not self._queue and not self._busy, timeout)
+            self._stopped = True
+            self._queue.clear()
+            self._cond.notify_all()
+        self._thread.join(1.0)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopped or self._queue)
+                if self._stopped:
+                    return
+                text = self._queue.popleft()
+                self._busy = True
+            try:
+                if len(text) >= self.paste_min_chars and self._paste(text):
+                    self.counters["pasted"] += 1
+                else:
+                    self._type(text)
+                    self.counters["typed"] += 1
+                self.counters["chars"] += len(text)
+            except Exception as e:
+                print(f"[Executor] Typing failed: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _type(self, text: str) -> None:
+        for i in range(0, len(text), self.chunk):
+            if self._stopped:
+                return
+            with self.lock:
+                self.backend.dispatch([("write", text[i:i + self.chunk])])
+
+    def _paste(self, text: str) -> bool:
+        clip = self._load_clipboard()
+        if not clip:
+            return False
+        try:
+            previous = clip.paste()
+            clip.copy(text)
+        except Exception as e:
+            print(f"[Executor] Clipboard unavailable ({e}), typing instead")
+            self._clipboard = False
+            return False
+        with self.lock:
+            self.backend.dispatch([("hotkey", *PASTE_KEYS)])
+        time.sleep(self.restore_delay)
+        try:
+            clip.copy(previous)  # text only; other clipboard content is not kept
+        except Exception:
+            pass
+        return True
+
+    def _load_clipboard(self):
+        if self._clipboard is None:
+            self._clipboard = False
+            if self.backend.clipboard:
+                try:
+                    import pyperclip
+                    self._clipboard = pyperclip
+                except ImportError:
+                    pass
+        return self._clipboard
+
+class ActionExecutor:
+    """Batch handler for ActionBus.start(): turns actions into input events and
+    injects each batch with one backend call. SAY / TOGGLE_GESTURES / OPEN_URL
+    flush the collected input first so ordering is preserved.
+
+    With cursor_rate > 0, MOUSE_MOVE only updates the CursorInterpolator target;
+    clicks, presses and scrolls snap the cursor to the target first. TYPE_TEXT
+    is handed to the TextTyper thread once the input before it is injected."""
+
+    def __init__(self, backend: InputBackend, on_toggle: Optional[Callable[[bool], None]] = None,
+                 on_say: Optional[Callable[[str], None]] = None,
+                 latency: Optional[LatencyRecorder] = None,
+                 cursor_rate: float = 0.0, cursor_ease: float = 0.03,
+                 paste_min_chars: int = 32, paste_restore_delay: float = 0.25) -> None:
+        self.backend = backend
+        self.on_toggle = on_toggle
+        self.on_say = on_say
+        self.latency = latency
+        self.screen_w, self.screen_h = backend.size()
+        self.mouse_is_down = False
+        # Cursor steps and typed text come from their own threads
+        self.lock = threading.Lock()
+        self.cursor = CursorInterpolator(backend, cursor_rate, cursor_ease, self.lock) if cursor_rate > 0 else None
+        self.typer = TextTyper(backend, self.lock, paste_min_chars, paste_restore_delay)
+
+        # Action type -> bound handler; input handlers only collect events for the batch
+        self._handlers: Dict[str, Callable[[Action], None]] = {
+            "SAY": self._say,
+            "TOGGLE_GESTURES": self._toggle,
+            "OPEN_URL": self._open_url,
+            "MOUSE_MOVE": self._move,
+            "MOUSE_DOWN": self._mouse_down,
+            "MOUSE_UP": self._mouse_up,
+            "CLICK": lambda a: self._events.append(("click",)),
+            "DOUBLE_CLICK": lambda a: self._events.append(("double_click",)),
+            "SCROLL": self._scroll,
+            "TYPE_TEXT": self._type_text,
+        }
+        self._events: list = []
+        self._done: List[Action] = []
+        self._t_dequeue = 0.0
+
+    def __call__(self, batch: List[Action]) -> None:
+        self._t_dequeue = time.perf_counter()
+        for action in batch:
+            # Press/click where the hand points, not where the easing has got to
+            if self.cursor is not None and action.type in POSITIONAL_TYPES:
+                self._events.extend(self.cursor.snap())
+            handler = self._handlers.get(action.type)
+            if handler is not None:
+                handler(action)
+            self._done.append(action)
+        self._flush()
+
+    def _flush(self) -> None:
+        if self._events:
+            with self.lock:
+                self.backend.dispatch(self._events)
+            self._events.clear()
+        if self.latency is not None:
+            t_done = time.perf_counter()
+            for a in self._done:
+                self.latency.record(a, self._t_dequeue, t_done)
+        self._done.clear()
+
+    def _say(self, action: Action) -> None:
+        if action.text and self.on_say is not None:
+            self._flush()
+            self.on_say(action.text)
+
+    def _toggle(self, action: Action) -> None:
+        if action.enabled is not None and self.on_toggle is not None:
+            self._flush()
+            self.on_toggle(action.enabled)
+
+    def _open_url(self, action: Action) -> None:
+        if action.url:
+            self._flush()
+            webbrowser.open(action.url)
+
+    def _move(self, action: Action) -> None:
+        # action.x/action.y are 0..10000 normalized ints
+        if action.x is None or action.y is None:
+            return
+        nx = max(0, min(10000, action.x)) / 10000.0
+        ny = max(0, min(10000, action.y)) / 10000.0
+        x, y = int(nx * self.screen_w), int(ny * self.screen_h)
+        if self.cursor is not None:
+            self.cursor.set_target(x, y)
+        else:
+            self._events.append(("move", x, y))
+
+    def _mouse_down(self, action: Action) -> None:
+        if not self.mouse_is_down:
+            self._events.append(("down",))
+            self.mouse_is_down = True
+
+    def _mouse_up(self, action: Action) -> None:
+        if self.mouse_is_down:
+            self._events.append(("up",))
+            self.mouse_is_down = False
+
+    def _scroll(self, action: Action) -> None:
+        if action.amount is not None:
+            self._events.append(("scroll", int(action.amount)))
+
+    def _type_text(self, action: Action) -> None:
+        if action.text:
+            self._flush()
+            self.typer.submit(action.text)
+
+    def close(self) -> None:
+        """Stop the cursor and typing threads; never leave the button held when the bus shuts down."""
+        self.typer.close()
+        if self.cursor is not None:
+            self.cursor.stop()
+        if self.mouse_is_down:
+            with self.lock:
+                self.backend.dispatch([("up",)])
+            self.mouse_is_down = False
@@ -0,0 +1,70 @@
+# filters.py
+from __future__ import annotations
+import math
+from typing import Optional
+
+import numpy as np
+
+def _alpha(cutoff: float, dt: float) -> float:
+    tau = 1.0 / (2.0 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+class OneEuroFilter:
+    """Speed-adaptive low-pass filter (Casiez et al., "1 Euro Filter", CHI 2012).
+
+    The cutoff rises with the filtered speed: min_cutoff (Hz) sets the jitter
+    removed while the hand holds still, beta how quickly lag disappears as it
+    moves. Works on a vector (e.g. normalized x, y) with a shared cutoff.
+    """
+
+    def __init__(self, min_cutoff: float = 1.0, beta: float = 0.007, d_cutoff: float = 1.0) -> None:
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self) -> None:
+        self.x: Optional[np.ndarray] = None
+        self.dx: Optional[np.ndarray] = None
+        self.t: Optional[float] = None
+
+    def __call__(self, value, t: float) -> np.ndarray:
+        value = np.asarray(value, dtype=np.float64)
+        if self.x is None:
+            self.x, self.dx, self.t = value.copy(), np.zeros_like(value), t
+            return self.x.copy()
+        dt = t - self.t
+        if dt <= 0:
+            return self.x.copy()
+
+        self.t = t
+        dx = (value - self.x) / dt
+        self.dx = self.dx + _alpha(self.d_cutoff, dt) * (dx - self.dx)
+        cutoff = self.min_cutoff + self.beta * float(np.linalg.norm(self.dx))
+        self.x = self.x + _alpha(cutoff, dt) * (value - self.x)
+        return self.x.copy()
+
+    def predict(self, horizon: float) -> np.ndarray:
+        """Extrapolate the filtered position `horizon` seconds ahead using the
+        filtered velocity (compensates for capture-to-input latency)."""
+        if self.x is None:
+            raise ValueError("predict() before the first sample")
+        return self.x + self.dx * horizon
+
+class EmaFilter:
+    """Fixed-weight exponential moving average (the previous cursor smoothing)."""
+
+    def __init__(self, smoothing: float = 0.35) -> None:
+        self.smoothing = smoothing
+        self.reset()
+
+    def reset(self) -> None:
+        self.x: Optional[np.ndarray] = None
+
+    def __call__(self, value, t: float) -> np.ndarray:
+        value = np.asarray(value, dtype=np.float64)
+        self.x = value.copy() if self.x is None else self.smoothing * self.x + (1 - self.smoothing) * value
+        return self.x.copy()
+
+    def predict(self, horizon: float) -> np.ndarray:
+        return self.x.copy()
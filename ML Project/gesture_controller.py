@@ -5,9 +5,10 @@ from dataclasses import dataclass
 
 import cv2
 import numpy as np
-import mediapipe as mp
 
 from actions import Action, ActionBus
+from filters import EmaFilter, OneEuroFilter
+from gesture_state import DRAG, IDLE, GestureStateMachine, ScrollAccumulator, landmarks_array
 
 @dataclass
 class GestureConfig:
@@ -16,18 +17,49 @@ class GestureConfig:
     min_det_conf: float = 0.6
     min_track_conf: float = 0.6
 
-    # Pinch detection (normalized distance threshold)
+    # Pinch detection (normalized distance): enters below pinch_thresh, exits above pinch_exit
     pinch_thresh: float = 0.045
+    pinch_exit: float = 0.065
 
-    # Smoothing for mouse movement
+    # Finger "up" margin (tip above PIP, normalized y) with hysteresis
+    finger_up_enter: float = 0.02
+    finger_up_exit: float = 0.0
+
+    # Velocity scroll: tip speed (screen heights/s) beyond the dead zone -> scroll units/s
+    scroll_gain: float = 1500.0
+    scroll_deadzone: float = 0.15
+    scroll_max_rate: float = 10.0     # max SCROLL actions per second
+    scroll_friction: float = 4.0      # 1/s decay of the coasting scroll
+
+    # A new hand state must persist this long before actions change
+    min_hold: float = 0.06
+
+    # Cursor filter: "one_euro" (speed-adaptive cutoff) or "ema" (fixed `smoothing`)
+    cursor_filter: str = "one_euro"
     smoothing: float = 0.35
+    min_cutoff: float = 1.0      # Hz, jitter removal while the hand holds still
+    beta: float = 20.0           # cutoff increase per screen-width/s of hand speed
+    d_cutoff: float = 1.0        # Hz, cutoff for the speed estimate
+
+    # Velocity extrapolation to hide capture-to-input latency
+    predict: bool = False
+    predict_horizon: float | None = None  # seconds; None = measured p50 latency
+    max_predict_horizon: float = 0.1
+
+def open_camera(index: int = 0) -> cv2.VideoCapture:
+    cap = cv2.VideoCapture(index)
+    if not cap.isOpened():
+        raise RuntimeError("Could not open webcam.")
+    return cap
 
 class GestureController:
-    def __init__(self, bus: ActionBus, cfg: GestureConfig = GestureConfig()) -> None:
+    def __init__(self, bus: ActionBus, cfg: GestureConfig = GestureConfig(), latency=None) -> None:
         self.bus = bus
         self.cfg = cfg
+        self.latency = latency  # LatencyRecorder, for the prediction horizon
         self.enabled = True
 
+        import mediapipe as mp  # slow import; done by whichever thread builds the controller
         self.mp_hands = mp.solutions.hands
         self.hands = self.mp_hands.Hands(
             static_image_mode=False,
@@ -36,107 +68,105 @@ class GestureController:
             min_tracking_confidence=cfg.min_track_conf,
         )
 
-        self.prev_mouse = None
-        self.dragging = False
+        if cfg.cursor_filter == "ema":
+            self.cursor_filter = EmaFilter(cfg.smoothing)
+        else:
+            self.cursor_filter = OneEuroFilter(cfg.min_cutoff, cfg.beta, cfg.d_cutoff)
+        self.state = GestureStateMachine(
+            pinch_enter=cfg.pinch_thresh, pinch_exit=cfg.pinch_exit,
+            up_enter=cfg.finger_up_enter, up_exit=cfg.finger_up_exit, min_hold=cfg.min_hold,
+            scroll=ScrollAccumulator(cfg.scroll_gain, cfg.scroll_deadzone, cfg.scroll_max_rate,
+                                     cfg.scroll_friction),
+        )
 
-    def set_enabled(self, enabled: bool) -> None:
-        self.enabled = enabled
-        # Release drag if disabling mid-drag
-        if not enabled and self.dragging:
-            self.bus.put(Action(type="MOUSE_UP"))
-            self.dragging = False
+        # Source frame stamps attached to every emitted Action
+        self._seq = 0
+        self._t_capture: float | None = None
 
-    @staticmethod
-    def _lm_xy(lm, w: int, h: int) -> tuple[int, int]:
-        return int(lm.x * w), int(lm.y * h)
+    def _emit(self, type: str, **fields) -> None:
+        self.bus.put(Action(type=type, t_capture=self._t_capture, seq=self._seq, source="gesture", **fields))
 
-    @staticmethod
-    def _norm_dist(a, b) -> float:
-        return float(np.hypot(a.x - b.x, a.y - b.y))
+    @property
+    def dragging(self) -> bool:
+        return self.state.state == DRAG
 
-    def _finger_up(self, lm, tip_id: int, pip_id: int) -> bool:
-        # "Up" if tip is above PIP in image coords (y smaller)
-        return lm[tip_id].y < lm[pip_id].y
+    def set_enabled(self, enabled: bool) -> None:
+        self.enabled = enabled
+        # Release drag if disabling mid-drag
+        if not enabled:
+            if self.dragging:
+                self.bus.put(Action(type="MOUSE_UP", source="gesture"))
+            self.state.reset()
+
+    def _predict_horizon(self) -> float:
+        if not self.cfg.predict:
+            return 0.0
+        horizon = self.cfg.predict_horizon
+        if horizon is None:
+            horizon = self.latency.p50_total() if self.latency is not None else None
+        return min(horizon or 0.0, self.cfg.max_predict_horizon)
+
+    def process_frame(self, frame) -> tuple[np.ndarray, str | None]:
+        """Detect the hand in one BGR camera frame and emit the resulting actions.
+
+        Returns the mirrored frame and the debounced hand state ("move", "drag",
+        "scroll", "open_palm", "idle") or None without a hand.
+        """
+        frame = cv2.flip(frame, 1)
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        res = self.hands.process(rgb)
+        t = self._t_capture if self._t_capture is not None else time.perf_counter()
+
+        pts = landmarks_array(res.multi_hand_landmarks[0]) if res.multi_hand_landmarks else None
+        if not self.enabled:
+            return frame, None if pts is None else IDLE
+
+        for type, fields in self.state.update(pts, t):
+            self._emit(type, **fields)
+
+        if pts is None:
+            return frame, None
+
+        # Mouse move: index tip in normalized 0..1 coords, mapped to the screen by the executor
+        if self.state.moving:
+            nx, ny = float(pts[8, 0]), float(pts[8, 1])
+            self.cursor_filter((nx, ny), t)
+            horizon = self._predict_horizon()
+            smx, smy = self.cursor_filter.predict(horizon) if horizon > 0 else self.cursor_filter.x
+            smx, smy = min(max(smx, 0.0), 1.0), min(max(smy, 0.0), 1.0)
+            self._emit("MOUSE_MOVE", x=int(smx * 10_000), y=int(smy * 10_000))
+
+        return frame, self.state.state
+
+    def open_camera(self) -> cv2.VideoCapture:
+        return open_camera(self.cfg.cam_index)
+
+    def step(self, frame, t_capture: float) -> bool:
+        """Process and show one captured frame; False once the user pressed q."""
+        self._t_capture = t_capture
+        self._seq += 1
+
+        frame, _ = self.process_frame(frame)
+
+        # Display window (optional)
+        cv2.imshow("Gesture Controller (press q)", frame)
+        if cv2.waitKey(1) & 0xFF == ord("q"):
+            self._emit("QUIT")
+            return False
+        return True
 
     def run(self) -> None:
-        cap = cv2.VideoCapture(self.cfg.cam_index)
-        if not cap.isOpened():
-            raise RuntimeError("Could not open webcam.")
-
+        cap = self.open_camera()
         try:
             while True:
                 ok, frame = cap.read()
                 if not ok:
                     continue
-
-                frame = cv2.flip(frame, 1)
-                h, w = frame.shape[:2]
-                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                res = self.hands.process(rgb)
-
-                if res.multi_hand_landmarks:
-                    hand = res.multi_hand_landmarks[0]
-                    lm = hand.landmark
-
-                    # Landmarks used:
-                    # thumb tip 4, index tip 8, middle tip 12
-                    # index pip 6, middle pip 10
-                    pinch = self._norm_dist(lm[4], lm[8]) < self.cfg.pinch_thresh
-                    index_up = self._finger_up(lm, 8, 6)
-                    middle_up = self._finger_up(lm, 12, 10)
-
-                    # Open palm safety: index+middle up and pinch not active
-                    open_palm_gesture = index_up and middle_up and not pinch
-
-                    # Mouse move: when index finger up
-                    if self.enabled and index_up and not middle_up:
-                        ix, iy = self._lm_xy(lm[8], w, h)
-
-                        # map camera coords -> screen-like coords (we send as relative intent)
-                        # Here we just send raw and let executor map using pyautogui.size()
-                        # Normalize to 0..1:
-                        nx = ix / max(w, 1)
-                        ny = iy / max(h, 1)
-
-                        # smoothing in normalized space
-                        if self.prev_mouse is None:
-                            smx, smy = nx, ny
-                        else:
-                            smx = self.prev_mouse[0] * self.cfg.smoothing + nx * (1 - self.cfg.smoothing)
-                            smy = self.prev_mouse[1] * self.cfg.smoothing + ny * (1 - self.cfg.smoothing)
-
-                        self.prev_mouse = (smx, smy)
-                        self.bus.put(Action(type="MOUSE_MOVE", x=int(smx * 10_000), y=int(smy * 10_000)))
-
-                    # Drag/click via pinch
-                    if self.enabled and pinch and index_up:
-                        if not self.dragging:
-                            self.bus.put(Action(type="MOUSE_DOWN"))
-                            self.dragging = True
-                    else:
-                        if self.dragging:
-                            self.bus.put(Action(type="MOUSE_UP"))
-                            self.dragging = False
-
-                    # Two-finger scroll mode (index+middle up)
-                    if self.enabled and index_up and middle_up and not open_palm_gesture:
-                        # crude scroll from middle fingertip vertical movement (delta)
-                        mx, my = self._lm_xy(lm[12], w, h)
-                        # use lm[0] wrist as a rough reference to stabilize
-                        _, wy = self._lm_xy(lm[0], w, h)
-                        dy = (wy - my) / max(h, 1)  # positive when fingers up
-                        amount = int(np.clip(dy * 600, -600, 600))
-                        if abs(amount) > 30:
-                            self.bus.put(Action(type="SCROLL", amount=amount))
-
-                # Display window (optional)
-                cv2.imshow("Gesture Controller (press q)", frame)
-                if cv2.waitKey(1) & 0xFF == ord("q"):
-                    self.bus.put(Action(type="QUIT"))
+                if not self.step(frame, time.perf_counter()):
                     break
 
                 time.sleep(0.001)
 
         finally:
             cap.release()
-            cv2.destroyAllWindows()
\ No newline at end of file
+            cv2.destroyAllWindows()
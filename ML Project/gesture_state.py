@@ -0,0 +1,167 @@
+# gesture_state.py
+from __future__ import annotations
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# MediaPipe hand landmark indices
+WRIST, THUMB_TIP = 0, 4
+FINGER_TIPS = np.array([8, 12, 16, 20])   # index, middle, ring, pinky
+FINGER_PIPS = np.array([6, 10, 14, 18])
+INDEX, MIDDLE, RING, PINKY = range(4)
+
+IDLE, MOVE, DRAG, SCROLL, PALM = "idle", "move", "drag", "scroll", "open_palm"
+
+def landmarks_array(hand_landmarks) -> np.ndarray:
+    """(21, 3) float32 array from a MediaPipe NormalizedLandmarkList."""
+    return np.array([(p.x, p.y, p.z) for p in hand_landmarks.landmark], dtype=np.float32)
+
+def hand_features(pts: np.ndarray) -> Tuple[float, np.ndarray, float]:
+    """One pass over the landmark array.
+
+    Returns (pinch distance, per-finger "up" margins, mean index/middle tip y),
+    all in normalized image units. A margin > 0 means the tip is above its PIP.
+    """
+    pinch = float(np.hypot(*(pts[THUMB_TIP, :2] - pts[FINGER_TIPS[INDEX], :2])))
+    margins = pts[FINGER_PIPS, 1] - pts[FINGER_TIPS, 1]
+    tip_y = float(pts[FINGER_TIPS[:2], 1].mean())
+    return pinch, margins, tip_y
+
+class ScrollAccumulator:
+    """Scrolls by fingertip velocity instead of fingertip position.
+
+    Vertical tip velocity (normalized units/s, up = positive) below `deadzone` is
+    ignored; the rest is scaled by `gain` into scroll units/s and integrated into
+    a fractional carry. Whole units are emitted at most `max_rate` times per
+    second. When the scroll pose ends the velocity keeps going and decays with
+    `friction` (1/s), like a flicked wheel.
+    """
+
+    def __init__(self, gain: float = 1500.0, deadzone: float = 0.15, max_rate: float = 10.0,
+                 friction: float = 4.0, smoothing: float = 0.05, min_velocity: float = 20.0) -> None:
+        self.gain = gain
+        self.deadzone = deadzone
+        self.min_interval = 1.0 / max_rate
+        self.friction = friction
+        self.smoothing = smoothing          # time constant of the velocity estimate (s)
+        self.min_velocity = min_velocity    # scroll units/s below which inertia stops
+        self.reset()
+
+    def reset(self) -> None:
+        self.velocity = 0.0
+        self.carry = 0.0
+        self._y: Optional[float] = None
+        self._t: Optional[float] = None
+        self._last_emit = -math.inf
+
+    def update(self, tip_y: Optional[float], t: float, engaged: bool) -> int:
+        """Advance to time t; returns whole scroll units to emit now (0 = none)."""
+        dt = t - self._t if self._t is not None else 0.0
+        self._t = t
+        if dt <= 0:
+            self._y = tip_y if engaged else None
+            return 0
+
+        if engaged and tip_y is not None:
+            if self._y is not None:
+                hand_v = (self._y - tip_y) / dt
+                hand_v = 0.0 if abs(hand_v) < self.deadzone else hand_v - math.copysign(self.deadzone, hand_v)
+                a = 1.0 - math.exp(-dt / self.smoothing)
+                self.velocity += a * (hand_v * self.gain - self.velocity)
+            self._y = tip_y
+        else:
+            self._y = None
+            self.velocity *= math.exp(-self.friction * dt)
+            if abs(self.velocity) < self.min_velocity:
+                self.velocity = 0.0
+                self.carry = 0.0
+
+        self.carry += self.velocity * dt
+        if t - self._last_emit < self.min_interval or abs(self.carry) < 1.0:
+            return 0
+        units = int(self.carry)
+        self.carry -= units
+        self._last_emit = t
+        return units
+
+class GestureStateMachine:
+    """Debounced hand state with per-state actions.
+
+    Pinch and finger-up use separate enter/exit thresholds (hysteresis), and a
+    new state must be seen for `min_hold` seconds before the machine switches
+    to it. Actions are only emitted on transitions (MOUSE_DOWN entering drag,
+    MOUSE_UP leaving it) and by the ScrollAccumulator, which is driven by tip
+    velocity in the scroll state and coasts after it.
+
+    States: idle, move (index up), drag (pinch with index up), scroll (index +
+    middle up), open_palm (all four fingers up; no actions).
+    """
+
+    def __init__(self, pinch_enter: float = 0.045, pinch_exit: float = 0.065,
+                 up_enter: float = 0.02, up_exit: float = 0.0, min_hold: float = 0.06,
+                 scroll: Optional[ScrollAccumulator] = None) -> None:
+        self.pinch_enter, self.pinch_exit = pinch_enter, pinch_exit
+        self.up_enter, self.up_exit = up_enter, up_exit
+        self.min_hold = min_hold
+        self.scroll = scroll if scroll is not None else ScrollAccumulator()
+        self.reset()
+
+    def reset(self) -> None:
+        self.state = IDLE
+        self.pinch = False
+        self.up = np.zeros(4, dtype=bool)
+        self.scroll.reset()
+        self._candidate: Optional[str] = None
+        self._since = 0.0
+
+    def _classify(self) -> str:
+        index, middle, ring, pinky = self.up
+        if index and middle and ring and pinky and not self.pinch:
+            return PALM
+        if self.pinch and index:
+            return DRAG
+        if index and middle and not ring and not pinky:
+            return SCROLL
+        if index and not middle:
+            return MOVE
+        return IDLE
+
+    def update(self, pts: Optional[np.ndarray], t: float) -> List[Tuple[str, dict]]:
+        """Advance with one frame's landmarks (None without a hand); returns actions."""
+        if pts is None:
+            target = IDLE
+            tip_y = None
+        else:
+            pinch, margins, tip_y = hand_features(pts)
+            self.pinch = pinch < (self.pinch_exit if self.pinch else self.pinch_enter)
+            self.up = np.where(self.up, margins > self.up_exit, margins > self.up_enter)
+            target = self._classify()
+
+        actions: List[Tuple[str, dict]] = []
+        if target == self.state:
+            self._candidate = None
+        elif target != self._candidate:
+            self._candidate, self._since = target, t
+        if self._candidate is not None and t - self._since >= self.min_hold:
+            actions += self._transition(self._candidate)
+
+        amount = self.scroll.update(tip_y, t, self.state == SCROLL)
+        if amount:
+            actions.append(("SCROLL", {"amount": amount}))
+        return actions
+
+    def _transition(self, new: str) -> List[Tuple[str, dict]]:
+        actions: List[Tuple[str, dict]] = []
+        if self.state == DRAG:
+            actions.append(("MOUSE_UP", {}))
+        if new == DRAG:
+            actions.append(("MOUSE_DOWN", {}))
+            self.scroll.reset()  # no coasting scroll while pressing
+        self.state, self._candidate = new, None
+        return actions
+
+    @property
+    def moving(self) -> bool:
+        """The cursor follows the index tip in move and drag."""
+        return self.state in (MOVE, DRAG)
@@ -10,6 +10,8 @@ import numpy as np
 import sys
 from typing import Tuple, Optional, Dict
 from actions import ActionBus, create_move_action, create_click_action, create_scroll_action, create_pause_action
+from config import ACTION_CONFIG
+from dispatch import compile_gesture_map
 
 
 class GestureInference:
@@ -175,6 +177,7 @@ class GestureInference:
         
         gesture_history = []
         smoothing_window = 5  # Smooth predictions over 5 frames
+        actions = self._gesture_table(action_bus) if action_bus else None
         
         try:
             while True:
@@ -196,8 +199,8 @@ class GestureInference:
                         smoothed_gesture = max(set(gesture_history), key=gesture_history.count)
                         
                         # Send action if we have action bus
-                        if action_bus:
-                            self._send_action(action_bus, smoothed_gesture)
+                        if actions:
+                            self._send_action(actions, smoothed_gesture)
                 
                 cv2.imshow("Gesture Inference", annotated_frame)
                 
@@ -211,20 +214,20 @@ class GestureInference:
             cv2.destroyAllWindows()
     
     @staticmethod
-    def _send_action(action_bus: ActionBus, gesture: str):
+    def _gesture_table(action_bus: ActionBus):
+        """Compile GESTURE_MAP into gesture -> enqueue handlers (with cooldowns)"""
+        return compile_gesture_map({
+            "click": lambda: action_bus.enqueue(create_click_action(source="ml_gesture")),
+            "double_click": lambda: action_bus.enqueue(create_click_action(double=True, source="ml_gesture")),
+            "scroll": lambda: action_bus.enqueue(create_scroll_action(direction="up", source="ml_gesture")),
+            "pause": lambda: action_bus.enqueue(create_pause_action(source="ml_gesture")),
+            # "move_mouse" would be handled continuously
+        })
+
+    @staticmethod
+    def _send_action(actions, gesture: str):
         """Send action to action bus based on gesture"""
-        if gesture == "move":
-            # Mouse move would be handled continuously
-            pass
-        elif gesture == "click":
-            action = create_click_action(source="ml_gesture")
-            action_bus.enqueue(action)
-        elif gesture == "scroll":
-            action = create_scroll_action(direction="up", source="ml_gesture")
-            action_bus.enqueue(action)
-        elif gesture == "pause":
-            action = create_pause_action(source="ml_gesture")
-            action_bus.enqueue(action)
+        actions.dispatch(gesture)
 
 
 def main():
@@ -246,11 +249,18 @@ def main():
         print("[Main] Failed to load model. Exiting.")
         sys.exit(1)
     
-    # Create action bus if requested
+    # Create action bus if requested (same bus + executor as main.py)
     action_bus = None
     if args.with_actions:
-        action_bus = ActionBus()
-        action_bus.start()
+        from executor import ActionExecutor
+        from input_backends import create_backend
+        action_bus = ActionBus(capacity=ACTION_CONFIG["queue_capacity"], batch_size=ACTION_CONFIG["batch_size"],
+                               action_timeout=ACTION_CONFIG["action_timeout"])
+        executor = ActionExecutor(create_backend(ACTION_CONFIG["input_backend"]),
+                                  cursor_rate=ACTION_CONFIG["cursor_rate_hz"], cursor_ease=ACTION_CONFIG["cursor_ease"],
+                                  paste_min_chars=ACTION_CONFIG["paste_min_chars"],
+                                  paste_restore_delay=ACTION_CONFIG["paste_restore_delay"])
+        action_bus.start(executor)
     
     try:
         inference.run_inference(action_bus=action_bus)
@@ -259,6 +269,7 @@ def main():
     finally:
         if action_bus:
             action_bus.stop()
+            executor.close()
 
 
 if __name__ == "__main__":
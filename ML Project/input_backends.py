@@ -0,0 +1,342 @@
+# input_backends.py
+from __future__ import annotations
+import json
+import sys
+import time
+from typing import List, Sequence, Tuple
+
+# Input events handed to a backend by the executor, in pixel coordinates:
+#   ("move", x, y) ("down",) ("up",) ("click",) ("double_click",) ("scroll", amount) ("write", text)
+#   ("hotkey", key, ...)   e.g. ("hotkey", "ctrl", "v"); modifiers are released in reverse order
+InputEvent = Tuple
+
+
+class InputBackend:
+    """Injects input events into the OS. Subclasses implement the primitives;
+    dispatch() runs a batch of events and may be overridden to do it in one call."""
+
+    name = "base"
+    clipboard = True  # long text may be pasted through the system clipboard
+
+    def size(self) -> Tuple[int, int]:
+        raise NotImplementedError
+
+    def move_to(self, x: int, y: int) -> None:
+        raise NotImplementedError
+
+    def mouse_down(self) -> None:
+        raise NotImplementedError
+
+    def mouse_up(self) -> None:
+        raise NotImplementedError
+
+    def click(self) -> None:
+        raise NotImplementedError
+
+    def double_click(self) -> None:
+        raise NotImplementedError
+
+    def scroll(self, amount: int) -> None:
+        raise NotImplementedError
+
+    def write(self, text: str) -> None:
+        raise NotImplementedError
+
+    def hotkey(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    def dispatch(self, events: Sequence[InputEvent]) -> None:
+        for ev in events:
+            op = ev[0]
+            if op == "move":
+                self.move_to(ev[1], ev[2])
+            elif op == "down":
+                self.mouse_down()
+            elif op == "up":
+                self.mouse_up()
+            elif op == "click":
+                self.click()
+            elif op == "double_click":
+                self.double_click()
+            elif op == "scroll":
+                self.scroll(ev[1])
+            elif op == "write":
+                self.write(ev[1])
+            elif op == "hotkey":
+                self.hotkey(*ev[1:])
+
+    def close(self) -> None:
+        pass
+
+
+class PyAutoGUIBackend(InputBackend):
+    """Portable default. Every call passes _pause=False so PyAutoGUI doesn't sleep
+    PAUSE seconds after each event."""
+
+    name = "pyautogui"
+
+    def __init__(self) -> None:
+        import pyautogui
+        pyautogui.FAILSAFE = True  # move mouse to top-left corner to stop PyAutoGUI
+        self.pg = pyautogui
+
+    def size(self) -> Tuple[int, int]:
+        w, h = self.pg.size()
+        return int(w), int(h)
+
+    def move_to(self, x: int, y: int) -> None:
+        self.pg.moveTo(x, y, _pause=False)
+
+    def mouse_down(self) -> None:
+        self.pg.mouseDown(_pause=False)
+
+    def mouse_up(self) -> None:
+        self.pg.mouseUp(_pause=False)
+
+    def click(self) -> None:
+        self.pg.click(_pause=False)
+
+    def double_click(self) -> None:
+        self.pg.doubleClick(_pause=False)
+
+    def scroll(self, amount: int) -> None:
+        self.pg.scroll(int(amount), _pause=False)
+
+    def write(self, text: str) -> None:
+        self.pg.write(text, interval=0.01, _pause=False)
+
+    def hotkey(self, *keys: str) -> None:
+        self.pg.hotkey(*keys, _pause=False)
+
+
+class PynputBackend(InputBackend):
+    """Lower per-call overhead than PyAutoGUI on X11/macOS (no failsafe checks,
+    no position re-query per call)."""
+
+    name = "pynput"
+
+    def __init__(self) -> None:
+        from pynput import keyboard, mouse
+        self.mouse = mouse.Controller()
+        self.keyboard = keyboard.Controller()
+        self.Key = keyboard.Key
+        self.left = mouse.Button.left
+        self._size = PyAutoGUIBackend().size()
+
+    def size(self) -> Tuple[int, int]:
+        return self._size
+
+    def move_to(self, x: int, y: int) -> None:
+        self.mouse.position = (x, y)
+
+    def mouse_down(self) -> None:
+        self.mouse.press(self.left)
+
+    def mouse_up(self) -> None:
+        self.mouse.release(self.left)
+
+    def click(self) -> None:
+        self.mouse.click(self.left, 1)
+
+    def double_click(self) -> None:
+        self.mouse.click(self.left, 2)
+
+    def scroll(self, amount: int) -> None:
+        # Same units as pyautogui.scroll on X11/macOS (wheel notches)
+        self.mouse.scroll(0, int(amount))
+
+    def write(self, text: str) -> None:
+        self.keyboard.type(text)
+
+    def hotkey(self, *keys: str) -> None:
+        # pyautogui key names; "command" is Key.cmd
+        codes = [getattr(self.Key, {"command": "cmd"}.get(k, k)) if len(k) > 1 else k for k in keys]
+        for code in codes:
+            self.keyboard.press(code)
+        for code in reversed(codes):
+            self.keyboard.release(code)
+
+
+class SendInputBackend(InputBackend):
+    """Windows: builds one INPUT array per batch and injects it with a single
+    user32.SendInput call."""
+
+    name = "sendinput"
+
+    MOUSEEVENTF_MOVE = 0x0001
+    MOUSEEVENTF_LEFTDOWN = 0x0002
+    MOUSEEVENTF_LEFTUP = 0x0004
+    MOUSEEVENTF_WHEEL = 0x0800
+    MOUSEEVENTF_ABSOLUTE = 0x8000
+    KEYEVENTF_KEYUP = 0x0002
+    KEYEVENTF_UNICODE = 0x0004
+    VK = {"ctrl": 0x11, "shift": 0x10, "alt": 0x12, "win": 0x5B}
+
+    def __init__(self) -> None:
+        import ctypes
+        from ctypes import wintypes
+
+        class MOUSEINPUT(ctypes.Structure):
+            _fields_ = [("dx", wintypes.LONG), ("dy", wintypes.LONG), ("mouseData", wintypes.DWORD),
+                        ("dwFlags", wintypes.DWORD), ("time", wintypes.DWORD),
+                        ("dwExtraInfo", ctypes.POINTER(wintypes.ULONG))]
+
+        class KEYBDINPUT(ctypes.Structure):
+            _fields_ = [("wVk", wintypes.WORD), ("wScan", wintypes.WORD), ("dwFlags", wintypes.DWORD),
+                        ("time", wintypes.DWORD), ("dwExtraInfo", ctypes.POINTER(wintypes.ULONG))]
+
+        class _U(ctypes.Union):
+            _fields_ = [("mi", MOUSEINPUT), ("ki", KEYBDINPUT), ("pad", ctypes.c_byte * 32)]
+
+        class INPUT(ctypes.Structure):
+            _fields_ = [("type", wintypes.DWORD), ("u", _U)]
+
+        self.ctypes = ctypes
+        self.INPUT = INPUT
+        self.user32 = ctypes.windll.user32
+        self.user32.SetProcessDPIAware()
+        self._size = (self.user32.GetSystemMetrics(0), self.user32.GetSystemMetrics(1))
+
+    def size(self) -> Tuple[int, int]:
+        return self._size
+
+    def _mouse(self, flags: int, dx: int = 0, dy: int = 0, data: int = 0):
+        inp = self.INPUT(type=0)
+        inp.u.mi.dx, inp.u.mi.dy, inp.u.mi.dwFlags = dx, dy, flags
+        inp.u.mi.mouseData = data & 0xFFFFFFFF
+        return inp
+
+    def _key(self, char: str, up: bool):
+        inp = self.INPUT(type=1)
+        inp.u.ki.wScan = ord(char)
+        inp.u.ki.dwFlags = self.KEYEVENTF_UNICODE | (self.KEYEVENTF_KEYUP if up else 0)
+        return inp
+
+    def _vk(self, key: str, up: bool):
+        inp = self.INPUT(type=1)
+        inp.u.ki.wVk = self.VK.get(key, ord(key.upper()))
+        inp.u.ki.dwFlags = self.KEYEVENTF_KEYUP if up else 0
+        return inp
+
+    def _inputs(self, ev: InputEvent) -> list:
+        op = ev[0]
+        if op == "move":
+            w, h = self._size
+            dx = int(ev[1] * 65535 / max(w - 1, 1))
+            dy = int(ev[2] * 65535 / max(h - 1, 1))
+            return [self._mouse(self.MOUSEEVENTF_MOVE | self.MOUSEEVENTF_ABSOLUTE, dx, dy)]
+        if op == "down":
+            return [self._mouse(self.MOUSEEVENTF_LEFTDOWN)]
+        if op == "up":
+            return [self._mouse(self.MOUSEEVENTF_LEFTUP)]
+        if op == "click":
+            return [self._mouse(self.MOUSEEVENTF_LEFTDOWN), self._mouse(self.MOUSEEVENTF_LEFTUP)]
+        if op == "double_click":
+            return self._inputs(("click",)) * 2
+        if op == "scroll":
+            return [self._mouse(self.MOUSEEVENTF_WHEEL, data=int(ev[1]))]
+        if op == "write":
+            return [self._key(c, up) for c in ev[1] for up in (False, True)]
+        if op == "hotkey":
+            keys = ev[1:]
+            return [self._vk(k, False) for k in keys] + [self._vk(k, True) for k in reversed(keys)]
+        return []
+
+    def dispatch(self, events: Sequence[InputEvent]) -> None:
+        inputs: list = []
+        for ev in events:
+            inputs.extend(self._inputs(ev))
+        if inputs:
+            arr = (self.INPUT * len(inputs))(*inputs)
+            self.user32.SendInput(len(inputs), arr, self.ctypes.sizeof(self.INPUT))
+
+    def move_to(self, x: int, y: int) -> None:
+        self.dispatch([("move", x, y)])
+
+    def mouse_down(self) -> None:
+        self.dispatch([("down",)])
+
+    def mouse_up(self) -> None:
+        self.dispatch([("up",)])
+
+    def click(self) -> None:
+        self.dispatch([("click",)])
+
+    def double_click(self) -> None:
+        self.dispatch([("double_click",)])
+
+    def scroll(self, amount: int) -> None:
+        self.dispatch([("scroll", amount)])
+
+    def write(self, text: str) -> None:
+        self.dispatch([("write", text)])
+
+    def hotkey(self, *keys: str) -> None:
+        self.dispatch([("hotkey", *keys)])
+
+
+class RecordingBackend(InputBackend):
+    """Injects nothing; keeps a timestamped trace of every event. Used for headless
+    runs, benchmarks and tests."""
+
+    name = "null"
+    clipboard = False  # never touch the real clipboard from a headless run
+
+    def __init__(self, screen: Tuple[int, int] = (1920, 1080)) -> None:
+        self._size = screen
+        self.events: List[Tuple[float, str, tuple]] = []
+        self.batches = 0
+
+    def size(self) -> Tuple[int, int]:
+        return self._size
+
+    def dispatch(self, events: Sequence[InputEvent]) -> None:
+        now = time.perf_counter()
+        self.batches += 1
+        for ev in events:
+            self.events.append((now, ev[0], tuple(ev[1:])))
+
+    def move_to(self, x: int, y: int) -> None:
+        self.dispatch([("move", x, y)])
+
+    def mouse_down(self) -> None:
+        self.dispatch([("down",)])
+
+    def mouse_up(self) -> None:
+        self.dispatch([("up",)])
+
+    def click(self) -> None:
+        self.dispatch([("click",)])
+
+    def double_click(self) -> None:
+        self.dispatch([("double_click",)])
+
+    def scroll(self, amount: int) -> None:
+        self.dispatch([("scroll", amount)])
+
+    def write(self, text: str) -> None:
+        self.dispatch([("write", text)])
+
+    def hotkey(self, *keys: str) -> None:
+        self.dispatch([("hotkey", *keys)])
+
+    def dump(self, path: str) -> None:
+        """Write the trace as JSON lines: {"t": ..., "op": ..., "args": [...]}"""
+        with open(path, "w") as f:
+            for t, op, args in self.events:
+                f.write(json.dumps({"t": t, "op": op, "args": list(args)}) + "\n")
+
+
+BACKENDS = ("pyautogui", "direct", "null")
+
+
+def create_backend(name: str = "pyautogui") -> InputBackend:
+    """'direct' picks SendInput on Windows, pynput elsewhere, and falls back to PyAutoGUI."""
+    if name == "null":
+        return RecordingBackend()
+    if name == "direct":
+        try:
+            return SendInputBackend() if sys.platform == "win32" else PynputBackend()
+        except Exception as e:
+            print(f"[Input] Direct backend unavailable ({e}), using pyautogui")
+    return PyAutoGUIBackend()
@@ -0,0 +1,110 @@
+# latency.py
+from __future__ import annotations
+import json
+import math
+import threading
+from typing import Dict, Optional
+
+from actions import Action
+
+class LatencyHistogram:
+    """Fixed log-spaced histogram (10 us .. 100 s, ~5% bucket width)."""
+
+    MIN_S = 1e-5
+    GROWTH = 1.05
+
+    def __init__(self) -> None:
+        self.n_buckets = int(math.log(1e2 / self.MIN_S, self.GROWTH)) + 2
+        self.buckets = [0] * self.n_buckets
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        seconds = max(seconds, 0.0)
+        if seconds <= self.MIN_S:
+            idx = 0
+        else:
+            idx = min(int(math.log(seconds / self.MIN_S, self.GROWTH)) + 1, self.n_buckets - 1)
+        self.buckets[idx] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, p: float) -> float:
+        """Upper edge of the bucket holding the p-th percentile, in seconds."""
+        if self.count == 0:
+            return 0.0
+        rank = math.ceil(p / 100.0 * self.count)
+        seen = 0
+        for idx, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(self.MIN_S * self.GROWTH ** idx, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        """Count plus mean/p50/p95/p99/max in milliseconds."""
+        return {
+            "count": self.count,
+            "mean_ms": 1000.0 * self.total / self.count if self.count else 0.0,
+            "p50_ms": 1000.0 * self.percentile(50),
+            "p95_ms": 1000.0 * self.percentile(95),
+            "p99_ms": 1000.0 * self.percentile(99),
+            "max_ms": 1000.0 * self.max,
+        }
+
+class LatencyRecorder:
+    """Per-action timing from source frame capture to OS input event.
+
+    queue_wait: enqueue on the ActionBus -> picked up by the executor
+    execution:  executor handling time
+    total:      source frame capture -> executor done (per action type as well)
+    All timestamps are time.perf_counter() values.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.queue_wait = LatencyHistogram()
+        self.execution = LatencyHistogram()
+        self.total = LatencyHistogram()
+        self.by_type: Dict[str, LatencyHistogram] = {}
+
+    def record(self, action: Action, t_dequeue: float, t_done: float) -> None:
+        with self._lock:
+            if action.t_enqueue is not None:
+                self.queue_wait.record(t_dequeue - action.t_enqueue)
+            self.execution.record(t_done - t_dequeue)
+            if action.t_capture is not None:
+                total = t_done - action.t_capture
+                self.total.record(total)
+                self.by_type.setdefault(action.type, LatencyHistogram()).record(total)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            snap = {
+                "queue_wait": self.queue_wait.summary(),
+                "execution": self.execution.summary(),
+                "total": self.total.summary(),
+            }
+            snap["total_by_type"] = {t: h.summary() for t, h in sorted(self.by_type.items())}
+            return snap
+
+    def p50_total(self) -> Optional[float]:
+        """Median capture-to-input latency in seconds, or None before any samples."""
+        with self._lock:
+            return self.total.percentile(50) if self.total.count else None
+
+    def report(self) -> str:
+        snap = self.snapshot()
+        lines = [f"{'stage':<22}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        rows = [(k, snap[k]) for k in ("queue_wait", "execution", "total")]
+        rows += [(f"total[{t}]", s) for t, s in snap["total_by_type"].items()]
+        for name, s in rows:
+            lines.append(f"{name:<22}{s['count']:>8}{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}"
+                         f"{s['p99_ms']:>10.2f}{s['max_ms']:>10.2f}")
+        return "\n".join(lines)
+
+    def export(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
@@ -1,93 +1,108 @@
 # main.py
 from __future__ import annotations
-import threading
-import time
-import webbrowser
-
-import pyautogui
-
-from actions import ActionBus, Action
-from gesture_controller import GestureController
-from voice_assistant import VoiceAssistant
-
-pyautogui.FAILSAFE = True  # move mouse to top-left corner to stop PyAutoGUI
-
-def executor_loop(bus: ActionBus, gesture: GestureController, voice: VoiceAssistant | None) -> None:
-    screen_w, screen_h = pyautogui.size()
-    mouse_is_down = False
-
-    while True:
-        action = bus.get()
-        if action.type == "QUIT":
-            break
-
-        if action.type == "SAY" and action.text:
-            if voice is not None:
-                voice.say(action.text)
-
-        elif action.type == "TOGGLE_GESTURES" and action.enabled is not None:
-            gesture.set_enabled(action.enabled)
-
-        elif action.type == "OPEN_URL" and action.url:
-            webbrowser.open(action.url)
-
-        elif action.type == "MOUSE_MOVE":
-            # action.x/action.y are 0..10000 normalized ints
-            if action.x is None or action.y is None:
-                continue
-            nx = max(0, min(10000, action.x)) / 10000.0
-            ny = max(0, min(10000, action.y)) / 10000.0
-            pyautogui.moveTo(int(nx * screen_w), int(ny * screen_h), _pause=False)
-
-        elif action.type == "MOUSE_DOWN":
-            if not mouse_is_down:
-                pyautogui.mouseDown()
-                mouse_is_down = True
-
-        elif action.type == "MOUSE_UP":
-            if mouse_is_down:
-                pyautogui.mouseUp()
-                mouse_is_down = False
-
-        elif action.type == "CLICK":
-            pyautogui.click()
-
-        elif action.type == "DOUBLE_CLICK":
-            pyautogui.doubleClick()
-
-        elif action.type == "SCROLL" and action.amount is not None:
-            pyautogui.scroll(int(action.amount))
-
-        elif action.type == "TYPE_TEXT" and action.text:
-            pyautogui.write(action.text, interval=0.01)
-
-        time.sleep(0.001)
+import argparse
+import asyncio
+import signal
+
+from actions import ActionBus
+from config import ACTION_CONFIG, VOICE_COMMANDS, VOICE_CONFIG
+from executor import ActionExecutor
+from gesture_controller import GestureConfig, GestureController, open_camera
+from input_backends import BACKENDS, RecordingBackend, create_backend
+from latency import LatencyRecorder
+from runtime import Runtime
+from startup import Startup, warm_up
+from tts_service import TTSService
+
+# Loaders run on startup threads; the heavy imports (MediaPipe, Vosk) happen there too
+
+def load_gesture(bus: ActionBus, latency: LatencyRecorder) -> GestureController:
+    gesture = GestureController(bus, latency=latency)
+    warm_up(gesture.hands)
+    return gesture
+
+def load_voice(bus: ActionBus):
+    from voice_assistant import VoiceAssistant
+    return VoiceAssistant(bus)
 
 def main() -> None:
-    bus = ActionBus()
-    gesture = GestureController(bus)
-    
-    # Voice assistant is optional - gesture control will work without it
+    parser = argparse.ArgumentParser(description="Gesture + voice laptop controller")
+    parser.add_argument("--latency-json", type=str, default=None,
+                        help="Write frame-to-input latency histograms here (at exit and on SIGUSR1)")
+    parser.add_argument("--backend", type=str, default=ACTION_CONFIG["input_backend"], choices=BACKENDS,
+                        help="Input injection backend ('null' records a trace instead of moving the mouse)")
+    parser.add_argument("--trace", type=str, default=None, help="Write the null backend's event trace here")
+    args = parser.parse_args()
+
+    bus = ActionBus(capacity=ACTION_CONFIG["queue_capacity"], batch_size=ACTION_CONFIG["batch_size"],
+                    action_timeout=ACTION_CONFIG["action_timeout"])
+    latency = LatencyRecorder()
+
+    # Input backend, camera, MediaPipe and the Vosk model load side by side.
+    # Gesture control starts as soon as the first three are ready; the voice
+    # assistant is optional and joins whenever its model has loaded
+    startup = Startup()
+    startup.submit("input", create_backend, args.backend)
+    camera = startup.submit("camera", open_camera, GestureConfig.cam_index)
+    startup.submit("gesture", load_gesture, bus, latency)
+    voice = startup.submit("voice", load_voice, bus)
+
+    def export_latency(*_) -> None:
+        if args.latency_json:
+            latency.export(args.latency_json)
+            print(f"[Main] Latency histograms written to {args.latency_json}")
+        else:
+            print(latency.report())
+
+    # On-demand export: `kill -USR1 <pid>` (POSIX only)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, export_latency)
+
+    # One speech thread for everything; command feedback is pre-synthesized while idle
+    tts = TTSService(rate=VOICE_CONFIG["tts_rate"], voice_id=VOICE_CONFIG["tts_voice_id"],
+                     capacity=VOICE_CONFIG["tts_queue_size"], cache_dir=VOICE_CONFIG["tts_cache_dir"],
+                     cached=[spec["feedback"] for spec in VOICE_COMMANDS.values() if spec.get("feedback")]
+                     + ["Voice assistant started.", "Sorry, I did not understand that command."])
+    tts.start()
+
+    backend = startup.result("input")
+    gesture = startup.result("gesture")
+    executor = ActionExecutor(backend, on_toggle=gesture.set_enabled, latency=latency,
+                              cursor_rate=ACTION_CONFIG["cursor_rate_hz"], cursor_ease=ACTION_CONFIG["cursor_ease"],
+                              paste_min_chars=ACTION_CONFIG["paste_min_chars"],
+                              paste_restore_delay=ACTION_CONFIG["paste_restore_delay"])
+    runtime = Runtime(bus, executor, gesture, voice, tts, camera)
+    # SAY goes to the TTS thread so speech never blocks input injection
+    executor.on_say = runtime.say
+    bus.start(executor)
+    print(f"[Main] Gesture control starting after {startup.elapsed():.2f} s")
+
+    # Runs until QUIT / Ctrl+C, then drains the bus and releases camera + microphone
     try:
-        voice = VoiceAssistant(bus)
-    except Exception as e:
-        print(f"[Main] Voice assistant initialization failed: {e}")
-        print("[Main] Continuing with gesture control only")
-        voice = None
-
-    t_exec = threading.Thread(target=executor_loop, args=(bus, gesture, voice), daemon=True)
-    t_gest = threading.Thread(target=gesture.run, daemon=True)
-    
-    t_exec.start()
-    t_gest.start()
-    
-    # Only start voice thread if voice assistant is available
-    if voice is not None:
-        t_voice = threading.Thread(target=voice.run, daemon=True)
-        t_voice.start()
-
-    # Keep main thread alive until executor stops
-    t_exec.join()
+        asyncio.run(runtime.run())
+    except KeyboardInterrupt:
+        bus.stop(drain=False, timeout=1.0)
+        executor.close()
+        tts.close()
+
+    print(f"[Main] Pipeline: {runtime.stats['frames']} frames processed, "
+          f"{runtime.stats['frames_dropped']} stale frames skipped, {runtime.stats['audio_dropped']} audio blocks dropped")
+    stats = bus.stats()
+    print(f"[Main] ActionBus: {stats['put']} queued, {stats['delivered']} delivered, "
+          f"{stats['merged']} merged, {stats['dropped']} dropped, {stats['timed_out']} timed out")
+    speech = tts.counters
+    print(f"[Main] TTS: {speech['spoken']} spoken ({speech['cached']} from cache), {speech['coalesced']} coalesced, "
+          f"{speech['superseded']} superseded, {speech['interrupted']} interrupted, {speech['dropped']} dropped")
+    print("[Main] Startup:")
+    print(startup.report())
+    print("[Main] Frame-to-input latency:")
+    print(latency.report())
+    if args.latency_json:
+        export_latency()
+    if isinstance(backend, RecordingBackend) and args.trace:
+        backend.dump(args.trace)
+        print(f"[Main] Input trace ({len(backend.events)} events, {backend.batches} batches) written to {args.trace}")
+    backend.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
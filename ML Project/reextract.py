@@ -0,0 +1,396 @@
+"""
+reextract.py - Rebuild landmark datasets from raw session recordings
+Re-derives features from the stored landmark track, or re-runs MediaPipe on the video
+(optionally across a pool of worker processes, resumable per chunk and per recording)
+"""
+
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from sample_writer import SampleWriter
+from session_recorder import HAS_HAND, HAS_WORLD, load_track, recording_paths
+
+FEATURE_SETS = ("xyz", "xy", "world")
+HANDS_OPTIONS = dict(static_image_mode=False, max_num_hands=1,
+                     min_detection_confidence=0.7, min_tracking_confidence=0.5)
+
+
+def dataset_header(features: str, layout: str) -> list:
+    """
+    Column names for a rebuilt dataset
+
+    Args:
+        features: 'xyz', 'xy' or 'world'
+        layout: 'ml' (landmark_i_x ... + gesture) or 'project1' (x0, y1, ... + label)
+    """
+    if layout == "project1":
+        if features != "xy":
+            raise ValueError("The Project1 layout only stores x/y features")
+        return [f"x{i}" if i % 2 == 0 else f"y{i}" for i in range(42)] + ["label", "session"]
+
+    axes = ("x", "y") if features == "xy" else ("x", "y", "z")
+    prefix = "world" if features == "world" else "landmark"
+    header = [f"{prefix}_{i}_{a}" for i in range(21) for a in axes]
+    return header + ["gesture", "session"]
+
+
+def track_features(points: np.ndarray, features: str) -> np.ndarray:
+    """Flatten (n, 21, 3) landmark points into the requested feature set"""
+    if features == "xy":
+        points = points[:, :, :2]
+    return points.reshape(len(points), points.shape[1] * points.shape[2]).astype(np.float64)
+
+
+def landmarks_from_video(base: str, flipped: bool = False, hands=None):
+    """
+    Re-run MediaPipe Hands over a recorded video
+
+    Yields:
+        (landmarks (21, 3) or None, world (21, 3) or None) per video frame
+    """
+    import cv2
+    import mediapipe as mp
+
+    own_hands = hands is None
+    if own_hands:
+        hands = mp.solutions.hands.Hands(**HANDS_OPTIONS)
+    cap = cv2.VideoCapture(recording_paths(base)["video"])
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if not flipped:
+                # Collectors flip to selfie view before running MediaPipe
+                frame = cv2.flip(frame, 1)
+            res = hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            lms = world = None
+            if res.multi_hand_landmarks:
+                lms = np.array([(p.x, p.y, p.z) for p in res.multi_hand_landmarks[0].landmark], dtype=np.float32)
+            if getattr(res, "multi_hand_world_landmarks", None):
+                world = np.array([(p.x, p.y, p.z) for p in res.multi_hand_world_landmarks[0].landmark],
+                                 dtype=np.float32)
+            yield lms, world
+    finally:
+        cap.release()
+        if own_hands:
+            hands.close()
+
+
+def keyframe_indices(video_path: str) -> list:
+    """
+    Frame indices of the video's keyframes
+
+    Reads the packet index from the container (nothing is decoded). Packets
+    come in decode order, so they are sorted by presentation time to number
+    frames the way cv2 reads them. Uses ffprobe when it is installed; returns
+    an empty list otherwise, in which case chunks fall back to fixed frame
+    counts (seeking then decodes forward from the previous keyframe, which is
+    slower but still correct).
+    """
+    cmd = ["ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries", "packet=pts_time,flags",
+           "-of", "csv=p=0", video_path]
+    try:
+        out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return []
+    packets = []
+    for line in out.splitlines():
+        fields = line.strip().split(",")
+        if len(fields) < 2:
+            continue
+        try:
+            packets.append((float(fields[0]), "K" in fields[-1]))
+        except ValueError:
+            # No timestamps to order frames by
+            return []
+    packets.sort()
+    return [i for i, (_, key) in enumerate(packets) if key]
+
+
+def plan_chunks(n_frames: int, chunk_frames: int, keyframes: list = ()) -> list:
+    """
+    Split [0, n_frames) into (start, end) chunks of about `chunk_frames` frames
+
+    When keyframes are known every chunk starts on one, so each worker can
+    seek straight to its first frame.
+    """
+    starts = [0]
+    candidates = [k for k in keyframes if 0 < k < n_frames] or range(chunk_frames, n_frames, chunk_frames)
+    for k in candidates:
+        if k - starts[-1] >= chunk_frames:
+            starts.append(k)
+    return [(s, e) for s, e in zip(starts, starts[1:] + [n_frames])]
+
+
+_worker_hands = None
+
+
+def _init_worker():
+    """Give each worker process its own Hands graph (reset for every chunk)"""
+    global _worker_hands
+    import mediapipe as mp
+    _worker_hands = mp.solutions.hands.Hands(**HANDS_OPTIONS)
+
+
+def _landmark_chunk(video_path: str, start: int, end: int, flipped: bool, out_path: str) -> tuple:
+    """Worker task: landmark frames [start, end) and save them to `out_path`"""
+    import cv2
+
+    n = end - start
+    lms = np.zeros((n, 21, 3), dtype=np.float32)
+    world = np.zeros((n, 21, 3), dtype=np.float32)
+    flags = np.zeros(n, dtype=np.uint8)
+    began = time.perf_counter()
+
+    # A worker gets chunks in any order; start each one from detection, as a
+    # sequential pass does, not from the previous chunk's tracking state
+    _worker_hands.reset()
+    cap = cv2.VideoCapture(video_path)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    for k in range(n):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if not flipped:
+            frame = cv2.flip(frame, 1)
+        res = _worker_hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        if res.multi_hand_landmarks:
+            lms[k] = [(p.x, p.y, p.z) for p in res.multi_hand_landmarks[0].landmark]
+            flags[k] |= HAS_HAND
+        if getattr(res, "multi_hand_world_landmarks", None):
+            world[k] = [(p.x, p.y, p.z) for p in res.multi_hand_world_landmarks[0].landmark]
+            flags[k] |= HAS_WORLD
+    cap.release()
+
+    # Write-then-rename so an interrupted job never leaves a half-written chunk behind
+    tmp_path = out_path + ".tmp.npz"
+    np.savez(tmp_path, landmarks=lms, world=world, flags=flags)
+    os.replace(tmp_path, out_path)
+    return start, n, time.perf_counter() - began
+
+
+def relandmark_video(base: str, n_frames: int, flipped: bool = False, world: bool = False,
+                     workers: int = 1, chunk_frames: int = 300) -> tuple:
+    """
+    Run MediaPipe Hands over a recorded video, optionally in a process pool
+
+    Chunk results are kept in `<base>.relandmark/`, so rerunning an
+    interrupted job only processes the missing chunks. A chunk file is named
+    after its frame range and the extraction settings, so a different chunk
+    plan or Hands configuration never reuses it.
+
+    Returns:
+        (points (n_frames, 21, 3), present (n_frames,) bool) in frame order
+    """
+    if workers <= 1:
+        points = np.zeros((n_frames, 21, 3), dtype=np.float32)
+        present = np.zeros(n_frames, dtype=bool)
+        for k, (lms, wld) in enumerate(landmarks_from_video(base, flipped)):
+            if k >= n_frames:
+                break
+            pts = wld if world else lms
+            if pts is not None:
+                points[k] = pts
+                present[k] = True
+        return points, present
+
+    video_path = recording_paths(base)["video"]
+    work_dir = base + ".relandmark"
+    os.makedirs(work_dir, exist_ok=True)
+    chunks = plan_chunks(n_frames, chunk_frames, keyframe_indices(video_path))
+
+    settings = json.dumps({"flipped": bool(flipped), **HANDS_OPTIONS}, sort_keys=True)
+    tag = hashlib.sha1(settings.encode()).hexdigest()[:10]
+
+    def chunk_path(start, end):
+        return os.path.join(work_dir, f"chunk-{start:08d}-{end:08d}-{tag}.npz")
+
+    todo = [(s, e) for s, e in chunks if not os.path.exists(chunk_path(s, e))]
+    if len(todo) < len(chunks):
+        print(f"[Reextract] Resuming: {len(chunks) - len(todo)}/{len(chunks)} chunks already done")
+
+    began = time.perf_counter()
+    frames_done = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(_landmark_chunk, video_path, s, e, flipped, chunk_path(s, e)) for s, e in todo]
+        for done, future in enumerate(as_completed(futures), 1):
+            _, n, _ = future.result()
+            frames_done += n
+            elapsed = time.perf_counter() - began
+            print(f"[Reextract] {done}/{len(todo)} chunks, {frames_done} frames, "
+                  f"{frames_done / max(elapsed, 1e-9):.1f} frames/s", end="\r")
+    if todo:
+        print()
+
+    # Merge in frame order
+    points = np.zeros((n_frames, 21, 3), dtype=np.float32)
+    present = np.zeros(n_frames, dtype=bool)
+    flag = HAS_WORLD if world else HAS_HAND
+    for s, e in chunks:
+        with np.load(chunk_path(s, e)) as part:
+            points[s:e] = part["world" if world else "landmarks"][:e - s]
+            present[s:e] = (part["flags"][:e - s] & flag) != 0
+    return points, present
+
+
+def reextract(base: str, output: str, features: str = "xyz", layout: str = "ml",
+              source: str = "track", include_unlabeled: bool = False,
+              workers: int = 1, chunk_frames: int = 300) -> int:
+    """
+    Append one recording's samples to a dataset CSV
+
+    Args:
+        base: Recording path without extension
+        output: Dataset CSV (created or resumed)
+        features: 'xyz', 'xy' or 'world'
+        layout: 'ml' or 'project1'
+        source: 'track' uses the stored landmarks, 'video' re-runs MediaPipe
+        include_unlabeled: Also export frames recorded while no gesture was active
+        workers: Worker processes for source='video' (1 = run in this process)
+        chunk_frames: Target frames per worker task
+
+    Returns:
+        Number of rows written
+    """
+    records, meta = load_track(base)
+    labels = meta["labels"]
+    width = 42 if features == "xy" else 63
+    # Opened first so an output with other columns is refused before any landmarking
+    writer = SampleWriter(output, dataset_header(features, layout), width=width)
+    try:
+        if source == "track":
+            points = records["world"] if features == "world" else records["landmarks"]
+            flag = HAS_WORLD if features == "world" else HAS_HAND
+            present = (records["flags"] & flag) != 0
+        else:
+            # Video frame k and track record k were written together
+            points, present = relandmark_video(base, len(records), meta.get("flipped", False),
+                                               world=features == "world", workers=workers,
+                                               chunk_frames=chunk_frames)
+
+        keep = present & ((records["label"] >= 0) | include_unlabeled)
+        X = track_features(points[keep], features)
+        y = [labels[i] if i >= 0 else "unlabeled" for i in records["label"][keep]]
+
+        # Offline, so wait for the writer instead of dropping rows
+        for row_values, label in zip(X, y):
+            row = writer.acquire(block=True)
+            row[:] = row_values
+            writer.put(row, label, meta["name"], block=True)
+    finally:
+        writer.close()
+
+    print(f"[Reextract] {meta['name']}: {len(X)} samples ({source}, {features}) -> {output}")
+    return len(X)
+
+
+def find_recordings(paths) -> list:
+    """Expand directories and globs into recording base paths"""
+    bases = []
+    for path in paths:
+        if os.path.isdir(path):
+            path = os.path.join(path, "*.lmk")
+        for track in sorted(glob.glob(path)):
+            bases.append(os.path.splitext(track)[0])
+    return bases
+
+
+def progress_path(output: str) -> str:
+    return output + ".progress.json"
+
+
+def load_progress(output: str, settings: dict) -> dict:
+    """
+    Resume state for `output`: recordings already written and the CSV size after the last one
+
+    Rows past that size belong to a recording that was interrupted, so they are
+    cut off before it is processed again.
+    """
+    path = progress_path(output)
+    size = os.path.getsize(output) if os.path.exists(output) else 0
+    if not os.path.exists(path):
+        return {"settings": settings, "size": size, "done": []}
+
+    with open(path) as f:
+        progress = json.load(f)
+    if progress["settings"] != settings:
+        raise ValueError(f"{output} was started with {progress['settings']}; "
+                         f"use another --output or delete {path}")
+    if size > progress["size"]:
+        print(f"[Reextract] Dropping {size - progress['size']} bytes from an interrupted recording")
+        with open(output, "rb+") as f:
+            f.truncate(progress["size"])
+    return progress
+
+
+def save_progress(output: str, progress: dict) -> None:
+    """Record the CSV size as the resume point; write-then-rename so the file is never half written"""
+    progress["size"] = os.path.getsize(output) if os.path.exists(output) else 0
+    path = progress_path(output)
+    with open(path + ".tmp", "w") as f:
+        json.dump(progress, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rebuild landmark datasets from session recordings")
+    parser.add_argument("recordings", nargs="+", help="Recording directories, .lmk files or globs")
+    parser.add_argument("--output", type=str, default="gesture_data.csv", help="Output dataset CSV")
+    parser.add_argument("--features", type=str, default="xyz", choices=FEATURE_SETS)
+    parser.add_argument("--layout", type=str, default="ml", choices=["ml", "project1"])
+    parser.add_argument("--source", type=str, default="track", choices=["track", "video"],
+                        help="Use stored landmarks or re-run MediaPipe on the video")
+    parser.add_argument("--include-unlabeled", action="store_true", help="Export frames without a gesture label")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for --source video")
+    parser.add_argument("--chunk-frames", type=int, default=300, help="Target frames per worker task")
+
+    args = parser.parse_args()
+
+    bases = find_recordings(args.recordings)
+    if not bases:
+        print("[Reextract] No recordings found")
+        sys.exit(1)
+
+    settings = {"features": args.features, "layout": args.layout, "source": args.source,
+                "include_unlabeled": args.include_unlabeled}
+    try:
+        progress = load_progress(args.output, settings)
+    except ValueError as e:
+        print(f"[Reextract] {e}")
+        sys.exit(1)
+    # Store the starting size before any rows go in, so a run interrupted
+    # inside its first recording is also cut back on resume
+    save_progress(args.output, progress)
+
+    total = 0
+    for base in bases:
+        key = os.path.abspath(base)
+        if key in progress["done"]:
+            print(f"[Reextract] {os.path.basename(base)}: already in {args.output}, skipping")
+            continue
+        try:
+            total += reextract(base, args.output, features=args.features, layout=args.layout,
+                               source=args.source, include_unlabeled=args.include_unlabeled,
+                               workers=args.workers, chunk_frames=args.chunk_frames)
+        except ValueError as e:
+            print(f"[Reextract] {e}")
+            sys.exit(1)
+        progress["done"].append(key)
+        save_progress(args.output, progress)
+    print(f"[Reextract] Done: {total} samples from {len(bases)} recording(s)")
+
+
+if __name__ == "__main__":
+    main()
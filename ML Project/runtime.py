@@ -0,0 +1,161 @@
+# runtime.py
+from __future__ import annotations
+import asyncio
+import signal
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Optional, Union
+
+import cv2
+
+from actions import ActionBus
+from executor import ActionExecutor
+from tts_service import TTSService
+
+if TYPE_CHECKING:  # imported by the startup loaders, off the main thread
+    from gesture_controller import GestureController
+    from voice_assistant import VoiceAssistant
+
+FRAME_QUEUE_SIZE = 1      # inference always gets the newest frame
+SHUTDOWN_TIMEOUT = 3.0
+
+def _offer(q: asyncio.Queue, item, stats: dict, key: str) -> None:
+    """put_nowait that drops the oldest item when the queue is full."""
+    if q.full():
+        q.get_nowait()
+        q.task_done()
+        stats[key] += 1
+    q.put_nowait(item)
+
+class Runtime:
+    """asyncio orchestrator for the gesture + voice pipeline.
+
+    Stages are tasks connected by bounded asyncio queues:
+      capture -> frames -> inference -> ActionBus -> executor (bus worker)
+      microphone -> VAD -> audio ring -> recognizer -> ActionBus
+      executor SAY -> TTSService (its own thread and queue)
+    Blocking calls (camera read, MediaPipe + HighGUI, Vosk) run on dedicated
+    single-thread executors, so every stage waits instead of polling.
+    `voice` and `camera` may be Futures that are still loading: gesture
+    control starts once the camera is open and the microphone is opened
+    whenever the voice assistant is ready.
+    Shutdown starts on QUIT, SIGINT/SIGTERM or a camera failure: producers are
+    cancelled, the bus is drained (a pending MOUSE_UP is always delivered),
+    queued speech is given a moment to finish, then camera and mic are released.
+    """
+
+    def __init__(self, bus: ActionBus, executor: ActionExecutor, gesture: GestureController,
+                 voice: Union[VoiceAssistant, Future, None] = None, tts: Optional[TTSService] = None,
+                 camera: Optional[Future] = None) -> None:
+        self.bus = bus
+        self.executor = executor
+        self.gesture = gesture
+        self.voice: Optional[VoiceAssistant] = None
+        self._voice_source = voice
+        self._stream = None
+        self.tts = tts
+        self._camera = camera
+        self.stats = {"frames": 0, "frames_dropped": 0, "audio_dropped": 0}
+
+        self._camera_pool = ThreadPoolExecutor(1, thread_name_prefix="camera")
+        self._vision_pool = ThreadPoolExecutor(1, thread_name_prefix="vision")
+        self._voice_pool = ThreadPoolExecutor(1, thread_name_prefix="vosk")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+
+    def say(self, text: str) -> None:
+        """Executor on_say hook: queue speech without blocking the bus."""
+        if self.tts is None or not self.tts.available:
+            print(f"[Runtime] {text}")
+        else:
+            self.tts.say(text)
+
+    def stop(self) -> None:
+        if self._stop is not None:
+            self._stop.set()
+
+    async def run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        frames: asyncio.Queue = asyncio.Queue(FRAME_QUEUE_SIZE)
+
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                self._loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows: Ctrl+C surfaces as KeyboardInterrupt instead
+
+        if self._camera is not None:
+            cap = await asyncio.wrap_future(self._camera)
+        else:
+            cap = await self._loop.run_in_executor(self._camera_pool, self.gesture.open_camera)
+        producers = [asyncio.create_task(self._capture(cap, frames)),
+                     asyncio.create_task(self._inference(frames))]
+        # Not a producer: a voice assistant that fails to load does not stop the app
+        listener = asyncio.create_task(self._listen())
+        quit_seen = asyncio.create_task(asyncio.to_thread(self.bus.join))
+
+        stop_wait = asyncio.create_task(self._stop.wait())
+        await asyncio.wait([stop_wait, quit_seen, *producers], return_when=asyncio.FIRST_COMPLETED)
+        stop_wait.cancel()
+        print("[Runtime] Shutting down")
+
+        # 1. Stop producing: cancel capture/recognition, close the microphone
+        for task in (*producers, listener):
+            task.cancel()
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self.voice.stop_listening()
+            self.stats["audio_dropped"] = self.voice.ring.counters["overflows"]
+        await asyncio.gather(*producers, listener, return_exceptions=True)
+
+        # 2. Drain the bus (MOUSE_UP etc.) and release a held button
+        await asyncio.to_thread(self.bus.stop, True, SHUTDOWN_TIMEOUT)
+        await quit_seen
+        self.executor.close()
+
+        # 3. Let queued speech finish, bounded
+        if self.tts is not None:
+            await asyncio.to_thread(self.tts.wait, SHUTDOWN_TIMEOUT)
+            self.tts.close()
+
+        # 4. Release the camera and the window on the threads that own them
+        await self._loop.run_in_executor(self._camera_pool, cap.release)
+        await self._loop.run_in_executor(self._vision_pool, cv2.destroyAllWindows)
+        for pool in (self._camera_pool, self._vision_pool, self._voice_pool):
+            pool.shutdown(wait=False)
+
+    async def _capture(self, cap, frames: asyncio.Queue) -> None:
+        while True:
+            ok, frame = await self._loop.run_in_executor(self._camera_pool, cap.read)
+            if not ok:
+                print("[Runtime] Camera read failed")
+                return
+            _offer(frames, (time.perf_counter(), frame), self.stats, "frames_dropped")
+
+    async def _inference(self, frames: asyncio.Queue) -> None:
+        while True:
+            t_capture, frame = await frames.get()
+            self.stats["frames"] += 1
+            if not await self._loop.run_in_executor(self._vision_pool, self.gesture.step, frame, t_capture):
+                return
+
+    async def _listen(self) -> None:
+        voice = self._voice_source
+        if isinstance(voice, Future):
+            try:
+                voice = await asyncio.wrap_future(voice)
+            except Exception as e:
+                print(f"[Runtime] Voice assistant initialization failed: {e}")
+                print("[Runtime] Continuing with gesture control only")
+                return
+        if voice is None or not voice.available:
+            return
+        self.voice = voice
+        self._stream = voice.open_stream()
+        self._stream.start()
+        voice._emit("SAY", text="Voice assistant started.")
+        # The PortAudio callback fills the voice ring directly; the recognizer
+        # thread blocks on it until stop_listening()
+        await self._loop.run_in_executor(self._voice_pool, voice.listen)
@@ -0,0 +1,200 @@
+"""
+sample_writer.py - Buffered background CSV writer for gesture data collection
+Shared by the ML Project and Project1 collectors so the webcam loop never does file I/O
+"""
+
+import csv
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+_CHECKPOINT = object()
+
+
+class SampleWriter:
+    """
+    Append landmark rows to a CSV from a background thread
+
+    The frame loop takes a preallocated row buffer with `acquire()`, fills it
+    and hands it back with `put()`. The writer thread batches rows and flushes
+    when `batch_size` rows are pending or `flush_interval` seconds have passed,
+    and fsyncs every `checkpoint_every` flushes (or on `checkpoint()`), so at
+    most one batch is lost if the process dies.
+
+    Opening an existing file resumes it: a partially written last line left by
+    a crash is truncated and the rows already on disk are counted per label.
+    A file whose columns differ from `header` raises ValueError instead of
+    having rows of another shape appended to it.
+    """
+
+    def __init__(self, path: str, header: Sequence[str], width: int,
+                 max_queue: int = 256, batch_size: int = 64,
+                 flush_interval: float = 1.0, checkpoint_every: int = 10):
+        """
+        Initialize writer and start its thread
+
+        Args:
+            path: Output CSV path
+            header: Column names used when the file is created (and checked when resumed)
+            width: Number of float features per row
+            max_queue: Bounded queue size (also the number of preallocated rows)
+            batch_size: Rows per flush
+            flush_interval: Max seconds a row waits before being flushed
+            checkpoint_every: fsync after this many flushes
+        """
+        self.path = path
+        self.width = width
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.checkpoint_every = checkpoint_every
+
+        # Counters
+        self.counts: Counter = Counter()
+        self.rows_written = 0
+        self.dropped = 0
+
+        self.header = self._resume(list(header))
+        self.write_session = "session" in self.header
+
+        # Preallocated rows; a row goes back to the pool once written
+        self._pool: "queue.Queue[np.ndarray]" = queue.Queue()
+        for _ in range(max_queue + batch_size):
+            self._pool.put(np.zeros(width, dtype=np.float64))
+        self._q: "queue.Queue" = queue.Queue(maxsize=max_queue)
+
+        self._file = open(self.path, "a", newline="")
+        self._writer = csv.writer(self._file)
+        self._checkpoint_done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="SampleWriter", daemon=True)
+        self._thread.start()
+
+    def _resume(self, header: List[str]) -> List[str]:
+        """Create the file or repair and count an existing one; returns the header in use"""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            with open(self.path, "w", newline="") as f:
+                csv.writer(f).writerow(header)
+            return header
+
+        # Files written before the session column existed are resumed without it
+        with open(self.path, newline="") as f:
+            existing = next(csv.reader(f), header)
+        if [c for c in existing if c != "session"] != [c for c in header if c != "session"]:
+            raise ValueError(f"{self.path} has {len(existing)} columns ({existing[0]} ... {existing[-1]}), "
+                             f"expected {len(header)} ({header[0]} ... {header[-1]})")
+
+        # Drop a torn last line left by a crash mid-write
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            end = data.rfind(b"\n") + 1
+            if end < len(data):
+                f.truncate(end)
+                print(f"[SampleWriter] Truncated partial row at end of {self.path}")
+
+        with open(self.path, newline="") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            label_idx = existing.index("label") if "label" in existing else existing.index("gesture")
+            for row in reader:
+                if len(row) > label_idx:
+                    self.counts[row[label_idx]] += 1
+
+        print(f"[SampleWriter] Resuming {self.path} ({sum(self.counts.values())} rows on disk)")
+        return existing
+
+    def acquire(self, block: bool = False) -> Optional[np.ndarray]:
+        """Get a free preallocated row, or None if the writer is saturated"""
+        try:
+            return self._pool.get(block=block)
+        except queue.Empty:
+            self.dropped += 1
+            return None
+
+    def release(self, row: np.ndarray) -> None:
+        """Return an acquired row that will not be written"""
+        self._pool.put(row)
+
+    def put(self, row: np.ndarray, label: str, session: Optional[str] = None, block: bool = False) -> bool:
+        """Enqueue a filled row (non-blocking by default); returns False if it was dropped"""
+        try:
+            self._q.put((row, label, session), block=block)
+        except queue.Full:
+            self._pool.put(row)
+            self.dropped += 1
+            return False
+        self.counts[label] += 1
+        return True
+
+    def checkpoint(self, wait: bool = False, timeout: float = 5.0) -> None:
+        """Flush pending rows and fsync the file (optionally waiting for it)"""
+        self._checkpoint_done.clear()
+        self._q.put(_CHECKPOINT)
+        if wait:
+            self._checkpoint_done.wait(timeout)
+
+    def close(self) -> None:
+        """Flush everything, fsync and stop the writer thread"""
+        if self._thread.is_alive():
+            self._q.put(None)
+            self._thread.join()
+        self._file.close()
+
+    def _flush(self, batch: list, sync: bool) -> None:
+        rows = []
+        for row, label, session in batch:
+            values = row.tolist()
+            values.append(label)
+            if self.write_session:
+                values.append(session or "")
+            rows.append(values)
+            self._pool.put(row)
+        self._writer.writerows(rows)
+        self._file.flush()
+        if sync:
+            os.fsync(self._file.fileno())
+        self.rows_written += len(rows)
+
+    def _run(self) -> None:
+        batch = []
+        flushes = 0
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._q.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = ()
+
+            if item is None:
+                self._flush(batch, sync=True)
+                return
+
+            checkpoint = item is _CHECKPOINT
+            if item and not checkpoint:
+                batch.append(item)
+
+            due = len(batch) >= self.batch_size or time.monotonic() - last_flush >= self.flush_interval
+            if checkpoint or (batch and due):
+                flushes += 1
+                self._flush(batch, sync=checkpoint or flushes % self.checkpoint_every == 0)
+                batch = []
+                last_flush = time.monotonic()
+            if checkpoint:
+                self._checkpoint_done.set()
+
+
+def fill_landmarks(row: np.ndarray, landmarks, dims: int = 3) -> np.ndarray:
+    """Copy MediaPipe landmarks into a preallocated row (x, y[, z] per point)"""
+    if dims == 3:
+        for i, lm in enumerate(landmarks):
+            row[3 * i] = lm.x
+            row[3 * i + 1] = lm.y
+            row[3 * i + 2] = lm.z
+    else:
+        for i, lm in enumerate(landmarks):
+            row[2 * i] = lm.x
+            row[2 * i + 1] = lm.y
+    return row
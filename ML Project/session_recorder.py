@@ -0,0 +1,190 @@
+"""
+session_recorder.py - Raw session recording for later re-labeling
+Writes a compressed video plus a timestamped binary landmark track from a background thread
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+TRACK_MAGIC = b"LMK1"
+NUM_LANDMARKS = 21
+
+# One record per captured frame
+TRACK_DTYPE = np.dtype([
+    ("frame", "<u4"),                               # Frame index in the video
+    ("timestamp", "<f8"),                           # Capture time (time.time())
+    ("label", "<i2"),                               # Index into meta["labels"], -1 = unlabeled
+    ("flags", "u1"),                                # bit0: hand landmarks, bit1: world landmarks
+    ("landmarks", "<f4", (NUM_LANDMARKS, 3)),       # Normalized image landmarks
+    ("world", "<f4", (NUM_LANDMARKS, 3)),           # Metric world landmarks
+])
+
+HAS_HAND = 1
+HAS_WORLD = 2
+
+
+def recording_paths(base: str) -> dict:
+    """Paths of the files that make up one recording"""
+    return {"video": base + ".mp4", "track": base + ".lmk", "meta": base + ".json"}
+
+
+def load_track(base: str):
+    """
+    Load a recording's landmark track and metadata
+
+    Returns:
+        (records, meta) - structured array with TRACK_DTYPE and the JSON metadata
+    """
+    paths = recording_paths(base)
+    with open(paths["meta"]) as f:
+        meta = json.load(f)
+    with open(paths["track"], "rb") as f:
+        if f.read(len(TRACK_MAGIC)) != TRACK_MAGIC:
+            raise ValueError(f"Not a landmark track: {paths['track']}")
+        raw = f.read()
+    # A crash can leave a torn last record; ignore it
+    usable = len(raw) - len(raw) % TRACK_DTYPE.itemsize
+    return np.frombuffer(raw[:usable], dtype=TRACK_DTYPE), meta
+
+
+class SessionRecorder:
+    """
+    Record raw webcam frames and MediaPipe landmarks for offline re-extraction
+
+    `record()` only copies references onto a bounded queue; encoding and file
+    writes happen on the recorder thread. If the queue is full the frame is
+    dropped (and counted) rather than stalling the capture loop.
+    """
+
+    def __init__(self, out_dir: str, fps: float = 30.0, codec: str = "mp4v",
+                 max_queue: int = 64, name: Optional[str] = None):
+        """
+        Initialize recorder and start its thread
+
+        Args:
+            out_dir: Directory for the recording files
+            fps: Nominal capture rate stored in the video container
+            codec: FourCC for cv2.VideoWriter
+            max_queue: Frames buffered before new ones are dropped
+            name: Recording name (defaults to a timestamp)
+        """
+        os.makedirs(out_dir, exist_ok=True)
+        self.name = name or time.strftime("session-%Y%m%d-%H%M%S")
+        self.base = os.path.join(out_dir, self.name)
+        self.paths = recording_paths(self.base)
+        self.fps = fps
+        self.codec = codec
+
+        self.labels: List[str] = []
+        self.frames_written = 0
+        self.dropped = 0
+
+        import mediapipe as mp
+        self.mediapipe_version = getattr(mp, "__version__", "unknown")
+        # Written up front and on every new label, so a crashed session can still be re-extracted
+        self._write_meta(complete=False)
+
+        self._video = None
+        self._track = open(self.paths["track"], "wb")
+        self._track.write(TRACK_MAGIC)
+        self._q: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="SessionRecorder", daemon=True)
+        self._thread.start()
+
+        print(f"[Recorder] Recording to {self.base}.*")
+
+    def _label_id(self, label: Optional[str]) -> int:
+        if label is None:
+            return -1
+        if label not in self.labels:
+            self.labels.append(label)
+            self._write_meta(complete=False)
+        return self.labels.index(label)
+
+    def record(self, frame: np.ndarray, frame_idx: int, timestamp: float,
+               hand_landmarks=None, world_landmarks=None, label: Optional[str] = None) -> bool:
+        """
+        Queue one raw (unannotated) frame and its landmarks
+
+        Args:
+            frame: BGR frame exactly as captured, before flipping or drawing
+            frame_idx: Capture frame counter
+            timestamp: Capture time
+            hand_landmarks: MediaPipe NormalizedLandmarkList or None
+            world_landmarks: MediaPipe LandmarkList or None
+            label: Gesture being collected at this frame, if any
+
+        Returns:
+            False if the frame was dropped
+        """
+        rec = np.zeros((), dtype=TRACK_DTYPE)
+        rec["frame"] = frame_idx
+        rec["timestamp"] = timestamp
+        rec["label"] = self._label_id(label)
+        flags = 0
+        if hand_landmarks is not None:
+            rec["landmarks"] = [(p.x, p.y, p.z) for p in hand_landmarks.landmark]
+            flags |= HAS_HAND
+        if world_landmarks is not None:
+            rec["world"] = [(p.x, p.y, p.z) for p in world_landmarks.landmark]
+            flags |= HAS_WORLD
+        rec["flags"] = flags
+
+        try:
+            self._q.put_nowait((frame, rec))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def close(self) -> None:
+        """Drain the queue, finalize the video and write metadata"""
+        if self._thread.is_alive():
+            self._q.put(None)
+            self._thread.join()
+        if self._video is not None:
+            self._video.release()
+        self._track.close()
+        self._write_meta(complete=True)
+
+        print(f"[Recorder] Saved {self.frames_written} frames ({self.dropped} dropped) to {self.base}.*")
+
+    def _write_meta(self, complete: bool) -> None:
+        """Write the metadata JSON; write-then-rename so readers never see a partial file"""
+        meta = {
+            "name": self.name,
+            "fps": self.fps,
+            "codec": self.codec,
+            "labels": self.labels,
+            "frames": self.frames_written,
+            "dropped": self.dropped,
+            "flipped": False,
+            "mediapipe_version": self.mediapipe_version,
+            "complete": complete,
+        }
+        tmp_path = self.paths["meta"] + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, self.paths["meta"])
+
+    def _run(self) -> None:
+        while True:
+            item = self._q.get()
+            if item is None:
+                self._track.flush()
+                return
+            frame, rec = item
+            if self._video is None:
+                h, w = frame.shape[:2]
+                fourcc = cv2.VideoWriter_fourcc(*self.codec)
+                self._video = cv2.VideoWriter(self.paths["video"], fourcc, self.fps, (w, h))
+            self._video.write(frame)
+            self._track.write(rec.tobytes())
+            self.frames_written += 1
@@ -193,10 +193,11 @@ def run_self_test():
         from gesture_controller import GestureController
         from actions import ActionBus
         
+        # No handlers registered: detected actions are consumed without touching the mouse
         action_bus = ActionBus()
         action_bus.start()
         
-        controller = GestureController(action_bus=action_bus)
+        controller = GestureController(action_bus)
         cap = cv2.VideoCapture(0)
         
         if not cap.isOpened():
@@ -225,6 +226,7 @@ def run_self_test():
         
         cap.release()
         cv2.destroyAllWindows()
+        action_bus.stop(drain=False)
         
         print(f"\n  ✓ Self-test complete ({fps_counter} frames processed)")
         return True
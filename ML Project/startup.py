@@ -0,0 +1,87 @@
+# startup.py
+from __future__ import annotations
+import pickle
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+@dataclass
+class Stage:
+    name: str
+    future: Future = field(default_factory=Future)
+    start: float = 0.0                # seconds after Startup was created
+    end: Optional[float] = None
+    error: Optional[BaseException] = None
+
+class Startup:
+    """Loads independent subsystems concurrently, one daemon thread each.
+
+    submit() starts a loader right away and returns a Future for its result,
+    so the caller can go on as soon as the parts it needs are ready (gesture
+    control does not wait for the Vosk model). Model loads and native library
+    imports spend most of their time outside the GIL, so they overlap well.
+    Each stage prints a line when it finishes; report() is the breakdown.
+    """
+
+    def __init__(self, verbose: bool = True) -> None:
+        self.t0 = time.perf_counter()
+        self.verbose = verbose
+        self.stages: Dict[str, Stage] = {}
+
+    def submit(self, name: str, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        stage = Stage(name, start=self.elapsed())
+        stage.future.set_running_or_notify_cancel()
+        self.stages[name] = stage
+        threading.Thread(target=self._load, args=(stage, fn, args, kwargs),
+                         name=f"startup-{name}", daemon=True).start()
+        return stage.future
+
+    def result(self, name: str, timeout: Optional[float] = None) -> Any:
+        """Block until a stage is loaded; re-raises its exception."""
+        return self.stages[name].future.result(timeout)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.t0
+
+    def _load(self, stage: Stage, fn: Callable[..., Any], args: Tuple, kwargs: Dict) -> None:
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            stage.end = self.elapsed()
+            stage.error = e
+            stage.future.set_exception(e)
+        else:
+            stage.end = self.elapsed()
+            stage.future.set_result(result)
+        if self.verbose:
+            status = "ready" if stage.error is None else f"failed ({stage.error})"
+            print(f"[Startup] {stage.name} {status} after {stage.end - stage.start:.2f} s")
+
+    def report(self) -> str:
+        now = self.elapsed()
+        lines = [f"{'stage':<10}{'start':>8}{'took':>8}  status"]
+        busy = 0.0
+        for s in self.stages.values():
+            took = (s.end if s.end is not None else now) - s.start
+            busy += took
+            status = "loading" if s.end is None else "ok" if s.error is None else f"failed: {s.error}"
+            lines.append(f"{s.name:<10}{s.start:>7.2f}s{took:>7.2f}s  {status}")
+        done = max((s.end if s.end is not None else now for s in self.stages.values()), default=0.0)
+        lines.append(f"{len(self.stages)} stages, {busy:.2f} s of loading done after {done:.2f} s")
+        return "\n".join(lines)
+
+def warm_up(solution, shape: Tuple[int, int, int] = (480, 640, 3)):
+    """Run a MediaPipe solution once on a black RGB frame, so its graph and
+    inference buffers are set up now rather than on the first camera frame.
+    Returns the solution."""
+    solution.process(np.zeros(shape, dtype=np.uint8))
+    return solution
+
+def load_pickle(path: Path) -> Any:
+    with open(path, "rb") as f:
+        return pickle.load(f)
@@ -0,0 +1,69 @@
+# test_dispatch.py
+from dispatch import Binding, DispatchTable, compile_voice_commands
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.t = 0.0
+
+    def __call__(self) -> float:
+        return self.t
+
+def _poll(table: DispatchTable, clock: FakeClock, name: str, hz: float, seconds: float) -> int:
+    fired = 0
+    for i in range(int(hz * seconds)):
+        clock.t = i / hz
+        fired += table.dispatch(name)
+    return fired
+
+def test_rate_limit_holds_when_polled_faster_than_rate():
+    clock = FakeClock()
+    table = DispatchTable(clock=clock)
+    table.bind("ping", lambda: None, rate=1.0)
+    # burst of 1 at t=0, then one per second
+    assert _poll(table, clock, "ping", hz=100, seconds=10) == 10
+    assert table.counters["throttled"] == 990
+
+def test_scroll_rate_at_camera_frame_rate():
+    clock = FakeClock()
+    table = DispatchTable(clock=clock)
+    table.bind("scroll", lambda: None, rate=10.0, burst=3)
+    fired = _poll(table, clock, "scroll", hz=30, seconds=10)
+    assert 100 <= fired <= 103
+
+def test_cooldown_uses_last_firing():
+    binding = Binding("click", lambda: None, cooldown=0.5)
+    assert binding.allow(0.0)
+    binding.last = 0.0
+    assert not binding.allow(0.4)
+    assert binding.allow(0.5)
+
+def test_failed_handler_starts_no_cooldown():
+    clock = FakeClock()
+    table = DispatchTable(cooldown=2.0, clock=clock)
+    calls = []
+
+    def flaky() -> None:
+        calls.append(clock.t)
+        if len(calls) == 1:
+            raise OSError("chrome not found")
+
+    table.bind("open", flaky)
+    try:
+        table.dispatch("open")
+    except OSError:
+        pass
+    clock.t = 0.1
+    assert table.dispatch("open")
+    clock.t = 1.0
+    assert not table.dispatch("open")
+    assert calls == [0.0, 0.1]
+    assert table.counters["failed"] == 1
+
+def test_voice_feedback_runs_before_handler():
+    events = []
+    commands = compile_voice_commands({"quit": lambda: events.append("QUIT"),
+                                       "type_text": lambda text: events.append(f"TYPE {text}")})
+    say = lambda binding: events.append(f"SAY {binding.feedback}")
+    commands.dispatch("quit", before=say)
+    commands.dispatch("type hello world", before=say)
+    assert events == ["SAY Goodbye", "QUIT", "SAY Ready to type", "TYPE hello world"]
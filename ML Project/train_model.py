@@ -16,20 +16,28 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 
+from dedup import SESSION_COLUMN, group_train_test_split, prune, session_groups
+
 
 class GestureModelTrainer:
     """Train gesture classification model"""
     
-    def __init__(self, data_csv: str = "gesture_data.csv", model_type: str = "rf"):
+    def __init__(self, data_csv: str = "gesture_data.csv", model_type: str = "rf",
+                 group_split: bool = False, dedup: str = None):
         """
         Initialize trainer
         
         Args:
             data_csv: Path to collected gesture data CSV
             model_type: Model type - 'rf' (RandomForest) or 'svm'
+            group_split: Split by recording session instead of by row
+            dedup: Optional near-duplicate pruning of the training split
+                   ('kdtree', 'grid' or 'coreset')
         """
         self.data_csv = data_csv
         self.model_type = model_type
+        self.group_split = group_split
+        self.dedup = dedup
         self.model = None
         self.label_encoder = LabelEncoder()
         self.feature_columns = None
@@ -62,8 +70,8 @@ class GestureModelTrainer:
         try:
             print("[Trainer] Preparing features...")
             
-            # Extract features (all columns except 'gesture')
-            self.feature_columns = [col for col in self.df.columns if col != 'gesture']
+            # Extract features (all columns except 'gesture' and 'session')
+            self.feature_columns = [col for col in self.df.columns if col not in ('gesture', SESSION_COLUMN)]
             X = self.df[self.feature_columns].values
             
             # Handle missing values
@@ -98,9 +106,26 @@ class GestureModelTrainer:
         
         # Split data
         print(f"[Trainer] Splitting data ({100*test_size:.0f}% test)...")
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=test_size, random_state=random_state, stratify=y
-        )
+        if self.group_split:
+            # Whole recording blocks go to one side so near-identical frames don't leak
+            groups = session_groups(self.df)
+            print(f"[Trainer] Splitting by recording session ({len(np.unique(groups))} groups)")
+            X_train, X_test, y_train, y_test = group_train_test_split(
+                X, y, groups, test_size=test_size, random_state=random_state
+            )
+        else:
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, y, test_size=test_size, random_state=random_state, stratify=y
+            )
+        
+        if self.dedup:
+            # Prune the training side only; the test set stays untouched
+            train_df = pd.DataFrame(X_train, columns=self.feature_columns)
+            train_df['gesture'] = y_train
+            train_df = prune(train_df, method=self.dedup, random_state=random_state)
+            print(f"[Trainer] Dedup ({self.dedup}): {len(X_train)} -> {len(train_df)} training samples")
+            X_train = train_df[self.feature_columns].values
+            y_train = train_df['gesture'].values
         
         print(f"[Trainer] Train size: {X_train.shape[0]}, Test size: {X_test.shape[0]}")
         
@@ -225,11 +250,15 @@ def main():
     parser.add_argument("--output", type=str, default="models/gesture_model.joblib", help="Output model path")
     parser.add_argument("--type", type=str, default="rf", choices=['rf', 'svm'], help="Model type (rf or svm)")
     parser.add_argument("--test-size", type=float, default=0.2, help="Test set size (0-1)")
+    parser.add_argument("--group-split", action="store_true", help="Split by recording session to avoid leakage")
+    parser.add_argument("--dedup", type=str, default=None, choices=['kdtree', 'grid', 'coreset'],
+                        help="Prune near-duplicate training samples")
     
     args = parser.parse_args()
     
     # Train
-    trainer = GestureModelTrainer(data_csv=args.data, model_type=args.type)
+    trainer = GestureModelTrainer(data_csv=args.data, model_type=args.type,
+                                  group_split=args.group_split, dedup=args.dedup)
     
     if trainer.train(test_size=args.test_size):
         trainer.save_model(model_path=args.output)
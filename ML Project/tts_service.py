@@ -0,0 +1,256 @@
+# tts_service.py
+from __future__ import annotations
+import hashlib
+import sys
+import threading
+import time
+import wave
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Utterance priorities: a higher one interrupts a lower one that is playing
+LOW, NORMAL, HIGH = 0, 1, 2
+
+@dataclass
+class Utterance:
+    text: str
+    priority: int = NORMAL
+    key: Optional[str] = None     # a newer utterance with the same key replaces a queued one
+    t: float = 0.0
+
+class _Player:
+    """Plays cached WAVs without blocking, so playback can be cut off."""
+
+    def __init__(self) -> None:
+        self.sd = None
+        self.winsound = None
+        try:
+            import sounddevice
+            self.sd = sounddevice
+        except Exception:
+            if sys.platform == "win32":
+                import winsound
+                self.winsound = winsound
+
+    @property
+    def available(self) -> bool:
+        return self.sd is not None or self.winsound is not None
+
+    def play(self, path: Path, samples: np.ndarray, rate: int, interrupt: threading.Event) -> bool:
+        """Blocks until done; returns False if interrupted."""
+        if self.sd is not None:
+            self.sd.play(samples, rate)
+            end = time.monotonic() + len(samples) / rate
+            while time.monotonic() < end:
+                if interrupt.wait(0.02):
+                    self.sd.stop()
+                    return False
+            self.sd.wait()
+            return True
+        self.winsound.PlaySound(str(path), self.winsound.SND_FILENAME | self.winsound.SND_ASYNC)
+        end = time.monotonic() + len(samples) / rate
+        while time.monotonic() < end:
+            if interrupt.wait(0.02):
+                self.winsound.PlaySound(None, self.winsound.SND_PURGE)
+                return False
+        return True
+
+class TTSService:
+    """The app's single speech thread.
+
+    say() never blocks: utterances go into a bounded queue, highest priority
+    first. A text that is already queued or playing is not queued again, a
+    newer utterance with the same `key` replaces the queued one (e.g. the
+    latest gesture name), and when the queue is full the oldest utterance of
+    the lowest priority is dropped. A higher-priority utterance interrupts
+    the one playing. Phrases in `cached` are synthesized to WAV files under
+    `cache_dir` while the thread is idle and then played directly, without
+    going through the speech engine.
+    """
+
+    def __init__(self, rate: int = 150, volume: float = 1.0, voice_id: Optional[int] = None,
+                 capacity: int = 8, cache_dir: Optional[str] = None, cached: Iterable[str] = ()) -> None:
+        self.rate = rate
+        self.volume = volume
+        self.voice_id = voice_id
+        self.capacity = capacity
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._to_cache: List[str] = list(dict.fromkeys(cached)) if self.cache_dir else []
+        self._wavs: Dict[str, Tuple[Path, np.ndarray, int]] = {}
+
+        self._queue: List[Utterance] = []
+        self._current: Optional[Utterance] = None
+        self._interrupt = threading.Event()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self.available = True
+        self.counters = {"queued": 0, "spoken": 0, "cached": 0, "coalesced": 0, "superseded": 0,
+                         "dropped": 0, "interrupted": 0}
+
+    # ------------------------------------------------------------------ API
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="tts", daemon=True)
+            self._thread.start()
+
+    def say(self, text: str, priority: int = NORMAL, key: Optional[str] = None) -> bool:
+        """Queue text; returns False if it was coalesced or dropped."""
+        text = text.strip()
+        if not text:
+            return False
+        with self._cond:
+            if self._closed or not self.available:
+                return False
+            cur = self._current
+            if (cur is not None and cur.text == text and not self._interrupt.is_set()) \
+                    or any(u.text == text for u in self._queue):
+                self.counters["coalesced"] += 1
+                return False
+            if key is not None:
+                before = len(self._queue)
+                self._queue = [u for u in self._queue if u.key != key]
+                self.counters["superseded"] += before - len(self._queue)
+            if len(self._queue) >= self.capacity:
+                victim = min(self._queue, key=lambda u: (u.priority, u.t))
+                if victim.priority > priority:
+                    self.counters["dropped"] += 1
+                    return False
+                self._queue.remove(victim)
+                self.counters["dropped"] += 1
+            self._queue.append(Utterance(text, priority, key, time.monotonic()))
+            self.counters["queued"] += 1
+            # Barge-in: cut off lower-priority speech, or speech this one supersedes
+            if cur is not None and (priority > cur.priority or (key is not None and key == cur.key)):
+                self._interrupt.set()
+            self._cond.notify()
+        return True
+
+    def interrupt(self) -> None:
+        """Cut off whatever is playing now."""
+        self._interrupt.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued has been spoken; False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and self._current is None, timeout)
+
+    def close(self, timeout: Optional[float] = 2.0) -> None:
+        """Drop queued speech, stop playback and end the thread."""
+        with self._cond:
+            self._closed = True
+            self._queue.clear()
+            self._interrupt.set()
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    # --------------------------------------------------------------- thread
+
+    def _run(self) -> None:
+        try:
+            import pyttsx3
+            engine = pyttsx3.init()
+            engine.setProperty("rate", self.rate)
+            engine.setProperty("volume", self.volume)
+            if self.voice_id is not None:
+                voices = engine.getProperty("voices")
+                if 0 <= self.voice_id < len(voices):
+                    engine.setProperty("voice", voices[self.voice_id].id)
+        except Exception as e:
+            print(f"[TTS] Speech engine unavailable ({e}), speech disabled")
+            with self._cond:
+                self.available = False
+                self._queue.clear()
+                self._cond.notify_all()
+            return
+
+        # Drive the engine's loop ourselves so speech can be stopped between iterations
+        try:
+            engine.startLoop(False)
+            external = True
+        except Exception:
+            external = False
+        player = _Player()
+        if not player.available:
+            with self._cond:
+                self._to_cache = []
+
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self._closed or self._to_cache)
+                if self._closed:
+                    break
+                if not self._queue:
+                    text = self._to_cache.pop(0)
+                    utt = None
+                else:
+                    utt = max(self._queue, key=lambda u: (u.priority, -u.t))
+                    self._queue.remove(utt)
+                    self._current = utt
+                    self._interrupt.clear()
+
+            if utt is None:
+                self._synthesize(engine, external, text)
+                continue
+            try:
+                finished = self._speak(engine, external, player, utt.text)
+                self.counters["spoken" if finished else "interrupted"] += 1
+            except Exception as e:
+                print(f"[TTS] Speak error: {e}")
+            finally:
+                with self._cond:
+                    self._current = None
+                    self._cond.notify_all()
+
+        if external:
+            try:
+                engine.endLoop()
+            except Exception:
+                pass
+
+    def _speak(self, engine, external: bool, player: _Player, text: str) -> bool:
+        wav = self._wavs.get(text)
+        if wav is not None:
+            self.counters["cached"] += 1
+            return player.play(*wav, self._interrupt)
+        engine.say(text)
+        return self._pump(engine, external)
+
+    def _pump(self, engine, external: bool) -> bool:
+        if not external:
+            engine.runAndWait()
+            return True
+        engine.iterate()
+        while engine.isBusy():
+            if self._interrupt.wait(0.01):
+                engine.stop()
+                return False
+            engine.iterate()
+        return True
+
+    def _wav_path(self, text: str) -> Path:
+        tag = f"{self.rate}:{self.volume}:{self.voice_id}:{text}".encode()
+        return self.cache_dir / f"{hashlib.sha1(tag).hexdigest()[:16]}.wav"
+
+    def _synthesize(self, engine, external: bool, text: str) -> None:
+        path = self._wav_path(text)
+        try:
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                engine.save_to_file(text, str(path))
+                self._pump(engine, external)
+            with wave.open(str(path), "rb") as wf:
+                if wf.getsampwidth() != 2:
+                    raise ValueError("not 16-bit PCM")
+                rate, channels = wf.getframerate(), wf.getnchannels()
+                samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+            self._wavs[text] = (path, samples.reshape(-1, channels), rate)
+        except Exception as e:
+            # e.g. a driver that writes AIFF; the phrase is just spoken live
+            print(f"[TTS] Could not cache {text!r}: {e}")
+            path.unlink(missing_ok=True)
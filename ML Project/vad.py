@@ -0,0 +1,99 @@
+# vad.py
+from __future__ import annotations
+import math
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+import numpy as np
+
+# Items handed on to the recognizer: (capture time, int16 samples), or
+# (capture time, None) to mark the end of a speech segment. The samples are
+# views (of the caller's buffer or the pre-roll ring): copy them out before
+# the next process() call.
+Segment = Tuple[float, Optional[np.ndarray]]
+
+class EnergyVAD:
+    """Energy gate in front of the recognizer.
+
+    Each audio block is looked at as an int16 NumPy view (no copy) and split
+    into `frame_ms` frames; the block is speech if any frame is `threshold_db`
+    above the tracked noise floor (and above `min_dbfs`). Silent blocks are
+    copied into a fixed pre-roll ring and go no further. On speech onset the
+    ring is released first so word onsets are not clipped, and after speech
+    `hangover` seconds of audio are still passed on so the recognizer can
+    endpoint, followed by an end marker.
+    """
+
+    def __init__(self, samplerate: int = 16000, blocksize: int = 4000, frame_ms: float = 20.0,
+                 threshold_db: float = 9.0, min_dbfs: float = -50.0, preroll: float = 0.5,
+                 hangover: float = 0.75, floor_adapt: float = 0.1) -> None:
+        self.frame = max(1, int(samplerate * frame_ms / 1000))
+        self.threshold_db = threshold_db
+        self.min_dbfs = min_dbfs
+        self.floor_adapt = floor_adapt      # per block, toward the block's quietest frame
+        block_s = blocksize / samplerate
+        self.hangover_blocks = math.ceil(hangover / block_s)
+        n_pre = math.ceil(preroll / block_s)
+        self._ring = np.zeros((n_pre, blocksize), dtype=np.int16)
+        self._ring_t: Deque[Tuple[float, int, int]] = deque(maxlen=n_pre)  # (t, slot, samples)
+        self._slot = 0
+        self.floor_db: Optional[float] = None   # set from the first block
+        self.active = False
+        self._quiet = 0
+        self.counters = {"blocks": 0, "speech": 0, "forwarded": 0, "segments": 0}
+
+    def level_db(self, samples: np.ndarray) -> np.ndarray:
+        """Per-frame RMS level in dBFS."""
+        n = len(samples) - len(samples) % self.frame
+        frames = samples[:n].reshape(-1, self.frame) if n else samples.reshape(1, -1)
+        power = np.einsum("ij,ij->i", frames, frames, dtype=np.float64) / frames.shape[1]
+        return 10.0 * np.log10(power / 32768.0 ** 2 + 1e-12)
+
+    def is_speech(self, samples: np.ndarray) -> bool:
+        levels = self.level_db(samples)
+        if self.floor_db is None:
+            self.floor_db = float(levels.min())
+        loud = levels.max()
+        speech = loud > max(self.floor_db + self.threshold_db, self.min_dbfs)
+        # The quietest frame of a block is background even while talking, so the
+        # floor also climbs out of a noise level that started above it
+        self.floor_db += self.floor_adapt * (levels.min() - self.floor_db)
+        return speech
+
+    def process(self, t: float, indata) -> List[Segment]:
+        """Gate one block (any buffer of int16 samples, e.g. the PortAudio
+        callback's `indata`); returns what to pass to the recognizer."""
+        samples = np.frombuffer(indata, dtype=np.int16)
+        self.counters["blocks"] += 1
+        out: List[Segment] = []
+        if self.is_speech(samples):
+            self.counters["speech"] += 1
+            if not self.active:
+                self.active = True
+                self.counters["segments"] += 1
+                out += self._drain_preroll()
+            self._quiet = 0
+            out.append((t, samples))
+        elif self.active:
+            self._quiet += 1
+            out.append((t, samples))
+            if self._quiet >= self.hangover_blocks:
+                self.active = False
+                out.append((t, None))
+        else:
+            self._keep(t, samples)
+        self.counters["forwarded"] += sum(1 for _, data in out if data is not None)
+        return out
+
+    def _keep(self, t: float, samples: np.ndarray) -> None:
+        if self._ring_t.maxlen == 0:
+            return
+        n = min(len(samples), self._ring.shape[1])
+        np.copyto(self._ring[self._slot, :n], samples[:n])
+        self._ring_t.append((t, self._slot, n))
+        self._slot = (self._slot + 1) % len(self._ring)
+
+    def _drain_preroll(self) -> List[Segment]:
+        out = [(t, self._ring[slot, :n]) for t, slot, n in self._ring_t]
+        self._ring_t.clear()
+        return out
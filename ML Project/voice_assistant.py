@@ -1,138 +1,337 @@
 # voice_assistant.py
 from __future__ import annotations
 import json
-import queue
-import re
+import math
 import time
 import webbrowser
 from dataclasses import dataclass
+from queue import Empty
 
-import pyttsx3
+import numpy as np
 import sounddevice as sd
 from vosk import Model, KaldiRecognizer
 
 from actions import Action, ActionBus
+from audio_ring import AudioRing
+from config import ACTION_CONFIG, VOICE_CONFIG
+from dispatch import VoiceCommandTable, compile_voice_commands
+from vad import EnergyVAD
+
+UNK = "[unk]"
 
 @dataclass
 class VoiceConfig:
     model_path: str = "models/vosk-model-small-en-us-0.15"
     samplerate: int = 16000
     device: int | None = None  # set if you have multiple mics
+    blocksize: int = 4000      # samples per audio block (0.25 s); partial results arrive once per block
+    ring_seconds: float = 8.0  # audio buffered for the recognizer before blocks are dropped
+    ring_policy: str = "drop_oldest"
+
+    # Restrict recognition to the command phrases; "type ..." payloads are
+    # re-decoded with an open-vocabulary recognizer
+    grammar: bool = True
+    grammar_unk: bool = True   # let out-of-grammar speech decode to [unk] instead of the nearest command
+
+    # Fire a command from the partial hypothesis once it has been the same
+    # complete, unambiguous phrase for `partial_hits` blocks in a row
+    early_dispatch: bool = True
+    partial_hits: int = 2
+
+    # Energy gate: only speech (plus pre-roll and hangover) reaches Vosk
+    vad: bool = True
+    vad_threshold_db: float = 9.0   # above the tracked noise floor
+    vad_min_dbfs: float = -50.0
+    vad_preroll: float = 0.5        # s of audio kept from before the onset
+    vad_hangover: float = 0.75      # s of audio still decoded after speech, so Vosk can endpoint
+
+    # Wake word: until it is heard only a recognizer with that one phrase runs;
+    # commands are then recognized for `wake_window` s (an utterance in
+    # progress is finished) before going back to spotting
+    wake_word: str | None = VOICE_CONFIG["wake_word"]
+    wake_window: float = VOICE_CONFIG["wake_window"]
+
+def build_grammar(commands: VoiceCommandTable, keywords=(), unk: bool = True) -> str:
+    """Vosk grammar (JSON list of phrases) from the compiled command table."""
+    phrases = sorted(set(commands.table.names()) | set(commands.prefixes) | set(keywords))
+    if unk:
+        phrases.append(UNK)
+    return json.dumps(phrases)
 
 class VoiceAssistant:
-    def __init__(self, bus: ActionBus, cfg: VoiceConfig = VoiceConfig()) -> None:
+    def __init__(self, bus: ActionBus, cfg: VoiceConfig = VoiceConfig(), model: Model | None = None) -> None:
         self.bus = bus
         self.cfg = cfg
-        self.tts = pyttsx3.init()
-        self.tts.setProperty("rate", 175)
+        # VOICE_COMMANDS compiled once into a phrase -> handler table
+        self.commands = self._build_commands()
 
-        # Try to load Vosk model, but continue without it if not available
+        # Try to load Vosk model (unless one is passed in, e.g. shared by the
+        # voice benchmark), but continue without it if not available
         self.model = None
         self.rec = None
+        self._free_rec = None
+        self._spotter = None
+        wake = [cfg.wake_word] if cfg.wake_word else []
         try:
-            self.model = Model(cfg.model_path)
-            self.rec = KaldiRecognizer(self.model, cfg.samplerate)
+            self.model = model if model is not None else Model(cfg.model_path)
+            if cfg.grammar:
+                # The wake word is in the command grammar too, so "jarvis click" also works while awake
+                grammar = build_grammar(self.commands, [*VOICE_CONFIG["custom_keywords"], *wake], cfg.grammar_unk)
+                self.rec = KaldiRecognizer(self.model, cfg.samplerate, grammar)
+            else:
+                self.rec = KaldiRecognizer(self.model, cfg.samplerate)
             self.rec.SetWords(False)
-            print("[VoiceAssistant] Vosk model loaded successfully")
+            if wake:
+                self._spotter = KaldiRecognizer(self.model, cfg.samplerate, json.dumps([*wake, UNK]))
+                self._spotter.SetWords(False)
+            if model is None:
+                print("[VoiceAssistant] Vosk model loaded successfully")
         except Exception as e:
             print(f"[VoiceAssistant] Warning: Vosk model not available ({e})")
             print("[VoiceAssistant] Voice commands disabled. Gesture control only.")
 
-        self._audio_q: "queue.Queue[bytes]" = queue.Queue()
+        # Microphone -> recognizer, preallocated; the callback never allocates
+        self.ring = AudioRing(math.ceil(cfg.ring_seconds * cfg.samplerate / cfg.blocksize),
+                              cfg.blocksize, cfg.ring_policy)
+        self.vad = EnergyVAD(cfg.samplerate, cfg.blocksize, threshold_db=cfg.vad_threshold_db,
+                             min_dbfs=cfg.vad_min_dbfs, preroll=cfg.vad_preroll,
+                             hangover=cfg.vad_hangover) if cfg.vad else None
+
+        # Capture time of the audio block that completed the current utterance
+        self._t_capture: float | None = None
+        self._seq = 0
+
+        # Audio of the utterance in progress, kept for re-decoding "type ..." payloads
+        self._utterance = bytearray()
+        self._dictating = False
+        self._pending = False   # audio accepted since the last final result
 
-    def say(self, text: str) -> None:
-        self.tts.say(text)
-        self.tts.runAndWait()
+        # Partial-result tracking: current hypothesis, blocks it has held, command already fired
+        self._partial = ""
+        self._partial_count = 0
+        self._early: str | None = None
+
+        # Words that are never part of a command
+        self._ignored = {UNK, *(cfg.wake_word.split() if cfg.wake_word else ())}
+        self._awake = False
+        self._awake_until = -math.inf
+        self.counters = {"early": 0, "deduped": 0, "wakes": 0, "spotted": 0}
+        self._views_ok = True   # recognizer takes memoryviews (else bytes are made per block)
+
+    def _emit(self, type: str, **fields) -> None:
+        self.bus.put(Action(type=type, t_capture=self._t_capture, seq=self._seq, source="voice", **fields))
 
     def _callback(self, indata, frames, time_info, status) -> None:
         if status:
             # ignore status spam; could log if desired
             pass
-        self._audio_q.put(bytes(indata))
+        for t_block, samples in self.gate(time.perf_counter(), indata):
+            if samples is None:
+                self.ring.mark_end(t_block)
+            else:
+                self.ring.write(t_block, samples)
+
+    def gate(self, t_block: float, indata) -> list:
+        """(t, int16 view | None) items for one microphone block, see vad.Segment."""
+        if self.vad is None:
+            return [(t_block, np.frombuffer(indata, dtype=np.int16))]
+        return self.vad.process(t_block, indata)
+
+    def _build_commands(self):
+        handlers = {
+            "start_gestures": lambda: self._emit("TOGGLE_GESTURES", enabled=True),
+            "stop_gestures": lambda: self._emit("TOGGLE_GESTURES", enabled=False),
+            "resume": lambda: self._emit("TOGGLE_GESTURES", enabled=True),
+            "pause": lambda: self._emit("TOGGLE_GESTURES", enabled=False),
+            "click": lambda: self._emit("CLICK"),
+            "double_click": lambda: self._emit("DOUBLE_CLICK"),
+            "scroll_up": lambda: self._emit("SCROLL", amount=400),
+            "scroll_down": lambda: self._emit("SCROLL", amount=-400),
+            "type_text": lambda text: self._emit("TYPE_TEXT", text=text),
+            "open_youtube": lambda: self._emit("OPEN_URL", url="https://www.youtube.com"),
+            "open_google": lambda: self._emit("OPEN_URL", url="https://www.google.com"),
+            "get_time": lambda: self._emit("SAY", text=f"It is {time.strftime('%I:%M %p')}."),
+            "quit": lambda: self._emit("QUIT"),
+        }
+        return compile_voice_commands(handlers)
 
     def _handle_text(self, text: str) -> None:
         t = text.strip().lower()
         if not t:
             return
 
-        # Quit
-        if t in {"quit", "exit", "stop program", "close program"}:
-            self.bus.put(Action(type="SAY", text="Quitting."))
-            self.bus.put(Action(type="QUIT"))
+        # Feedback goes on the bus ahead of the handler's actions, so "Goodbye"
+        # is queued before QUIT closes the bus and "Checking time" comes before the time
+        match, _ = self.commands.dispatch(t, before=self._feedback)
+        if match is None:
+            self._emit("SAY", text="Sorry, I did not understand that command.")
             return
+        if match.kind in ("contained", "fuzzy"):
+            print(f"[VoiceAssistant] '{t}' -> '{match.phrase}' ({match.kind}, confidence {match.confidence:.2f})")
 
-        # Toggle gestures
-        if "stop gestures" in t or "disable gestures" in t:
-            self.bus.put(Action(type="TOGGLE_GESTURES", enabled=False))
-            self.bus.put(Action(type="SAY", text="Gestures disabled."))
-            return
+    def _feedback(self, binding) -> None:
+        if binding.feedback and ACTION_CONFIG["enable_voice_feedback"]:
+            self._emit("SAY", text=binding.feedback)
 
-        if "start gestures" in t or "enable gestures" in t:
-            self.bus.put(Action(type="TOGGLE_GESTURES", enabled=True))
-            self.bus.put(Action(type="SAY", text="Gestures enabled."))
-            return
+    @property
+    def available(self) -> bool:
+        return self.model is not None and self.rec is not None
 
-        # Mouse actions
-        if t in {"click", "mouse click"}:
-            self.bus.put(Action(type="CLICK"))
-            return
+    def open_stream(self, callback=None) -> sd.RawInputStream:
+        """Microphone stream feeding `callback` (default: the internal audio queue)."""
+        return sd.RawInputStream(
+            samplerate=self.cfg.samplerate,
+            blocksize=self.cfg.blocksize,
+            device=self.cfg.device,
+            dtype="int16",
+            channels=1,
+            callback=callback or self._callback,
+        )
 
-        if "double click" in t:
-            self.bus.put(Action(type="DOUBLE_CLICK"))
-            return
+    def _free_recognizer(self) -> KaldiRecognizer:
+        if self._free_rec is None:
+            self._free_rec = KaldiRecognizer(self.model, self.cfg.samplerate)
+            self._free_rec.SetWords(False)
+        return self._free_rec
 
-        if "scroll up" in t:
-            self.bus.put(Action(type="SCROLL", amount=400))
-            return
+    def _transcribe(self, audio: bytearray) -> str:
+        """Open-vocabulary transcript of one utterance."""
+        rec = self._free_recognizer()
+        self._accept_waveform(rec, audio)
+        return json.loads(rec.FinalResult()).get("text", "")
 
-        if "scroll down" in t:
-            self.bus.put(Action(type="SCROLL", amount=-400))
+    def _on_partial(self, t_block: float, partial: str) -> None:
+        words = [w for w in partial.split() if w not in self._ignored]
+        hypothesis = " ".join(words)
+        if hypothesis != self._partial:
+            self._partial, self._partial_count = hypothesis, 0
+        self._partial_count += 1
+        phrase = self.commands.complete(hypothesis)
+        if phrase is None or self._partial_count < self.cfg.partial_hits:
             return
+        self._early = phrase
+        self.counters["early"] += 1
+        self._t_capture = t_block
+        self._seq += 1
+        self._handle_text(phrase)
+
+    def _same_command(self, early: str, text: str) -> bool:
+        """True unless the final text names a different command than the one
+        already fired from a partial (an unmatched final is not answered again)."""
+        words = [w for w in text.split() if w not in self._ignored]
+        phrase, _ = self.commands.match(" ".join(words))
+        return phrase is None or self.commands.table.get(phrase) is self.commands.table.get(early)
+
+    def _accept_waveform(self, rec: KaldiRecognizer, data) -> bool:
+        if self._views_ok:
+            try:
+                return rec.AcceptWaveform(data)
+            except TypeError:
+                # Older bindings only take bytes
+                self._views_ok = False
+        return rec.AcceptWaveform(bytes(data))
 
-        # Type command: "type hello world"
-        m = re.match(r"^(type|write)\s+(.*)$", t)
-        if m:
-            self.bus.put(Action(type="TYPE_TEXT", text=m.group(2)))
+    def _spotting(self, t_block: float) -> bool:
+        """True while only the wake word is listened for."""
+        if self._spotter is None:
+            return False
+        if t_block <= self._awake_until or self._pending or self._dictating:
+            return False
+        if self._awake:
+            self._awake = False
+            print(f"[VoiceAssistant] Waiting for wake word '{self.cfg.wake_word}'")
+        return True
+
+    def _spot(self, t_block: float, data) -> None:
+        rec = self._spotter
+        if data is None:
+            text = json.loads(rec.FinalResult()).get("text", "")
+        else:
+            self.counters["spotted"] += 1
+            if self._accept_waveform(rec, data):
+                text = json.loads(rec.Result()).get("text", "")
+            else:
+                text = json.loads(rec.PartialResult()).get("partial", "")
+        if f" {self.cfg.wake_word} " not in f" {text} ":
             return
+        # Heard (possibly from a partial): commands from the next block on
+        rec.Reset()
+        self._awake = True
+        self._awake_until = t_block + self.cfg.wake_window
+        self.counters["wakes"] += 1
+        print(f"[VoiceAssistant] Wake word heard, listening for commands for {self.cfg.wake_window:g} s")
 
-        # Open sites
-        if "open youtube" in t:
-            self.bus.put(Action(type="OPEN_URL", url="https://www.youtube.com"))
+    def accept(self, t_block: float, data) -> None:
+        """Feed one audio block (bytes-like) to the recognizer; handles the text
+        when an utterance ends. data=None marks the end of a VAD speech segment."""
+        if self._spotting(t_block):
+            self._spot(t_block, data)
             return
+        rec = self._free_recognizer() if self._dictating else self.rec
+        if data is None:
+            if not self._pending:
+                return
+            text = json.loads(rec.FinalResult()).get("text", "")
+        else:
+            if self.cfg.grammar:
+                self._utterance += data
+            if not self._accept_waveform(rec, data):
+                self._pending = True
+                if self.cfg.early_dispatch and not self._dictating and self._early is None:
+                    self._on_partial(t_block, json.loads(rec.PartialResult()).get("partial", ""))
+                return
+            text = json.loads(rec.Result()).get("text", "")
 
-        if "open google" in t:
-            self.bus.put(Action(type="OPEN_URL", url="https://www.google.com"))
+        self._pending = False
+        audio, self._utterance = self._utterance, bytearray()
+        early, self._early = self._early, None
+        self._partial, self._partial_count = "", 0
+        if early is not None and self._same_command(early, text):
+            self.counters["deduped"] += 1
             return
+        self._t_capture = t_block
+        self._seq += 1
 
-        if "time" in t:
-            now = time.strftime("%I:%M %p")
-            self.bus.put(Action(type="SAY", text=f"It is {now}."))
+        if self._dictating:
+            # "type" on its own: this whole utterance is the text
+            self._dictating = False
+            if text:
+                self._handle_text(f"type {text}")
             return
 
-        # Default response
-        self.bus.put(Action(type="SAY", text="Sorry, I did not understand that command."))
+        if self.cfg.grammar:
+            words = [w for w in text.split() if w not in self._ignored]
+            if not words:
+                return  # out-of-grammar speech, noise or just the wake word
+            text = " ".join(words)
+            if words[0] in self.commands.prefixes:
+                payload = self._transcribe(audio).split()
+                if payload and payload[0] == words[0]:
+                    payload = payload[1:]
+                if not payload:
+                    self._dictating = True
+                    return
+                text = " ".join([words[0], *payload])
+        self._handle_text(text)
 
     def run(self) -> None:
-        if self.model is None or self.rec is None:
+        if not self.available:
             print("[VoiceAssistant] Voice recognition not available, voice thread exiting")
             return
         
-        self.bus.put(Action(type="SAY", text="Voice assistant started."))
+        self._emit("SAY", text="Voice assistant started.")
 
-        with sd.RawInputStream(
-            samplerate=self.cfg.samplerate,
-            blocksize=8000,
-            device=self.cfg.device,
-            dtype="int16",
-            channels=1,
-            callback=self._callback,
-        ):
-            while True:
-                data = self._audio_q.get()
-                if self.rec.AcceptWaveform(data):
-                    result = json.loads(self.rec.Result())
-                    text = result.get("text", "")
-                    self._handle_text(text)
-                else:
-                    # partial = json.loads(self.rec.PartialResult()).get("partial","")
-                    pass
\ No newline at end of file
+        with self.open_stream():
+            self.listen()
+
+    def listen(self) -> None:
+        """Recognizer loop: reads the audio ring until stop_listening()."""
+        while True:
+            try:
+                t_block, data = self.ring.read()
+            except Empty:
+                return
+            self.accept(t_block, data)
+
+    def stop_listening(self) -> None:
+        self.ring.close()
@@ -1,5 +1,9 @@
-import cv2, mediapipe as mp, numpy as np, pickle, pyttsx3, time, os, threading, queue
+import cv2, mediapipe as mp, numpy as np, time, os, sys
 from pathlib import Path
+# Shared speech service lives in the ML Project folder
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'ML Project'))
+from startup import Startup, load_pickle, warm_up
+from tts_service import TTSService
 
 mp_hands = mp.solutions.hands
 mp_drawing = mp.solutions.drawing_utils
@@ -11,30 +15,17 @@ model_path = Path(__file__).parent.parent / 'models' / 'gesture_rf.pkl'
 if not model_path.exists():
     print(f"ERROR: Model not found at {model_path}. Please train model first: python scripts/train_model.py")
     exit(1)
-mod = pickle.load(open(model_path,'rb')); clf = mod['model']; scaler = mod['scaler']
-
-# Initialize audio engine
-engine = pyttsx3.init()
-engine.setProperty('rate', 150)
-engine.setProperty('volume', 1.0)
-voice_queue = queue.Queue()
-
-def voice_worker():
-    """Background thread for speaking"""
-    while True:
-        try:
-            text = voice_queue.get(timeout=1)
-            if text is None:
-                break
-            print(f'🎤 Speaking: {text}')
-            engine.say(text)
-            engine.runAndWait()
-        except queue.Empty:
-            continue
+# Classifier (unpickling imports scikit-learn), camera and both MediaPipe graphs load in parallel
+startup = Startup()
+startup.submit('model', load_pickle, model_path)
+startup.submit('camera', cv2.VideoCapture, 0)
+startup.submit('face_mesh', lambda: warm_up(mp_face_mesh.FaceMesh(
+    static_image_mode=False,
+    max_num_faces=1,
+    min_detection_confidence=0.5,
+    min_tracking_confidence=0.5)))
+startup.submit('hands', lambda: warm_up(mp_hands.Hands(max_num_hands=1, min_detection_confidence=0.6)))
 
-# Start voice thread
-voice_thread = threading.Thread(target=voice_worker, daemon=True)
-voice_thread.start()
 
 GESTURE_ACTIONS = {'open_palm':'activate','fist':'close_app','thumbs_up':'confirm','swipe_right':'next','swipe_left':'prev','two_fingers':'volume_toggle','pointing':'mouse_control'}
 GESTURE_LABELS = {
@@ -47,6 +38,11 @@ GESTURE_LABELS = {
     'pointing': 'Pointing detected'
 }
 
+# Gesture announcements replace each other (key) and are pre-synthesized while idle
+tts = TTSService(rate=150, cache_dir=str(Path(__file__).parent.parent / 'models' / 'tts_cache'),
+                 cached=GESTURE_LABELS.values())
+tts.start()
+
 def draw_hud(frame, face_center_x, face_center_y, gesture_label, confidence=0):
     """Draw Jarvis HUD around face center"""
     h, w = frame.shape[:2]
@@ -111,14 +107,12 @@ def draw_hud(frame, face_center_x, face_center_y, gesture_label, confidence=0):
         offset = i - radius
         cv2.line(frame, (face_center_x - 5, face_center_y + offset), (face_center_x + 5, face_center_y + offset), red, 1)
 
-cap = cv2.VideoCapture(0)
+mod = startup.result('model'); clf = mod['model']; scaler = mod['scaler']
+cap = startup.result('camera')
+face_mesh, hands = startup.result('face_mesh'), startup.result('hands')
+print(startup.report())
 
-with mp_face_mesh.FaceMesh(
-    static_image_mode=False,
-    max_num_faces=1,
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5) as face_mesh, \
-     mp_hands.Hands(max_num_hands=1, min_detection_confidence=0.6) as hands:
+with face_mesh, hands:
     
     last_gesture = ('', 0)
     
@@ -159,7 +153,7 @@ with mp_face_mesh.FaceMesh(
             # Announce gesture change
             if pred != last_gesture[0] or now - last_gesture[1] > 2.0:
                 gesture_text = GESTURE_LABELS.get(pred, pred)
-                voice_queue.put(gesture_text)
+                tts.say(gesture_text, key='gesture')
                 last_gesture = (pred, now)
         
         # Draw HUD following head
@@ -177,5 +171,5 @@ with mp_face_mesh.FaceMesh(
 
 cap.release()
 cv2.destroyAllWindows()
-voice_queue.put(None)
+tts.close()
 print('✓ Jarvis AR HUD closed')
@@ -1,35 +1,21 @@
-import cv2, mediapipe as mp, numpy as np, pickle, pyttsx3, time, os, threading, queue
+import cv2, mediapipe as mp, numpy as np, time, os, sys
 from pathlib import Path
+# Shared speech service lives in the ML Project folder
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'ML Project'))
+from startup import Startup, load_pickle, warm_up
+from tts_service import TTSService
 mp_hands = mp.solutions.hands; mp_drawing = mp.solutions.drawing_utils
 # Load model with proper path handling
 model_path = Path(__file__).parent.parent / 'models' / 'gesture_rf.pkl'
 if not model_path.exists():
     print(f"ERROR: Model not found at {model_path}. Please train model first: python scripts/train_model.py")
     exit(1)
-mod = pickle.load(open(model_path,'rb')); clf = mod['model']; scaler = mod['scaler']
+# Classifier (unpickling imports scikit-learn), camera and hand graph load in parallel
+startup = Startup()
+startup.submit('model', load_pickle, model_path)
+startup.submit('camera', cv2.VideoCapture, 0)
+startup.submit('hands', lambda: warm_up(mp_hands.Hands(max_num_hands=1, min_detection_confidence=0.6)))
 
-# Initialize audio engine
-engine = pyttsx3.init()
-engine.setProperty('rate', 150)
-engine.setProperty('volume', 1.0)
-voice_queue = queue.Queue()
-
-def voice_worker():
-    """Background thread for speaking"""
-    while True:
-        try:
-            text = voice_queue.get(timeout=1)
-            if text is None:
-                break
-            print(f'🎤 Speaking: {text}')
-            engine.say(text)
-            engine.runAndWait()
-        except queue.Empty:
-            continue
-
-# Start voice thread
-voice_thread = threading.Thread(target=voice_worker, daemon=True)
-voice_thread.start()
 
 GESTURE_ACTIONS = {'open_palm':'activate','fist':'close_app','thumbs_up':'confirm','swipe_right':'next','swipe_left':'prev','two_fingers':'volume_toggle','pointing':'mouse_control'}
 GESTURE_LABELS = {
@@ -41,8 +27,15 @@ GESTURE_LABELS = {
     'two_fingers': 'Two Fingers detected',
     'pointing': 'Pointing detected'
 }
-cap = cv2.VideoCapture(0)
-with mp_hands.Hands(max_num_hands=1, min_detection_confidence=0.6) as hands:
+
+# Gesture announcements replace each other (key) and are pre-synthesized while idle
+tts = TTSService(rate=150, cache_dir=str(Path(__file__).parent.parent / 'models' / 'tts_cache'),
+                 cached=GESTURE_LABELS.values())
+tts.start()
+mod = startup.result('model'); clf = mod['model']; scaler = mod['scaler']
+cap = startup.result('camera'); hands = startup.result('hands')
+print(startup.report())
+with hands:
     last_gesture = ('', 0); 
     while True:
         ret, frame = cap.read()
@@ -61,7 +54,7 @@ with mp_hands.Hands(max_num_hands=1, min_detection_confidence=0.6) as hands:
                 action = GESTURE_ACTIONS.get(pred, 'unknown')
                 print(f'✓ Detected: {gesture_text}'); 
                 # Queue speech (non-blocking)
-                voice_queue.put(gesture_text)
+                tts.say(gesture_text, key='gesture')
                 last_gesture = (pred, now)
                 with open('last_state.txt','w') as f: f.write(f'{pred}|{action}')
         # Display gesture label on screen
@@ -71,5 +64,5 @@ with mp_hands.Hands(max_num_hands=1, min_detection_confidence=0.6) as hands:
             print('Closing Jarvis...')
             break
 cap.release(); cv2.destroyAllWindows()
-voice_queue.put(None)  # Signal voice thread to stop
+tts.close()
 print('✓ Jarvis closed')
@@ -1,23 +1,18 @@
 import cv2
 import mediapipe as mp
 import numpy as np
-import pickle
 import time
 import math
 from pathlib import Path
-import threading
-import queue
+import sys
 import psutil
 import subprocess
 from datetime import datetime
-
-# Import pyttsx3 separately to handle errors
-try:
-    import pyttsx3
-    VOICE_ENABLED = True
-except Exception as e:
-    print(f"Warning: Voice system unavailable - {e}")
-    VOICE_ENABLED = False
+# Shared dispatch tables live in the ML Project folder
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'ML Project'))
+from dispatch import DispatchTable
+from startup import Startup, load_pickle, warm_up
+from tts_service import HIGH, LOW, NORMAL, TTSService
 
 mp_hands = mp.solutions.hands
 mp_drawing = mp.solutions.drawing_utils
@@ -28,76 +23,6 @@ model_path = Path(__file__).parent.parent / 'models' / 'gesture_rf.pkl'
 if not model_path.exists():
     print(f"ERROR: Model not found at {model_path}. Please train model first: python scripts/train_model.py")
     exit(1)
-mod = pickle.load(open(model_path,'rb'))
-clf = mod['model']
-scaler = mod['scaler']
-
-# Initialize audio engine in thread
-voice_queue = queue.Queue()
-voice_running = True
-
-def speak_text(text):
-    """Wrapper to safely add text to voice queue"""
-    if VOICE_ENABLED:
-        print(f'[VOICE] Queued: {text}')
-        voice_queue.put(text)
-    else:
-        print(f'[VOICE] Disabled: {text}')
-
-def voice_worker():
-    """Background thread for speaking - completely isolated"""
-    if not VOICE_ENABLED:
-        print("Voice worker: pyttsx3 not available")
-        return
-    
-    engine = None
-    try:
-        # Initialize engine in this thread
-        engine = pyttsx3.init()
-        engine.setProperty('rate', 160)
-        engine.setProperty('volume', 1.0)
-        print("[OK] Voice engine initialized in background thread")
-        
-        while voice_running:
-            try:
-                # Get text with short timeout
-                text = voice_queue.get(timeout=0.3)
-                
-                if text is None or not voice_running:
-                    break
-                
-                # Speak the text
-                print(f'[SPEAK] {text}')
-                engine.say(text)
-                engine.runAndWait()
-                
-                # Small delay to prevent overlap
-                time.sleep(0.2)
-                
-            except queue.Empty:
-                continue
-            except Exception as e:
-                print(f"Voice speak error: {e}")
-                # Try to reinitialize engine
-                try:
-                    engine = pyttsx3.init()
-                except:
-                    pass
-                continue
-                
-    except Exception as e:
-        print(f"Voice thread error: {e}")
-    finally:
-        if engine:
-            try:
-                engine.stop()
-            except:
-                pass
-
-# Start voice thread
-voice_thread = threading.Thread(target=voice_worker, daemon=True)
-voice_thread.start()
-time.sleep(0.3)  # Give voice system time to initialize
 
 GESTURE_LABELS = {
     'open_palm': 'Open Palm detected',
@@ -109,6 +34,17 @@ GESTURE_LABELS = {
     'pointing': 'Pointing detected'
 }
 
+# One speech thread: gesture announcements supersede each other (key) and
+# are pre-synthesized while idle; system messages interrupt them
+tts = TTSService(rate=160, cache_dir=str(Path(__file__).parent.parent / 'models' / 'tts_cache'),
+                 cached=list(GESTURE_LABELS.values()) + ['Opening Chrome', 'Closing window'])
+tts.start()
+
+def speak_text(text, priority=LOW, key='gesture'):
+    """Queue text on the TTS service (never blocks the frame loop)"""
+    if tts.available and tts.say(text, priority, key):
+        print(f'[VOICE] Queued: {text}')
+
 GESTURE_ACTIONS = {
     'open_palm': 'activate_chrome',
     'fist': 'close_window',
@@ -177,45 +113,50 @@ class NotificationSystem:
         self.notifications = active
         return active
 
-# Action executor
+# Action executor: GESTURE_ACTIONS names -> handlers, compiled once; one action per 2 s
+def _activate_chrome(notifications):
+    subprocess.Popen(['chrome', '--new-window'])
+    notifications.add('[OK] Opening Chrome Browser')
+    speak_text('Opening Chrome', NORMAL, key=None)
+
+def _close_window(notifications):
+    # Send Alt+F4 on Windows
+    import pyautogui
+    pyautogui.hotkey('alt', 'F4')
+    notifications.add('[OK] Closing Window')
+    speak_text('Closing window', NORMAL, key=None)
+
+def _next_tab(notifications):
+    import pyautogui
+    pyautogui.hotkey('ctrl', 'tab')
+    notifications.add('[>>] Next Tab')
+
+def _prev_tab(notifications):
+    import pyautogui
+    pyautogui.hotkey('ctrl', 'shift', 'tab')
+    notifications.add('[<<] Previous Tab')
+
+def _volume_up(notifications):
+    import pyautogui
+    pyautogui.press('volumeup')
+    notifications.add('[VOL+] Volume Up')
+
+ACTION_TABLE = DispatchTable(cooldown=2.0)
+for _name, _handler in {'activate_chrome': _activate_chrome, 'close_window': _close_window,
+                        'next_tab': _next_tab, 'prev_tab': _prev_tab, 'volume_up': _volume_up}.items():
+    ACTION_TABLE.bind(_name, _handler)
+
 def execute_action(action_name, notifications):
-    """Execute gesture-triggered actions"""
+    """Execute gesture-triggered actions (False if unknown, cooling down or failed)"""
     if not ACTIONS_ENABLED:
         notifications.add('[INFO] Actions disabled')
         return False
     try:
-        if action_name == 'activate_chrome':
-            subprocess.Popen(['chrome', '--new-window'])
-            notifications.add('[OK] Opening Chrome Browser')
-            speak_text('Opening Chrome')
-            return True
-        elif action_name == 'close_window':
-            # Send Alt+F4 on Windows
-            import pyautogui
-            pyautogui.hotkey('alt', 'F4')
-            notifications.add('[OK] Closing Window')
-            speak_text('Closing window')
-            return True
-        elif action_name == 'next_tab':
-            import pyautogui
-            pyautogui.hotkey('ctrl', 'tab')
-            notifications.add('[>>] Next Tab')
-            return True
-        elif action_name == 'prev_tab':
-            import pyautogui
-            pyautogui.hotkey('ctrl', 'shift', 'tab')
-            notifications.add('[<<] Previous Tab')
-            return True
-        elif action_name == 'volume_up':
-            import pyautogui
-            pyautogui.press('volumeup')
-            notifications.add('[VOL+] Volume Up')
-            return True
+        return ACTION_TABLE.dispatch(action_name, notifications)
     except Exception as e:
         notifications.add(f'[ERROR] Action failed: {action_name}')
         print(f"Action error: {e}")
         return False
-    return False
 
 
 class StarkHUDElement:
@@ -828,18 +769,38 @@ class StarkHUDSystem:
                        font, 0.4, white, 1)
 
 
-def main():
-    # Set camera to highest resolution
+def open_camera():
+    """Open the webcam at the highest resolution it supports"""
     cap = cv2.VideoCapture(0)
     cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1920)
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 1080)
+    return cap
+
+
+def main():
+    # Classifier (unpickling imports scikit-learn), camera and both MediaPipe
+    # graphs load in parallel, each warmed up so the first frame is not slow
+    startup = Startup()
+    startup.submit('model', load_pickle, model_path)
+    startup.submit('camera', open_camera)
+    startup.submit('face_mesh', lambda: warm_up(mp_face_mesh.FaceMesh(
+        static_image_mode=False,
+        max_num_faces=1,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5)))
+    startup.submit('hands', lambda: warm_up(mp_hands.Hands(max_num_hands=1, min_detection_confidence=0.6)))
+    
+    hud_system = StarkHUDSystem()
+    
+    mod = startup.result('model')
+    clf = mod['model']
+    scaler = mod['scaler']
+    cap = startup.result('camera')
     
     # Get actual resolution
     actual_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     actual_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     
-    hud_system = StarkHUDSystem()
-    
     # Welcome message
     print("=" * 60)
     print("STARK INDUSTRIES AR HUD SYSTEM")
@@ -847,10 +808,9 @@ def main():
     print(f"Resolution: {actual_width}x{actual_height}")
     print("Initializing voice system...")
     
-    if VOICE_ENABLED:
-        speak_text("Welcome to Stark Industries A R HUD system. All systems online.")
-        time.sleep(0.5)
-        speak_text("Gesture recognition system active.")
+    if tts.available:
+        speak_text("Welcome to Stark Industries A R HUD system. All systems online.", HIGH, key=None)
+        speak_text("Gesture recognition system active.", HIGH, key=None)
         print("[OK] Voice system active")
     else:
         print("[WARNING] Voice system disabled")
@@ -866,16 +826,12 @@ def main():
     cv2.namedWindow('Stark Industries AR HUD', cv2.WINDOW_NORMAL)
     cv2.setWindowProperty('Stark Industries AR HUD', cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
     
-    with mp_face_mesh.FaceMesh(
-        static_image_mode=False,
-        max_num_faces=1,
-        min_detection_confidence=0.5,
-        min_tracking_confidence=0.5) as face_mesh, \
-         mp_hands.Hands(max_num_hands=1, min_detection_confidence=0.6) as hands:
+    face_mesh, hands = startup.result('face_mesh'), startup.result('hands')
+    print(startup.report())
+    
+    with face_mesh, hands:
         
         last_gesture = ('', 0)
-        last_action_time = 0
-        action_cooldown = 2.0  # seconds between actions
         fps_time = time.time()
         fps_counter = 0
         fps_display = 0
@@ -928,11 +884,10 @@ def main():
                     # Speak the gesture
                     speak_text(gesture_text)
                     
-                    # Execute action if cooldown passed
-                    if now - last_action_time >= action_cooldown:
-                        action = GESTURE_ACTIONS.get(pred, None)
-                        if action and execute_action(action, hud_system.notifications):
-                            last_action_time = now
+                    # Execute action (ACTION_TABLE enforces the cooldown)
+                    action = GESTURE_ACTIONS.get(pred, None)
+                    if action:
+                        execute_action(action, hud_system.notifications)
                     
                     last_gesture = (pred, now)
                     first_gesture = False
@@ -965,8 +920,7 @@ def main():
             key = cv2.waitKey(1) & 0xFF
             if key == 27:  # ESC
                 print('Shutting down Stark Industries HUD...')
-                speak_text("Shutting down HUD system. Goodbye.")
-                time.sleep(1.5)  # Give time for goodbye message
+                speak_text("Shutting down HUD system. Goodbye.", HIGH, key=None)
                 break
             elif key == ord('f') or key == ord('F'):  # Toggle fullscreen
                 fullscreen = not fullscreen
@@ -980,14 +934,9 @@ def main():
         cap.release()
         cv2.destroyAllWindows()
         
-        # Proper cleanup
-        global voice_running
-        voice_running = False
-        voice_queue.put(None)
-        
-        # Wait for voice thread to finish
-        if voice_thread.is_alive():
-            voice_thread.join(timeout=2)
+        # Let the goodbye message finish, then stop the speech thread
+        tts.wait(timeout=3.0)
+        tts.close()
         
         print('[OK] Stark Industries HUD closed')
 
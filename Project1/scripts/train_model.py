@@ -1,8 +1,16 @@
-import glob, pandas as pd, numpy as np, pickle, os
+import glob, pandas as pd, numpy as np, pickle, os, sys, argparse
+from pathlib import Path
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import classification_report, confusion_matrix
+# Shared dataset tooling lives in the ML Project folder
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'ML Project'))
+from dedup import group_train_test_split, prune, session_groups
+parser = argparse.ArgumentParser()
+parser.add_argument('--group-split', action='store_true', help='split by recording session to avoid leakage')
+parser.add_argument('--dedup', choices=['kdtree','grid','coreset'], help='prune near-duplicate training samples')
+args = parser.parse_args()
 files = glob.glob('data/landmarks/*.csv')
 if not files:
     print('ERROR: No landmark CSVs found in data/landmarks.')
@@ -16,9 +24,20 @@ print(f'Found {len(files)} gesture files: {files}')
 df = pd.concat([pd.read_csv(f) for f in files], ignore_index=True)
 print(f'Total samples: {len(df)}')
 print(f'Classes: {df["label"].unique()}')
-labels = df['label']; X = df.drop(columns=['label']).values
-scaler = StandardScaler(); Xs = scaler.fit_transform(X)
-X_train,X_test,y_train,y_test = train_test_split(Xs, labels, test_size=0.2, stratify=labels, random_state=42)
+labels = df['label'].values; X = df.drop(columns=['label','session'], errors='ignore').values
+if args.group_split:
+    groups = session_groups(df)
+    print(f'Splitting by recording session ({len(np.unique(groups))} groups)')
+    X_train,X_test,y_train,y_test = group_train_test_split(X, labels, groups, test_size=0.2, random_state=42)
+else:
+    X_train,X_test,y_train,y_test = train_test_split(X, labels, test_size=0.2, stratify=labels, random_state=42)
+if args.dedup:
+    cols = [c for c in df.columns if c not in ('label','session')]
+    train_df = pd.DataFrame(X_train, columns=cols); train_df['label'] = y_train
+    train_df = prune(train_df, method=args.dedup)
+    print(f'Dedup ({args.dedup}): {len(X_train)} -> {len(train_df)} training samples')
+    X_train = train_df[cols].values; y_train = train_df['label'].values
+scaler = StandardScaler(); X_train = scaler.fit_transform(X_train); X_test = scaler.transform(X_test)
 clf = RandomForestClassifier(n_estimators=200, random_state=42); clf.fit(X_train,y_train)
 pred = clf.predict(X_test); 
 print('\n=== Classification Report ===')